@@ -1,4 +1,6 @@
+from collections import deque
 import os
+import threading
 
 from PySide6.QtWidgets import (
         QApplication, QWidget, QLayout, QLineEdit, QFrame, QListView, QListWidget, QListWidgetItem,
@@ -7,9 +9,15 @@ from PySide6.QtCore import QSize, QSettings, Qt, QTimer, QThread
 from PySide6.QtGui import QFontDatabase, QIcon, QIntValidator, QKeySequence, QShortcut
 
 from OSCR import LIVE_TABLE_HEADER, OSCR, TABLE_HEADER, TREE_HEADER, HEAL_TREE_HEADER
-from .datamodels import CombatModel
-from .iofunctions import get_asset_path, load_icon_series, load_icon, open_link
+from .datamodels import CombatModel, UploadQueueModel
+from .iofunctions import (
+        get_asset_path, get_live_parser_settings, load_icon_series, load_icon, load_settings,
+        open_link)
 from .leagueconnector import OSCRClient
+from .leaguerequests import LeagueRequests
+from .leaguesnapshots import LadderSnapshotStore
+from .leagueupload import UploadJob, UploadLedger, UploadQueue
+from .localleague import LocalLeagueStore
 from .textedit import format_path
 from .translation import init_translation, tr
 from .widgetbuilder import (
@@ -35,19 +43,25 @@ class OSCRUI():
     from .datafunctions import (
             analysis_data_slot, analyze_log_background, analyze_log_callback,
             copy_analysis_callback, copy_analysis_table_callback, copy_summary_callback,
-            insert_combat, update_shown_columns_dmg, update_shown_columns_heal)
+            insert_combat, show_archived_combat, update_shown_columns_dmg,
+            update_shown_columns_heal)
     from .displayer import create_legend_item
     from .iofunctions import browse_path
+    from .overlay import check_live_overlay, close_live_overlay, live_overlay_toggle
     from .style import get_style_class, create_style_sheet, theme_font, get_style
-    from .subwindows import live_parser_toggle, show_detection_info, show_parser_error, split_dialog
+    from .subwindows import (
+            ladder_snapshots_dialog, live_parser_toggle, local_league_dialog, replay_live_session,
+            show_detection_info, show_parser_error, split_dialog)
     from .widgetbuilder import create_analysis_table, create_annotated_slider, create_button
     from .widgetbuilder import create_button_series, create_combo_box, create_entry, create_frame
     from .widgetbuilder import create_icon_button, create_label, style_table
     from .leagueconnector import apply_league_table_filter, download_and_view_combat
     from .leagueconnector import (
-            establish_league_connection, extend_ladder, slot_ladder,
+            establish_league_connection, extend_ladder, prefetch_ladder, slot_ladder,
             update_seasonal_records)
-    from .leagueconnector import upload_callback
+    from .leagueconnector import run_upload_queue, schedule_league_prefetch, upload_callback
+    from .leagueconnector import save_ladder_snapshot, show_ladder_snapshot
+    from .leagueconnector import add_local_league_logs, show_local_ladder
 
     app_dir = None
 
@@ -61,6 +75,13 @@ class OSCRUI():
     widgets: WidgetStorage
 
     league_api: OSCRClient
+    league_requests: LeagueRequests
+    upload_queue: UploadQueue
+    upload_ledger: UploadLedger
+    ladder_snapshots: LadderSnapshotStore
+    local_league: LocalLeagueStore
+    local_league_requests: LeagueRequests
+    logfile_requests: LeagueRequests
 
     def __init__(self, theme, args, path, config, versions) -> None:
         """
@@ -81,13 +102,29 @@ class OSCRUI():
         self.widgets = WidgetStorage()
         self.live_parser_window = None
         self.live_parser = None
+        self.live_combats = deque()  # combats handed off by the LiveParser
+        self.archived_combats = list()  # combats of the opened log archive, most recent first
+        self.log_reader = None  # LogTailReader the LiveParser follows the STO log with
+        self.live_overlay = None  # LiveOverlayProcess when the LiveParser runs in its own process
         self.init_settings()
         self.init_config()
 
         init_translation(self.settings.value('language'))
         self.league_api = None
+        self.league_requests = None
+        self.upload_queue = UploadQueue(self.config['upload_queue_path'])
+        self.upload_ledger = UploadLedger(self.config['upload_ledger_path'])
+        self.upload_batch: list[UploadJob] = list()  # jobs started since the queue was last idle
+        self.ladder_snapshots = LadderSnapshotStore(self.config['ladder_snapshots_path'])
+        self.local_league = LocalLeagueStore(self.config['local_league_path'])
+        self.local_league_requests = LeagueRequests(1)
+        self.logfile_requests = LeagueRequests(1)  # archiving and other work on whole logfiles
+        self.app_closing = threading.Event()  # stops background work on logs when the app closes
 
         self.app, self.window = self.create_main_window()
+        self.live_overlay_timer = QTimer()
+        self.live_overlay_timer.setInterval(250)
+        self.live_overlay_timer.timeout.connect(self.check_live_overlay)
         self.copy_shortcut = QShortcut(
                 QKeySequence.StandardKey.Copy, self.window, self.copy_analysis_table_callback)
         self.init_parser()
@@ -95,6 +132,9 @@ class OSCRUI():
         self.setup_main_layout()
 
         self.window.show()
+        # resume uploads that were queued when the app was closed
+        QTimer.singleShot(1000, self.run_upload_queue)
+        self.schedule_league_prefetch()
         if self.settings.value('auto_scan', type=bool):
             QTimer.singleShot(
                     100,
@@ -152,17 +192,7 @@ class OSCRUI():
         """
         Prepares settings. Loads stored settings. Saves current settings for next startup.
         """
-
-        # For Windows, Keep the Local settings for now as people are more familiar with that.
-        if os.name == "nt":
-            settings_path = os.path.abspath(self.app_dir + self.config["settings_path"])
-            self.settings = QSettings(settings_path, QSettings.Format.IniFormat)
-        else:
-            self.settings = QSettings("OSCR", "OSCR-UI")
-
-        for setting, value in self.config['default_settings'].items():
-            if self.settings.value(setting, None) is None:
-                self.settings.setValue(setting, value)
+        self.settings = load_settings(self.app_dir, self.config)
         if not self.settings.value('log_path', ''):
             self.settings.setValue('log_path', format_path(self.app_dir))
 
@@ -178,6 +208,20 @@ class OSCRUI():
         self.config['settings_path'] = os.path.abspath(self.app_dir + self.config['settings_path'])
         self.config['templog_folder_path'] = os.path.abspath(
                 self.app_dir + self.config['templog_folder_path'])
+        self.config['live_sessions_folder_path'] = os.path.abspath(
+                self.app_dir + self.config['live_sessions_folder_path'])
+        self.config['league_cache_folder_path'] = os.path.abspath(
+                self.app_dir + self.config['league_cache_folder_path'])
+        self.config['log_cache_folder_path'] = os.path.abspath(
+                self.app_dir + self.config['log_cache_folder_path'])
+        self.config['upload_queue_path'] = os.path.abspath(
+                self.app_dir + self.config['upload_queue_path'])
+        self.config['upload_ledger_path'] = os.path.abspath(
+                self.app_dir + self.config['upload_ledger_path'])
+        self.config['ladder_snapshots_path'] = os.path.abspath(
+                self.app_dir + self.config['ladder_snapshots_path'])
+        self.config['local_league_path'] = os.path.abspath(
+                self.app_dir + self.config['local_league_path'])
 
     def init_parser(self):
         """
@@ -186,6 +230,7 @@ class OSCRUI():
         self.parser = OSCR(settings=self.parser_settings)
         self.parser_signals = ParserSignals()
         self.parser_signals.analyzed_combat.connect(self.insert_combat)
+        self.parser_signals.analyzed_archived_combat.connect(self.show_archived_combat)
         self.parser_signals.parser_error.connect(self.show_parser_error)
         self.parser.combat_analyzed_callback = lambda c: self.parser_signals.analyzed_combat.emit(c)
         self.parser.error_callback = lambda e: self.parser_signals.parser_error.emit(e)
@@ -212,7 +257,7 @@ class OSCRUI():
         """
         Returns settings relevant to the LiveParser
         """
-        return {'seconds_between_combats': self.settings.value('seconds_between_combats', type=int)}
+        return get_live_parser_settings(self.settings)
 
     @property
     def sidebar_item_width(self) -> int:
@@ -232,6 +277,12 @@ class OSCRUI():
         self.settings.setValue('geometry', window_geometry)
         self.settings.setValue('overview_splitter', self.widgets.overview_splitter.saveState())
         self.settings.setValue('analysis_splitter', self.widgets.analysis_splitter.saveState())
+        self.close_live_overlay()
+        if self.league_requests is not None:
+            self.league_requests.cancel_all()
+        self.app_closing.set()
+        self.local_league_requests.cancel_all()
+        self.logfile_requests.cancel_all()
         event.accept()
 
     def main_window_resize_callback(self, event):
@@ -481,6 +532,7 @@ class OSCRUI():
         background_frame.setLayout(background_layout)
         self.current_combats = QListView(background_frame)
         self.current_combats.setEditTriggers(QListView.EditTrigger.NoEditTriggers)
+        self.current_combats.setSelectionMode(QListView.SelectionMode.ExtendedSelection)
         self.current_combats.setStyleSheet(self.get_style_class('QListView', 'listbox'))
         self.current_combats.setFont(self.theme_font('listbox'))
         self.current_combats.setAlternatingRowColors(True)
@@ -724,6 +776,18 @@ class OSCRUI():
         icon_layout = QHBoxLayout()
         icon_layout.setContentsMargins(0, 0, 0, 0)
         icon_layout.setSpacing(self.theme['defaults']['csp'])
+        upload_progress_label = self.create_label('')
+        upload_progress_label.hide()
+        self.widgets.upload_progress_label = upload_progress_label
+        icon_layout.addWidget(upload_progress_label, alignment=AVCENTER)
+        upload_status_names = {
+            UploadJob.QUEUED: tr('Queued'), UploadJob.RUNNING: tr('Uploading'),
+            UploadJob.UPLOADED: tr('Uploaded'), UploadJob.SKIPPED: tr('Skipped'),
+            UploadJob.FAILED: tr('Failed')
+        }
+        self.widgets.upload_queue_model = UploadQueueModel(
+                self.upload_queue, tr(('Combat', 'Status', 'Result')), upload_status_names,
+                self.theme_font('table'))
         copy_button = self.create_icon_button(self.icons['copy'], tr('Copy Result'))
         copy_button.clicked.connect(self.copy_summary_callback)
         icon_layout.addWidget(copy_button)
@@ -927,6 +991,7 @@ class OSCRUI():
                 'border-style': 'solid', 'border-width': '@bw',
                 'border-color': '@bc'}
         self.style_table(ladder_table, table_style, single_row_selection=True)
+        ladder_table.verticalScrollBar().valueChanged.connect(self.prefetch_ladder)
         self.widgets.ladder_table = ladder_table
         layout.addWidget(ladder_table, stretch=1)
 
@@ -940,11 +1005,23 @@ class OSCRUI():
         search_bar = self.create_entry(
                 placeholder=tr('name@handle'),
                 style_override={'margin-left': '@isp', 'margin-top': 0})
-        search_bar.textChanged.connect(lambda text: self.apply_league_table_filter(text))
+        # filter once typing paused instead of on every keystroke
+        search_timer = QTimer(search_bar)
+        search_timer.setSingleShot(True)
+        search_timer.setInterval(self.config['ladder_search_delay'])
+        search_timer.timeout.connect(lambda: self.apply_league_table_filter(search_bar.text()))
+        search_bar.textChanged.connect(lambda text: search_timer.start())
         control_layout.addWidget(search_bar, 0, 1, alignment=AVCENTER)
+        snapshot_label = self.create_label('')
+        self.widgets.ladder_snapshot_label = snapshot_label
+        control_layout.addWidget(snapshot_label, 0, 2, alignment=ARIGHT | AVCENTER)
         control_button_style = {
             tr('View Parse'): {'callback': self.download_and_view_combat},
-            tr('More'): {'callback': self.extend_ladder, 'style': {'margin-right': 0}}
+            tr('More'): {'callback': self.extend_ladder},
+            tr('Save Snapshot'): {'callback': self.save_ladder_snapshot},
+            tr('Snapshots'): {'callback': self.ladder_snapshots_dialog},
+            tr('Local League'): {
+                'callback': self.local_league_dialog, 'style': {'margin-right': 0}}
         }
         control_button_layout = self.create_button_series(
                 control_button_style, 'button', seperator='•')
@@ -997,7 +1074,7 @@ class OSCRUI():
         live_parser_button = self.create_icon_button(
                 self.icons['live-parser'], tr('Live Parser'), 'live_icon_button', icon_size=size)
         live_parser_button.setCheckable(True)
-        live_parser_button.clicked[bool].connect(lambda checked: self.live_parser_toggle(checked))
+        live_parser_button.clicked[bool].connect(lambda checked: self.live_overlay_toggle(checked))
         menu_layout.addWidget(live_parser_button, 0, 2)
         self.widgets.live_parser_button = live_parser_button
         menu_frame.setLayout(menu_layout)
@@ -1134,37 +1211,51 @@ class OSCRUI():
         live_graph_field_combo.currentIndexChanged.connect(
                 lambda new_index: self.settings.setValue('live_graph_field', new_index))
         sec_1.addWidget(live_graph_field_combo, 10, 1, alignment=ALEFT)
+        live_graph_window_label = self.create_label(
+                tr('LiveParser Graph Duration:'), 'label_subhead')
+        sec_1.addWidget(live_graph_window_label, 11, 0, alignment=ARIGHT)
+        live_graph_window_combo = self.create_combo_box(style_override={'font': '@small_text'})
+        graph_windows = self.config['live_graph_windows']
+        live_graph_window_combo.addItems(tuple(graph_windows.keys()))
+        current_window = self.settings.value('live_graph_window', type=int)
+        for window_text, window_length in graph_windows.items():
+            if window_length == current_window:
+                live_graph_window_combo.setCurrentText(window_text)
+        live_graph_window_combo.currentTextChanged.connect(
+                lambda new_text: self.settings.setValue(
+                    'live_graph_window', graph_windows[new_text]))
+        sec_1.addWidget(live_graph_window_combo, 11, 1, alignment=ALEFT)
         live_name_label = self.create_label(tr('LiveParser Player:'), 'label_subhead')
-        sec_1.addWidget(live_name_label, 11, 0, alignment=ARIGHT)
+        sec_1.addWidget(live_name_label, 12, 0, alignment=ARIGHT)
         live_player_combo = self.create_combo_box(style_override={'font': '@small_text'})
         live_player_combo.addItems(('Name', 'Handle'))
         live_player_combo.setCurrentText(self.settings.value('live_player', type=str))
         live_player_combo.currentTextChanged.connect(
                 lambda new_text: self.settings.setValue('live_player', new_text))
-        sec_1.addWidget(live_player_combo, 11, 1, alignment=ALEFT)
+        sec_1.addWidget(live_player_combo, 12, 1, alignment=ALEFT)
         overview_tab_label = self.create_label(tr('Default Overview Tab:'), 'label_subhead')
-        sec_1.addWidget(overview_tab_label, 12, 0, alignment=ARIGHT)
+        sec_1.addWidget(overview_tab_label, 13, 0, alignment=ARIGHT)
         overview_tab_combo = self.create_combo_box(style_override={'font': '@small_text'})
         overview_tab_combo.addItems((tr('DPS Bar'), tr('DPS Graph'), tr('Damage Graph')))
         overview_tab_combo.setCurrentIndex(self.settings.value('first_overview_tab', type=int))
         overview_tab_combo.currentIndexChanged.connect(
             lambda new_index: self.settings.setValue('first_overview_tab', new_index))
-        sec_1.addWidget(overview_tab_combo, 12, 1, alignment=ALEFT)
+        sec_1.addWidget(overview_tab_combo, 13, 1, alignment=ALEFT)
         ui_scale_label = self.create_label(tr('UI Scale:'), 'label_subhead')
-        sec_1.addWidget(ui_scale_label, 13, 0, alignment=ARIGHT)
+        sec_1.addWidget(ui_scale_label, 14, 0, alignment=ARIGHT)
         ui_scale_slider_layout = self.create_annotated_slider(
                 default_value=round(self.settings.value('ui_scale', type=float) * 50, 0),
                 min=25, max=75, callback=self.set_ui_scale_setting)
-        sec_1.addLayout(ui_scale_slider_layout, 13, 1, alignment=ALEFT)
+        sec_1.addLayout(ui_scale_slider_layout, 14, 1, alignment=ALEFT)
         ui_scale_label = self.create_label(tr('LiveParser Scale:'), 'label_subhead')
-        sec_1.addWidget(ui_scale_label, 14, 0, alignment=ARIGHT)
+        sec_1.addWidget(ui_scale_label, 15, 0, alignment=ARIGHT)
         live_scale_slider_layout = self.create_annotated_slider(
                 default_value=round(self.settings.value('live_scale', type=float) * 50, 0),
                 min=25, max=75, callback=self.set_live_scale_setting)
-        sec_1.addLayout(live_scale_slider_layout, 14, 1, alignment=ALEFT)
+        sec_1.addLayout(live_scale_slider_layout, 15, 1, alignment=ALEFT)
         sec_1.setAlignment(AHCENTER)
         live_enabled_label = self.create_label(tr('LiveParser default state:'), 'label_subhead')
-        sec_1.addWidget(live_enabled_label, 15, 0, alignment=ARIGHT)
+        sec_1.addWidget(live_enabled_label, 16, 0, alignment=ARIGHT)
         live_enabled_button = FlipButton(tr('Disabled'), tr('Enabled'), checkable=True)
         live_enabled_button.setStyleSheet(self.get_style_class(
                 'QPushButton', 'toggle_button', override={'margin-top': 0, 'margin-left': 0}))
@@ -1175,19 +1266,95 @@ class OSCRUI():
                 lambda: self.settings.setValue('live_enabled', False))
         if self.settings.value('live_enabled', type=bool):
             live_enabled_button.flip()
-        sec_1.addWidget(live_enabled_button, 15, 1, alignment=ALEFT)
+        sec_1.addWidget(live_enabled_button, 16, 1, alignment=ALEFT)
 
         languages = ('English',)  # 'Chinese', 'German')
         language_codes = ('en',)  # 'zh', 'de')
         language_label = self.create_label(tr('Language:'), 'label_subhead')
-        sec_1.addWidget(language_label, 16, 0, alignment=ARIGHT)
+        sec_1.addWidget(language_label, 17, 0, alignment=ARIGHT)
         language_combo = self.create_combo_box(style_override={'font': '@small_text'})
         language_combo.addItems(languages)
         current_language_code = self.settings.value('language')
         language_combo.setCurrentText(languages[language_codes.index(current_language_code)])
         language_combo.currentIndexChanged.connect(
                 lambda index: self.settings.setValue('language', language_codes[index]))
-        sec_1.addWidget(language_combo, 16, 1, alignment=ALEFT | AVCENTER)
+        sec_1.addWidget(language_combo, 17, 1, alignment=ALEFT | AVCENTER)
+        live_fps_label = self.create_label(tr('LiveParser Max Updates / s:'), 'label_subhead')
+        sec_1.addWidget(live_fps_label, 18, 0, alignment=ARIGHT)
+        live_fps_validator = QIntValidator()
+        live_fps_validator.setRange(1, 60)
+        live_fps_entry = self.create_entry(
+                self.settings.value('live_parser_fps', type=str), live_fps_validator,
+                style_override={'margin-top': 0})
+        live_fps_entry.setSizePolicy(SMIXMAX)
+        live_fps_entry.editingFinished.connect(lambda: self.settings.setValue(
+                'live_parser_fps', live_fps_entry.text()))
+        sec_1.addWidget(live_fps_entry, 18, 1, alignment=AVCENTER)
+        latency_label = self.create_label(tr('LiveParser Latency Stats:'), 'label_subhead')
+        sec_1.addWidget(latency_label, 19, 0, alignment=ARIGHT)
+        latency_button = FlipButton(tr('Disabled'), tr('Enabled'), checkable=True)
+        latency_button.setStyleSheet(self.get_style_class(
+                'QPushButton', 'toggle_button', override={'margin-top': 0, 'margin-left': 0}))
+        latency_button.setFont(self.theme_font('app', '@font'))
+        latency_button.r_function = (
+                lambda: self.settings.setValue('live_latency_stats', True))
+        latency_button.l_function = (
+                lambda: self.settings.setValue('live_latency_stats', False))
+        if self.settings.value('live_latency_stats', type=bool):
+            latency_button.flip()
+        sec_1.addWidget(latency_button, 19, 1, alignment=ALEFT)
+        latency_csv_label = self.create_label(tr('Latency CSV File:'), 'label_subhead')
+        sec_1.addWidget(latency_csv_label, 20, 0, alignment=ARIGHT)
+        latency_csv_entry = self.create_entry(
+                self.settings.value('live_latency_csv', type=str),
+                style_override={'margin-top': 0})
+        latency_csv_entry.setSizePolicy(SMIXMAX)
+        latency_csv_entry.editingFinished.connect(lambda: self.settings.setValue(
+                'live_latency_csv', format_path(latency_csv_entry.text())))
+        sec_1.addWidget(latency_csv_entry, 20, 1, alignment=AVCENTER)
+        record_label = self.create_label(tr('Record LiveParser Sessions:'), 'label_subhead')
+        sec_1.addWidget(record_label, 21, 0, alignment=ARIGHT)
+        record_button = FlipButton(tr('Disabled'), tr('Enabled'), checkable=True)
+        record_button.setStyleSheet(self.get_style_class(
+                'QPushButton', 'toggle_button', override={'margin-top': 0, 'margin-left': 0}))
+        record_button.setFont(self.theme_font('app', '@font'))
+        record_button.r_function = (
+                lambda: self.settings.setValue('live_record_sessions', True))
+        record_button.l_function = (
+                lambda: self.settings.setValue('live_record_sessions', False))
+        if self.settings.value('live_record_sessions', type=bool):
+            record_button.flip()
+        sec_1.addWidget(record_button, 21, 1, alignment=ALEFT)
+        replay_button = self.create_button(tr('Replay Session:'), style_override={
+                'margin': 0, 'font': ('Overpass', 11, 'medium'), 'border-color': '@bc',
+                'border-style': 'solid', 'border-width': '@bw', 'padding-bottom': 1})
+        replay_button.clicked.connect(self.replay_live_session)
+        sec_1.addWidget(replay_button, 22, 0, alignment=ARIGHT | AVCENTER)
+        replay_speed_combo = self.create_combo_box(style_override={'font': '@small_text'})
+        replay_speeds = self.config['live_replay_speeds']
+        replay_speed_combo.addItems(tuple(replay_speeds.keys()))
+        current_speed = self.settings.value('live_replay_speed', type=int)
+        for speed_text, speed in replay_speeds.items():
+            if speed == current_speed:
+                replay_speed_combo.setCurrentText(speed_text)
+        replay_speed_combo.currentTextChanged.connect(
+                lambda new_text: self.settings.setValue(
+                    'live_replay_speed', replay_speeds[new_text]))
+        sec_1.addWidget(replay_speed_combo, 22, 1, alignment=ALEFT)
+        separate_process_label = self.create_label(
+                tr('LiveParser in Separate Process:'), 'label_subhead')
+        sec_1.addWidget(separate_process_label, 23, 0, alignment=ARIGHT)
+        separate_process_button = FlipButton(tr('Disabled'), tr('Enabled'), checkable=True)
+        separate_process_button.setStyleSheet(self.get_style_class(
+                'QPushButton', 'toggle_button', override={'margin-top': 0, 'margin-left': 0}))
+        separate_process_button.setFont(self.theme_font('app', '@font'))
+        separate_process_button.r_function = (
+                lambda: self.settings.setValue('live_separate_process', True))
+        separate_process_button.l_function = (
+                lambda: self.settings.setValue('live_separate_process', False))
+        if self.settings.value('live_separate_process', type=bool):
+            separate_process_button.flip()
+        sec_1.addWidget(separate_process_button, 23, 1, alignment=ALEFT)
         scroll_layout.addLayout(sec_1)
 
         # seperator
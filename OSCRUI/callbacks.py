@@ -1,13 +1,13 @@
 import os
 
 from PySide6.QtGui import QIcon
-from PySide6.QtWidgets import QLineEdit, QListWidgetItem
-
-from OSCR import (
-    compose_logfile, repair_logfile as oscr_repair_logfile, extract_bytes)
+from PySide6.QtWidgets import QLabel, QLineEdit, QListWidgetItem, QTextEdit
 
 from .dialogs import confirmation_dialog, show_message
 from .iofunctions import browse_path
+from .logarchive import archive_logfile as archive_combats, archive_path, is_log_archive
+from .logfiles import trim_file, write_ranges
+from .logrepair import BLANK_LINE, MALFORMED_LINE, PATCHED_LINE, repair_log
 from .textedit import format_path
 from .translation import tr
 
@@ -22,7 +22,8 @@ def browse_log(self, entry: QLineEdit):
     current_path = entry.text()
     if current_path != '':
         current_path = os.path.dirname(current_path)
-    path = self.browse_path(current_path, 'Logfile (*.log);;Any File (*.*)')
+    path = self.browse_path(
+            current_path, 'Logfile (*.log);;Log Archive (*.oscrarchive);;Any File (*.*)')
     if path != '':
         entry.setText(format_path(path))
         if self.settings.value('auto_scan', type=bool):
@@ -46,7 +47,7 @@ def save_combat(self, combat_num: int):
     base_dir = f'{os.path.dirname(self.entry.text())}/{filename}'
     path = browse_path(self, base_dir, 'Logfile (*.log);;Any File (*.*)', save=True)
     if path:
-        self.parser.export_combat(combat_num, path)
+        write_ranges(combat.log_file, path, (combat.file_pos,))
 
 
 def switch_analysis_tab(self, tab_index: int):
@@ -93,6 +94,9 @@ def switch_main_tab(self, tab_index: int):
         2: 1,
         3: 2
     }
+    if self.live_overlay is not None and self.widgets.main_tabber.currentIndex() == 3:
+        # settings may have changed
+        self.live_overlay.reload_settings(self.settings)
     self.widgets.main_tabber.setCurrentIndex(tab_index)
     self.widgets.sidebar_tabber.setCurrentIndex(SIDEBAR_TAB_CONVERSION[tab_index])
     if tab_index == 0:
@@ -289,29 +293,126 @@ def trim_logfile(self) -> bool:
     :return: True if successful, False if not
     """
     log_path = os.path.abspath(self.entry.text())
-    if self.parser.log_path == log_path:
-        self.parser.export_combat(0, log_path)
-    else:
-        combats = self.parser.isolate_combats(log_path, 1)
-        if len(combats) < 1:
-            return False
-        combat = combats[0]
-        extract_bytes(log_path, log_path, combat[5], combat[6])
+    try:
+        # the analyzed combats are only up to date if nothing was written to the log since
+        if (self.parser.log_path == log_path and len(self.parser.combats) > 0
+                and self.parser.combats[0] is not None
+                and self.parser.combats[0].file_pos[1] == os.path.getsize(log_path)):
+            start, end = self.parser.combats[0].file_pos
+        else:
+            combats = self.parser.isolate_combats(log_path, 1)
+            if len(combats) < 1:
+                return False
+            start, end = combats[0][5:7]
+        trim_file(log_path, start, end)
+    except (OSError, ValueError):
+        return False
     return True
 
 
-def repair_logfile(self):
+def confirm_archive_logfile(self, status_label: QLabel):
     """
-    Repairs current logfile.
+    Prompts the user to confirm whether the older combats of the logfile should be archived and
+    archives them in the background.
+
+    Parameters:
+    - :param status_label: label showing the progress
     """
+    title = tr('Archive Logfile')
     log_path = os.path.abspath(self.entry.text())
-    if os.path.isfile(log_path):
-        oscr_repair_logfile(log_path, self.config['templog_folder_path'])
-        show_message(self, tr('Repair Logfile'), tr('The Logfile has been repaired.'))
-    else:
+    if not os.path.isfile(log_path) or is_log_archive(log_path):
         show_message(
-                self, tr('Repair Logfile'),
-                tr('The Logfile you are trying to open does not exist.'), 'warning')
+                self, title, tr('The Logfile you are trying to open does not exist.'), 'warning')
+        return
+    target_path = archive_path(log_path)
+    text = tr(
+            'Archiving the logfile will move all combats except for the most recent combat to a '
+            'compressed archive next to the logfile. Continue?')
+    if not confirmation_dialog(self, title, text):
+        return
+    key = ('archive', log_path)
+    status_label.setText(tr('Finding combats'))
+
+    def archive():
+        combats = self.parser.isolate_combats(log_path)
+        return archive_combats(log_path, target_path, combats, report_progress, self.app_closing)
+
+    def report_progress(done: int, total: int):
+        self.logfile_requests.report_progress(key, (done, total))
+
+    def show_progress(progress: tuple[int, int]):
+        status_label.setText(f"{tr('Archiving combats')} {progress[0]}/{progress[1]}")
+
+    def archived(count: int):
+        status_label.setText('')
+        if count > 0:
+            show_message(
+                    self, title, f"{tr('Archived combats')}: {count}\n{format_path(target_path)}")
+        else:
+            show_message(self, title, tr('The logfile contains no combats to archive.'))
+
+    def archiving_failed(error: Exception):
+        status_label.setText('')
+        show_message(self, title, f"{tr('Archiving the logfile failed.')}\n{error}", 'error')
+
+    self.logfile_requests.request(
+            key, archive, archived, archiving_failed, on_progress=show_progress)
+
+
+def repair_logfile(self, status_label: QLabel, report_field: QTextEdit, dry_run: bool = False):
+    """
+    Repairs current logfile in the background and lists the lines that broke parsing.
+
+    Parameters:
+    - :param status_label: label showing the progress
+    - :param report_field: text field listing the issues found
+    - :param dry_run: only lists the issues when True; the logfile is not changed
+    """
+    title = tr('Repair Logfile')
+    log_path = os.path.abspath(self.entry.text())
+    if not os.path.isfile(log_path) or is_log_archive(log_path):
+        show_message(
+                self, title, tr('The Logfile you are trying to open does not exist.'), 'warning')
+        return
+    key = ('repair', log_path, dry_run)
+    issue_names = {
+        BLANK_LINE: tr('empty, removed') if not dry_run else tr('empty'),
+        PATCHED_LINE: tr('repaired') if not dry_run else tr('repairable'),
+        MALFORMED_LINE: tr('malformed, removed') if not dry_run else tr('malformed'),
+    }
+    status_label.setText(tr('Checking logfile'))
+
+    def report_progress(checked: int, size: int):
+        self.logfile_requests.report_progress(key, (checked, size))
+
+    def show_progress(progress: tuple[int, int]):
+        checked, size = progress
+        status_label.setText(f"{tr('Checking logfile')} {checked / max(size, 1):.0%}")
+
+    def repaired(issues: list[tuple[int, int, str]]):
+        status_label.setText(f"{tr('Line ranges with issues')}: {len(issues)}")
+        report = list()
+        # the report of a completely broken file would be too large to show
+        for first, last, kind in issues[:1000]:
+            lines = f'{first}' if first == last else f'{first}-{last}'
+            report.append(f"{tr('Line')} {lines}: {issue_names[kind]}")
+        if len(issues) > 1000:
+            report.append(f"... {len(issues) - 1000} {tr('more')}")
+        report_field.setPlainText('\n'.join(report))
+        report_field.setVisible(len(issues) > 0)
+        if not dry_run:
+            if len(issues) > 0:
+                show_message(self, title, tr('The Logfile has been repaired.'))
+            else:
+                show_message(self, title, tr('The Logfile contains no issues.'))
+
+    def repair_failed(error: Exception):
+        status_label.setText('')
+        show_message(self, title, f"{tr('Repairing the logfile failed.')}\n{error}", 'error')
+
+    self.logfile_requests.request(
+            key, lambda: repair_log(log_path, dry_run, report_progress, self.app_closing),
+            repaired, repair_failed, on_progress=show_progress)
 
 
 def extract_combats(self, selected_indices: list):
@@ -331,8 +432,7 @@ def extract_combats(self, selected_indices: list):
     target_path = browse_path(
             self, os.path.dirname(source_path), 'Logfile (*.log);;Any File (*.*)', save=True)
     if target_path != '':
-        compose_logfile(
-                source_path, target_path, combat_intervals, self.config['templog_folder_path'])
+        write_ranges(os.path.abspath(source_path), target_path, combat_intervals)
         show_message(self, tr('Split Logfile'), tr('Logfile has been saved.'))
 
 
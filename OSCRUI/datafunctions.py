@@ -3,13 +3,15 @@ from threading import Thread
 
 from PySide6.QtCore import Qt, QThread, Signal, Slot
 
-from OSCR import HEAL_TREE_HEADER, TREE_HEADER
+from OSCR import HEAL_TREE_HEADER, OSCR, TREE_HEADER
 from OSCR.combat import Combat
+from OSCR.parser import analyze_combat
 
 from .callbacks import switch_main_tab, switch_overview_tab
 from .datamodels import DamageTreeModel, HealTreeModel, TreeSelectionModel
 from .dialogs import show_message
 from .displayer import create_overview
+from .logarchive import ArchivedCombat, extract_archived_combat, is_log_archive, read_archive_index
 from .textedit import format_damage_number, format_damage_tree_data, format_heal_tree_data
 from .translation import tr
 
@@ -30,13 +32,15 @@ class CustomThread(QThread):
 
 
 @Slot()
-def analyze_log_callback(self, path=None, hidden_path=False):
+def analyze_log_callback(self, path=None, hidden_path=False, combats=None):
     """
     Callback of "Analyze" button.
 
     Parameters:
-    - :param path: path to combat log file
+    - :param path: path to combat log file or log archive
     - :param hidden_path: True when settings should not be updated with log path
+    - :param combats: already analyzed combats of the log file, most recent first; inserted
+    instead of analyzing the log file
     """
     if path == '' or not os.path.isfile(path):
         show_message(
@@ -53,14 +57,190 @@ def analyze_log_callback(self, path=None, hidden_path=False):
     self.parser.reset_parser()
     self.current_combats.model().clear()
     self.parser.log_path = path
-    self.thread = Thread(target=self.parser.analyze_log_file, kwargs={'max_combats': 1})
-    self.thread.start()
+    self.archived_combats = list()
+    if is_log_archive(path):
+        insert_archived_combats(self, path)
+    else:
+        live_combats = combats if combats is not None else get_live_combats(self, path)
+        if len(live_combats) > 0:
+            self.thread = Thread(
+                    target=insert_live_combats,
+                    args=(self.parser, live_combats, self.parser_settings))
+        else:
+            self.thread = Thread(target=self.parser.analyze_log_file, kwargs={'max_combats': 1})
+        self.thread.start()
 
     # reset tabber
     switch_main_tab(self, 0)
     switch_overview_tab(self, self.settings.value('first_overview_tab', type=int))
 
 
+def get_live_combats(self, path: str) -> list[Combat]:
+    """
+    Returns the combats the LiveParser isolated from the logfile at `path`, most recent combat
+    first. Returns an empty list when the logfile has been modified in a way that invalidates
+    the combats. Lines written after the most recent live combat are not covered by the
+    returned combats, see `insert_live_combats`.
+
+    Parameters:
+    - :param path: path to combat log file
+    """
+    path = os.path.abspath(path)
+    live_combats = [
+            combat for combat in reversed(list(self.live_combats))
+            if os.path.abspath(combat.log_file) == path]
+    if len(live_combats) > 0 and live_combats[0].file_pos[1] > os.path.getsize(path):
+        return list()
+    return live_combats
+
+
+class _TailRead(Exception):
+    """
+    Stops reading the log backwards once the lines preceding the tail have been reached.
+    """
+
+
+def insert_live_combats(parser: OSCR, live_combats: list[Combat], settings: dict):
+    """
+    Analyzes combats handed off by the LiveParser and adds them to the parser as if they had
+    been read from the logfile. Combats written after the most recent live combat, including the
+    one the LiveParser stopped in, are read from the end of the logfile until the live combats are
+    reached. Older combats are read from the logfile starting right before the oldest inserted
+    combat.
+
+    Parameters:
+    - :param parser: parser to insert the combats into; must be reset and have its log path set
+    - :param live_combats: combats to insert, most recent combat first
+    - :param settings: parser settings; uses "combats_to_parse", "seconds_between_combats" and \
+    "graph_resolution"
+    """
+    tail_start = live_combats[0].file_pos[1]
+    tail_end = os.path.getsize(parser.log_path)
+    combats_to_parse = settings.get('combats_to_parse', 10)
+    tail_combats = list()
+
+    def handle_tail_combat(combat: Combat):
+        # a combat reaching into the live combats is kept whole, as the full parser isolates it
+        if combat.file_pos[1] > tail_start:
+            tail_combats.append(combat)
+        if combat.file_pos[0] <= tail_start:
+            raise _TailRead()
+
+    def handle_tail_error(error: BaseException):
+        if not isinstance(error, _TailRead):
+            parser.error_callback(error)
+
+    if tail_start < tail_end:
+        OSCR._analyze_log_file(
+                parser.log_path, combats_to_parse, 0, 0, settings, handle_tail_combat,
+                handle_tail_error)
+    if len(tail_combats) > 0:
+        live_combats = [
+                combat for combat in live_combats
+                if combat.file_pos[1] <= tail_combats[-1].file_pos[0]]
+    combats = (tail_combats + live_combats)[:max(combats_to_parse, 1)]
+    parser.combats = [None] * len(combats)
+    first_byte = combats[-1].file_pos[0]
+    if first_byte > 0:
+        parser.bytes_consumed = tail_end - first_byte
+    else:
+        parser.bytes_consumed = -1
+    for combat_id, combat in enumerate(combats):
+        combat.id = combat_id
+        try:
+            if combat.damage_out is None:
+                parser.analyze_new_combat(combat)
+            else:
+                parser.handle_analyzed_result(combat)
+        except BaseException as e:
+            parser.error_callback(e)
+            return
+
+
+def insert_archived_combats(self, path: str):
+    """
+    Lists all combats of a log archive in the sidebar and analyzes the most recent one. The other
+    combats are analyzed when they are selected.
+
+    Parameters:
+    - :param path: path to the log archive
+    """
+    try:
+        archived_combats = read_archive_index(path)
+    except (OSError, ValueError) as e:
+        show_message(self, tr('Invalid Logfile'), f'{e}', 'warning')
+        return
+    self.archived_combats = archived_combats[::-1]
+    self.parser.combats = [None] * len(self.archived_combats)
+    self.parser.bytes_consumed = -1
+    self.current_combats.model().set_items([
+            (combat_id, combat.map, combat.date, combat.time, combat.difficulty)
+            for combat_id, combat in enumerate(self.archived_combats)])
+    if len(self.archived_combats) > 0:
+        analyze_archived_combat(self, 0)
+
+
+def analyze_archived_combat(self, combat_id: int):
+    """
+    Analyzes a combat of the opened log archive in the background and shows it afterwards.
+
+    Parameters:
+    - :param combat_id: index of the combat in `self.archived_combats`
+    """
+    if self.thread is not None and self.thread.is_alive():
+        return
+    path = os.path.join(self.config['templog_folder_path'], f'archived_combat_{combat_id}.log')
+    self.thread = Thread(target=analyze_archived_combat_file, args=(
+            self.parser, self.archived_combats[combat_id], combat_id, path, self.parser_settings,
+            self.parser_signals.analyzed_archived_combat.emit))
+    self.thread.start()
+
+
+def analyze_archived_combat_file(
+        parser: OSCR, archived_combat: ArchivedCombat, combat_id: int, path: str, settings: dict,
+        callback):
+    """
+    Decompresses a single combat of the log archive opened in the parser and analyzes it. Runs in
+    a worker thread.
+
+    Parameters:
+    - :param parser: parser holding the combats of the archive; its log path is the archive
+    - :param archived_combat: combat to analyze
+    - :param combat_id: index of the combat in `parser.combats`
+    - :param path: path to decompress the combat to
+    - :param settings: parser settings; uses "seconds_between_combats" and "graph_resolution"
+    - :param callback: called with the analyzed combat
+    """
+    def handle_combat(combat: Combat):
+        analyze_combat(combat)
+        parser.combats[combat.id] = combat
+        callback(combat)
+
+    try:
+        extract_archived_combat(parser.log_path, archived_combat, path)
+    except (OSError, ValueError) as e:
+        parser.error_callback(e)
+        return
+    # the combat is the last one in its block; lines before it are too short to be a combat
+    OSCR._analyze_log_file(
+            path, combat_id + 1, combat_id, 0, settings, handle_combat, parser.error_callback)
+
+
+def show_archived_combat(self, combat: Combat):
+    """
+    Called as soon as a combat of a log archive has been analyzed. Selects and shows it.
+
+    Parameters:
+    - :param combat: analyzed combat
+    """
+    if combat.id >= len(self.parser.combats) or self.parser.combats[combat.id] is not combat:
+        return
+    self.current_combats.setCurrentIndex(self.current_combats.model().index(combat.id, 0))
+    create_overview(self, combat)
+    populate_analysis(self, combat)
+    self.current_combat_id = combat.id
+
+
 def analyze_log_background(self, amount: int):
     """
     Analyzes older combats from current combatlog in the background.
@@ -125,7 +305,10 @@ def insert_combat(self, combat: Combat):
         create_overview(self, combat)
         populate_analysis(self, combat)
         self.current_combat_id = 0
-        analyze_log_background(self, self.settings.value('combats_to_parse', type=int) - 1)
+    if combat.id == len(self.parser.combats) - 1:
+        combats_left = self.settings.value('combats_to_parse', type=int) - len(self.parser.combats)
+        if combats_left > 0:
+            analyze_log_background(self, combats_left)
 
 
 def analysis_data_slot(self, index: int):
@@ -136,6 +319,10 @@ def analysis_data_slot(self, index: int):
     - :param index: index of the combat in the parsers combat list
     """
     combat = self.parser.combats[index]
+    if combat is None:
+        if index < len(self.archived_combats):
+            analyze_archived_combat(self, index)
+        return
     create_overview(self, combat)
     populate_analysis(self, combat)
     self.current_combat_id = combat.id
@@ -1,4 +1,6 @@
-from typing import Iterable
+from datetime import datetime
+from typing import Callable, Iterable
+import math
 import sys
 
 from PySide6.QtCore import (
@@ -96,17 +98,227 @@ class OverviewTableModel(TableModel):
 
 class LeagueTableModel(TableModel):
     """
-    Model for league table
+    Model for league table. Holds the first page of a ladder initially and loads further pages
+    through `page_loader` when the view asks for more rows.
+
+    Filters and sorts by itself: rows are kept in the order they arrived and `_rows` maps the rows
+    of the view to them. Casefolded player names and per-column sort permutations are precomputed
+    and kept up to date when pages arrive, so neither filtering nor sorting calls back into Python
+    once per row or per comparison.
     """
-    def __init__(self, *ar, combatlog_id_list: list = [], **kw):
+    def __init__(
+            self, *ar, combatlog_id_list: list = [], entry_count: int = 0,
+            page_loader: Callable[[int], None] | None = None, page_size: int = 50,
+            prefetch_pages: int = 2, **kw):
+        """
+        Parameters:
+        - :param combatlog_id_list: combatlog ids of the rows
+        - :param entry_count: total number of entries of the ladder
+        - :param page_loader: called with the number of a page to request it; the page is handed
+        back through `insert_page` or `page_failed`
+        - :param page_size: number of entries per page
+        - :param prefetch_pages: maximum number of pages requested ahead at the same time
+
+        Other parameters see `TableModel`.
+        """
         super().__init__(*ar, **kw)
         self._combatlog_id_list = combatlog_id_list
+        self._entry_count = entry_count
+        self._page_loader = page_loader
+        self._page_size = page_size
+        self._prefetch_pages = prefetch_pages
+        self._pages_loaded = 1
+        self._complete = len(self._data) < page_size
+        self._paused = False
+        self._requested_pages: set[int] = set()
+        self._arrived_pages: dict[int, tuple[list, list, list]] = dict()
+        self._search_keys: list[str] = [self.search_key(row) for row in self._data]
+        self._name_filter: str = ''
+        self._matches: list[int] | None = None
+        self._sort_column: int = -1
+        self._sort_order = Qt.SortOrder.AscendingOrder
+        self._sort_permutations: dict[tuple[int, bool], list[int]] = dict()
+        self._rows: list[int] = list(range(len(self._data)))
+
+    @staticmethod
+    def search_key(row: tuple) -> str:
+        """
+        Returns the string the name filter is matched against: casefolded name and handle.
+        """
+        return ''.join(row[0:2]).casefold()
+
+    @property
+    def name_filter(self) -> str:
+        return self._name_filter
+
+    @name_filter.setter
+    def name_filter(self, filter_value: str):
+        needle = filter_value.casefold()
+        if needle == self._name_filter:
+            return
+        if not needle:
+            matches = None
+        else:
+            keys = self._search_keys
+            # extending the filter text only narrows down the rows matching the previous text
+            if self._matches is not None and self._name_filter in needle:
+                candidates = self._matches
+            else:
+                candidates = range(len(keys))
+            matches = [row for row in candidates if needle in keys[row]]
+        self._name_filter = needle
+        self._matches = matches
+        self.beginResetModel()
+        self._rows = self.visible_rows()
+        self.endResetModel()
+
+    def rowCount(self, index):
+        return len(self._rows)
+
+    def combatlog_id(self, row: int) -> int:
+        """
+        Returns combatlog id of the entry shown in `row`.
+        """
+        return self._combatlog_id_list[self._rows[row]]
+
+    def sort_permutation(self, column: int, descending: bool) -> list[int]:
+        """
+        Returns rows in the order they have when sorted by `column`. Rows with equal values keep
+        the order they arrived in.
+        """
+        key = (column, descending)
+        if key not in self._sort_permutations:
+            data = self._data
+            self._sort_permutations[key] = sorted(
+                    range(len(data)), key=lambda row: data[row][column], reverse=descending)
+        return self._sort_permutations[key]
+
+    def visible_rows(self) -> list[int]:
+        """
+        Returns rows matching the name filter in the current sort order.
+        """
+        if self._sort_column < 0:
+            if self._matches is None:
+                return list(range(len(self._data)))
+            return list(self._matches)
+        # ascending order puts the highest values first, like the other tables of the app
+        order = self.sort_permutation(
+                self._sort_column, self._sort_order == Qt.SortOrder.AscendingOrder)
+        if self._matches is None:
+            return list(order)
+        matches = set(self._matches)
+        return [row for row in order if row in matches]
+
+    def sort(self, column: int, order: Qt.SortOrder = Qt.SortOrder.AscendingOrder):
+        self._sort_column = column
+        self._sort_order = order
+        self.update_layout()
+
+    def update_layout(self):
+        """
+        Reorders the rows of the view to match the current sort order, keeping the selection.
+        """
+        self.layoutAboutToBeChanged.emit()
+        old_rows = self._rows
+        self._rows = self.visible_rows()
+        persistent_indexes = self.persistentIndexList()
+        if len(persistent_indexes) > 0:
+            positions = {row: position for position, row in enumerate(self._rows)}
+            self.changePersistentIndexList(persistent_indexes, [
+                    self.index(positions[old_rows[index.row()]], index.column())
+                    for index in persistent_indexes])
+        self.layoutChanged.emit()
+
+    def canFetchMore(self, parent: QModelIndex) -> bool:
+        if parent.isValid() or self._page_loader is None or self._complete or self._paused:
+            return False
+        return self._pages_loaded * self._page_size < self._entry_count
+
+    def fetchMore(self, parent: QModelIndex):
+        """
+        Requests the next pages that are neither loaded nor requested yet.
+        """
+        if not self.canFetchMore(parent):
+            return
+        last_page = min(
+                self._pages_loaded + self._prefetch_pages,
+                math.ceil(self._entry_count / self._page_size))
+        for page in range(self._pages_loaded + 1, last_page + 1):
+            if page not in self._requested_pages and page not in self._arrived_pages:
+                self._requested_pages.add(page)
+                self._page_loader(page)
+
+    def insert_page(self, page: int, index: list, rows: list, combatlog_ids: list):
+        """
+        Inserts requested page. Pages arriving out of order are held back until all previous
+        pages were inserted.
+
+        Parameters:
+        - :param page: number of the page
+        - :param index: ranks of the entries
+        - :param rows: table rows
+        - :param combatlog_ids: combatlog ids of the entries
+        """
+        self._requested_pages.discard(page)
+        if page <= self._pages_loaded or self._complete:
+            return
+        self._arrived_pages[page] = (index, rows, combatlog_ids)
+        while self._pages_loaded + 1 in self._arrived_pages:
+            self._pages_loaded += 1
+            index, rows, combatlog_ids = self._arrived_pages.pop(self._pages_loaded)
+            if len(rows) < self._page_size:
+                self._complete = True
+                self._arrived_pages.clear()
+            if len(rows) > 0:
+                self.extend_data(index, rows, combatlog_ids)
+
+    def page_failed(self, page: int):
+        """
+        Stops loading pages automatically after a page could not be fetched.
+        """
+        self._requested_pages.discard(page)
+        self._paused = True
+
+    def resume_fetching(self):
+        """
+        Resumes loading pages after a failure.
+        """
+        self._paused = False
+
+    def replace_data(self, index: list, rows: list, combatlog_ids: list, entry_count: int):
+        """
+        Replaces all rows with the first page of a ladder. Further pages are loaded like after
+        creating the model; name filter and sort order are kept.
+
+        Parameters:
+        - :param index: ranks of the entries
+        - :param rows: table rows
+        - :param combatlog_ids: combatlog ids of the entries
+        - :param entry_count: total number of entries of the ladder
+        """
+        self.beginResetModel()
+        self._index = list(index)
+        self._data = rows
+        self._combatlog_id_list = combatlog_ids
+        self._entry_count = entry_count
+        self._pages_loaded = 1
+        self._complete = len(rows) < self._page_size
+        self._paused = False
+        self._requested_pages.clear()
+        self._arrived_pages.clear()
+        self._search_keys = [self.search_key(row) for row in rows]
+        self._sort_permutations.clear()
+        if self._matches is not None:
+            needle = self._name_filter
+            self._matches = [
+                    row for row, key in enumerate(self._search_keys) if needle in key]
+        self._rows = self.visible_rows()
+        self.endResetModel()
 
     def data(self, index, role):
         if role == Qt.ItemDataRole.DisplayRole:
-            current_col = index.column()
-            cell = self._data[index.row()][current_col]
             column = index.column()
+            cell = self._data[self._rows[index.row()]][column]
             if column == 5:
                 return f'{cell:.1f}s'
             elif column in (2, 3, 7):
@@ -126,17 +338,285 @@ class LeagueTableModel(TableModel):
             return AVCENTER + ARIGHT
 
     def headerData(self, section, orientation, role):
-        if role == Qt.ItemDataRole.FontRole and orientation == Qt.Orientation.Vertical:
-            return self._cell_font
+        if orientation == Qt.Orientation.Vertical:
+            if role == Qt.ItemDataRole.DisplayRole:
+                return self._index[self._rows[section]]
+            if role == Qt.ItemDataRole.FontRole:
+                return self._cell_font
         return super().headerData(section, orientation, role)
 
     def extend_data(self, index: list, rows: list, combatlog_ids: list):
-        current_row_count = len(self._index)
-        self.beginInsertRows(QModelIndex(), current_row_count, current_row_count + len(index) - 1)
+        """
+        Appends rows to the table, updating name index and sort permutations. New rows are hidden
+        when they do not match the name filter and sorted into place when the table is sorted.
+        """
+        first_row = len(self._data)
         self._index.extend(index)
         self._data.extend(rows)
         self._combatlog_id_list.extend(combatlog_ids)
+        self._search_keys.extend(self.search_key(row) for row in rows)
+        new_rows = range(first_row, len(self._data))
+        data = self._data
+        for (column, descending), permutation in self._sort_permutations.items():
+            # the permutation is sorted already, so this merges the new rows in linear time
+            permutation.extend(new_rows)
+            permutation.sort(key=lambda row: data[row][column], reverse=descending)
+        if self._matches is not None:
+            needle = self._name_filter
+            keys = self._search_keys
+            new_rows = [row for row in new_rows if needle in keys[row]]
+            self._matches.extend(new_rows)
+        if len(new_rows) == 0:
+            return
+        current_row_count = len(self._rows)
+        self.beginInsertRows(
+                QModelIndex(), current_row_count, current_row_count + len(new_rows) - 1)
+        self._rows.extend(new_rows)
         self.endInsertRows()
+        if self._sort_column >= 0:
+            self.update_layout()
+
+
+class StoredLadderTableModel(LeagueTableModel):
+    """
+    Model for a ladder stored in a local database, like a ladder snapshot or a ladder of the local
+    league. Loads rows page by page like `LeagueTableModel`, but filters and sorts through
+    database queries, so only the rows that are shown are read from the database.
+    """
+    def __init__(
+            self, store, ladder, header: Iterable, header_font: QFont, cell_font: QFont,
+            page_size: int = 200):
+        """
+        Parameters:
+        - :param store: database containing the ladder; provides `entries` and `count` like \
+        `LadderSnapshotStore`
+        - :param ladder: key of the ladder in `store`, e.g. the id of a snapshot
+        - :param page_size: number of rows read from the database at once
+
+        Other parameters see `TableModel`.
+        """
+        self._store = store
+        self._ladder = ladder
+        self._query_filter = ''
+        self._query_column = -1
+        self._query_descending = True
+        index, rows, combatlog_ids = store.entries(ladder, limit=page_size)
+        super().__init__(
+                rows, header, index, header_font, cell_font, combatlog_id_list=combatlog_ids,
+                entry_count=store.count(ladder), page_loader=self.load_page,
+                page_size=page_size, prefetch_pages=1)
+
+    @property
+    def store(self):
+        return self._store
+
+    @property
+    def ladder(self):
+        return self._ladder
+
+    @property
+    def name_filter(self) -> str:
+        return self._query_filter
+
+    @name_filter.setter
+    def name_filter(self, filter_value: str):
+        filter_value = filter_value.casefold()
+        if filter_value != self._query_filter:
+            self._query_filter = filter_value
+            self.reload()
+
+    def sort(self, column: int, order: Qt.SortOrder = Qt.SortOrder.AscendingOrder):
+        self._query_column = column
+        # ascending order puts the highest values first, like the other tables of the app
+        self._query_descending = order == Qt.SortOrder.AscendingOrder
+        self.reload()
+
+    def query(self, offset: int) -> tuple[list, list, list]:
+        """
+        Returns one page of rows starting at `offset` in the current filter and sort order.
+        """
+        return self._store.entries(
+                self._ladder, self._query_filter, self._query_column, self._query_descending,
+                offset, self._page_size)
+
+    def load_page(self, page: int):
+        self.insert_page(page, *self.query((page - 1) * self._page_size))
+
+    def reload(self):
+        """
+        Shows the first page of rows after filter or sort order changed.
+        """
+        self.replace_data(
+                *self.query(0), self._store.count(self._ladder, self._query_filter))
+
+
+class SnapshotListModel(QAbstractTableModel):
+    """
+    Model for the list of stored ladder snapshots.
+    """
+    def __init__(self, header: Iterable, cell_font: QFont):
+        """
+        Parameters:
+        - :param header: column headings
+        - :param cell_font: font to style the cells with
+        """
+        super().__init__()
+        self._header = tuple(header)
+        self._cell_font = cell_font
+        self._snapshots = list()
+
+    def rowCount(self, index=QModelIndex()):
+        return len(self._snapshots)
+
+    def columnCount(self, index=QModelIndex()):
+        return len(self._header)
+
+    def data(self, index, role):
+        if role == Qt.ItemDataRole.DisplayRole:
+            snapshot = self._snapshots[index.row()]
+            column = index.column()
+            if column == 0:
+                return snapshot.title
+            elif column == 1:
+                return snapshot.variant
+            elif column == 2:
+                return str(snapshot.entry_count)
+            return datetime.fromtimestamp(snapshot.created).strftime('%Y-%m-%d %H:%M:%S')
+
+        if role == Qt.ItemDataRole.FontRole:
+            return self._cell_font
+
+        if role == Qt.ItemDataRole.TextAlignmentRole:
+            if index.column() == 2:
+                return AVCENTER + ARIGHT
+            return AVCENTER + ALEFT
+
+    def headerData(self, section, orientation, role):
+        if role == Qt.ItemDataRole.DisplayRole and orientation == Qt.Orientation.Horizontal:
+            return self._header[section]
+
+    def snapshot(self, row: int):
+        """
+        Returns snapshot shown in `row`.
+        """
+        return self._snapshots[row]
+
+    def set_snapshots(self, snapshots: list):
+        self.beginResetModel()
+        self._snapshots = snapshots
+        self.endResetModel()
+
+
+class LocalLadderListModel(QAbstractTableModel):
+    """
+    Model for the list of ladders of the local league.
+    """
+    def __init__(self, header: Iterable, cell_font: QFont):
+        """
+        Parameters:
+        - :param header: column headings
+        - :param cell_font: font to style the cells with
+        """
+        super().__init__()
+        self._header = tuple(header)
+        self._cell_font = cell_font
+        self._ladders = list()
+
+    def rowCount(self, index=QModelIndex()):
+        return len(self._ladders)
+
+    def columnCount(self, index=QModelIndex()):
+        return len(self._header)
+
+    def data(self, index, role):
+        if role == Qt.ItemDataRole.DisplayRole:
+            ladder = self._ladders[index.row()]
+            column = index.column()
+            if column == 0:
+                return ladder.title
+            elif column == 1:
+                return str(ladder.entry_count)
+            elif column == 2:
+                return str(ladder.combat_count)
+            return f'{ladder.best_dps:,.2f}'
+
+        if role == Qt.ItemDataRole.FontRole:
+            return self._cell_font
+
+        if role == Qt.ItemDataRole.TextAlignmentRole:
+            if index.column() == 0:
+                return AVCENTER + ALEFT
+            return AVCENTER + ARIGHT
+
+    def headerData(self, section, orientation, role):
+        if role == Qt.ItemDataRole.DisplayRole and orientation == Qt.Orientation.Horizontal:
+            return self._header[section]
+
+    def ladder(self, row: int):
+        """
+        Returns ladder shown in `row`.
+        """
+        return self._ladders[row]
+
+    def set_ladders(self, ladders: list):
+        self.beginResetModel()
+        self._ladders = ladders
+        self.endResetModel()
+
+
+class SnapshotDiffModel(TableModel):
+    """
+    Model for the comparison of two ladder snapshots. Rows contain name, handle, new rank, old
+    rank, new DPS and old DPS of a player, see `LadderSnapshotStore.diff`.
+    """
+    def __init__(self, *ar, new_text: str = 'new', dropped_text: str = 'dropped', **kw):
+        """
+        Parameters:
+        - :param new_text: shown as rank change of players missing in the old snapshot
+        - :param dropped_text: shown as rank change of players missing in the new snapshot
+
+        Other parameters see `TableModel`.
+        """
+        super().__init__(*ar, **kw)
+        self._new_text = new_text
+        self._dropped_text = dropped_text
+
+    def columnCount(self, index):
+        return len(self._header)
+
+    def data(self, index, role):
+        if role == Qt.ItemDataRole.DisplayRole:
+            name, handle, new_rank, old_rank, new_dps, old_dps = self._data[index.row()]
+            column = index.column()
+            if column == 0:
+                return name
+            elif column == 1:
+                return handle
+            elif column == 2:
+                return '-' if new_rank is None else str(new_rank)
+            elif column == 3:
+                if new_rank is None:
+                    return self._dropped_text
+                if old_rank is None:
+                    return self._new_text
+                return f'{old_rank - new_rank:+d}' if old_rank != new_rank else '0'
+            elif column == 4:
+                return '-' if new_dps is None else f'{new_dps:,.2f}'
+            if new_dps is None or old_dps is None:
+                return '-'
+            elif column == 5:
+                return f'{new_dps - old_dps:+,.2f}'
+            elif old_dps == 0:
+                return '-'
+            return f'{(new_dps - old_dps) / old_dps * 100:+,.2f}%'
+
+        if role == Qt.ItemDataRole.FontRole:
+            return self._cell_font
+
+        if role == Qt.ItemDataRole.TextAlignmentRole:
+            if index.column() == 1:
+                return AVCENTER + ALEFT
+            return AVCENTER + ARIGHT
 
 
 class LiveParserTableModel(TableModel):
@@ -176,9 +656,9 @@ class LiveParserTableModel(TableModel):
 
         if role == Qt.ItemDataRole.ForegroundRole:
             if self._legend_column is not None and index.column() == self._legend_column:
-                row = index.row()
-                if row < len(self._colors):
-                    return self._colors[self._data[row][8]]
+                color_index = self._data[index.row()][8]
+                if color_index >= 0:
+                    return self._colors[color_index % len(self._colors)]
             return None
 
     def headerData(self, section, orientation, role):
@@ -220,32 +700,70 @@ class LiveParserTableModel(TableModel):
             return 0
 
 
-class SortingProxy(QSortFilterProxyModel):
-    def __init__(self):
+class UploadQueueModel(QAbstractTableModel):
+    """
+    Model for the upload queue summary. Shows name, status and result message of every job.
+    """
+    def __init__(self, queue, header: Iterable, status_names: dict, cell_font: QFont):
+        """
+        Parameters:
+        - :param queue: upload queue holding the jobs in its `jobs` attribute
+        - :param header: column headings
+        - :param status_names: maps job status to the text shown
+        - :param cell_font: font to style the cells with
+        """
         super().__init__()
-        self._name_filter: str = ''
+        self._queue = queue
+        self._header = tuple(header)
+        self._status_names = status_names
+        self._cell_font = cell_font
 
-    @property
-    def name_filter(self) -> str:
-        return self._name_filter
+    def rowCount(self, index=QModelIndex()):
+        return len(self._queue.jobs)
 
-    @name_filter.setter
-    def name_filter(self, filter_value: str):
-        self._name_filter = filter_value
-        self.invalidateFilter()
+    def columnCount(self, index=QModelIndex()):
+        return len(self._header)
+
+    def data(self, index, role):
+        if role == Qt.ItemDataRole.DisplayRole:
+            job = self._queue.jobs[index.row()]
+            column = index.column()
+            if column == 0:
+                return job.name
+            elif column == 1:
+                return self._status_names.get(job.status, job.status)
+            return job.detail
+
+        if role == Qt.ItemDataRole.FontRole:
+            return self._cell_font
+
+        if role == Qt.ItemDataRole.TextAlignmentRole:
+            return AVCENTER + ALEFT
 
+    def headerData(self, section, orientation, role):
+        if role == Qt.ItemDataRole.DisplayRole and orientation == Qt.Orientation.Horizontal:
+            return self._header[section]
+
+    def job(self, row: int):
+        """
+        Returns job shown in `row`.
+        """
+        return self._queue.jobs[row]
+
+    def refresh(self):
+        """
+        Updates the view after jobs were added, removed or changed.
+        """
+        self.beginResetModel()
+        self.endResetModel()
+
+
+class SortingProxy(QSortFilterProxyModel):
     def lessThan(self, left, right):
         links = self.sourceModel()._data[left.row()][left.column()]
         rechts = self.sourceModel()._data[right.row()][right.column()]
         return links > rechts  # inverted operator to make descending sort come up first
 
-    def filterAcceptsRow(self, source_row: int, source_parent: QModelIndex) -> bool:
-        filter_value = self.name_filter
-        if filter_value:
-            full_name = ''.join(self.sourceModel()._data[source_row][0:2]).casefold()
-            return filter_value.casefold() in full_name
-        return True
-
 
 class TreeModel(QAbstractItemModel):
     """
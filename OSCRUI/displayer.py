@@ -9,6 +9,8 @@ from OSCR import TABLE_HEADER
 from OSCR.combat import Combat
 
 from .datamodels import OverviewTableModel, SortingProxy
+from .livedata import (
+        LiveGraphBuffer, LiveLatencyStats, LiveSessionRecorder, LiveSessionReplay, SnapshotSlot)
 from .widgetbuilder import ACENTER, AVCENTER, SMINMIN, SMIXMAX
 from .widgetbuilder import create_frame, create_label, style_table
 from .widgets import CustomPlotAxis
@@ -302,11 +304,11 @@ def create_overview_table(self, table_data: Iterable[Sequence]) -> QTableView:
     return table
 
 
-def create_live_graph(self) -> tuple[QFrame, list]:
+def create_live_graph(self) -> tuple[QFrame, PlotWidget]:
     """
     Creates and styles live graph.
 
-    :return: Frame containing the graph and list of curves that will be used to plot the data
+    :return: Frame containing the graph and the plot widget that curves will be added to
     """
     plot_widget = PlotWidget()
     plot_widget.setAxisItems({'left': CustomPlotAxis('left', compressed=True)})
@@ -317,7 +319,8 @@ def create_live_graph(self) -> tuple[QFrame, list]:
     plot_widget.setMenuEnabled(False)
     plot_widget.hideButtons()
     plot_widget.setDefaultPadding(padding=0)
-    plot_widget.setXRange(-14, 0, padding=0)
+    window_length = self.settings.value('live_graph_window', type=int)
+    plot_widget.setXRange(1 - window_length, 0, padding=0)
     left_axis = plot_widget.getAxis('left')
     left_axis.setTickFont(theme_font(self, 'live_plot_widget'))
     left_axis.setTextPen(color=self.theme['defaults']['fg'])
@@ -326,11 +329,6 @@ def create_live_graph(self) -> tuple[QFrame, list]:
     bottom_axis.setTickFont(theme_font(self, 'plot_widget'))
     bottom_axis.setTextPen(color=self.theme['defaults']['fg'])
 
-    curves = list()
-    for color_index in range(5):
-        color = self.theme['plot']['color_cycler'][color_index]
-        curves.append(plot_widget.plot([0], [0], pen=mkPen(color, width=1)))
-
     frame = create_frame(self, 'plot_widget', size_policy=SMIXMAX, style_override={
             'margin': 4, 'padding': 2, 'border': 'none'})
     frame.setMinimumWidth(self.sidebar_item_width * 0.25)
@@ -339,42 +337,80 @@ def create_live_graph(self) -> tuple[QFrame, list]:
     layout.setContentsMargins(0, 0, 0, 0)
     layout.addWidget(plot_widget, stretch=1)
     frame.setLayout(layout)
-    return frame, curves
+    return frame, plot_widget
 
 
 def update_live_display(
         self, player_data: dict, combat_time: float, graph_active: bool = False,
-        graph_data_buffer: list = [], graph_data_field: int = 0):
+        graph_data_buffer: LiveGraphBuffer | None = None, graph_data_field: int = 0,
+        session_recorder: LiveSessionRecorder | None = None):
     """
-    Updates display of live parser to show the new data.
+    Updates display of live parser to show the new data. Must be called from the GUI thread.
 
     Parameters:
     - :param player_data: dictionary containing the new data
     - :param combat_time: duration of the entire combat
     - :param graph_active: Set to True to update the graph as well
     - :param graph_data_buffer: contains the past graph data
+    - :param graph_data_field: index of the value that is plotted
+    - :param session_recorder: records the displayed data when supplied
     """
+    if session_recorder is not None:
+        session_recorder.record(player_data, combat_time)
     cells = list()
-    curves = list()
     for player, player_data in player_data.items():
-        cells.append([player, *player_data.values(), 5])
-    if graph_active:
-        if len(graph_data_buffer) == 0:
-            graph_data_buffer.extend(([0] * 15, [0] * 15, [0] * 15, [0] * 15, [0] * 15))
-        zipper = zip(graph_data_buffer, cells, self.widgets.live_parser_curves)
-        for id, (buffer_item, player_data, curve) in enumerate(zipper):
-            buffer_item.pop(0)
-            buffer_item.append(player_data[1 + graph_data_field])
-            player_data[8] = id
-            curves.append((curve, buffer_item))
-        if len(curves) > 0:
-            self.live_parser_window.update_graph.emit(curves)
+        cells.append([player, *player_data.values(), -1])
+    if graph_active and len(cells) > 0:
+        graph_values = dict()
+        for row in cells:
+            graph_values[row[0]] = row[1 + graph_data_field]
+            row[8] = graph_data_buffer.row(row[0])
+        graph_data_buffer.push(graph_values)
+        self.live_parser_window.update_graph.emit(graph_data_buffer)
 
     if len(cells) > 0:
         self.live_parser_window.update_table.emit(cells)
     self.widgets.live_parser_duration_label.setText(f'Duration: {combat_time:.1f}s')
 
 
+def pull_live_snapshot(
+        self, snapshot_slot: SnapshotSlot, *display_args,
+        latency_stats: LiveLatencyStats | None = None,
+        session_recorder: LiveSessionRecorder | None = None):
+    """
+    Displays the newest LiveParser snapshot, if there is one. Called periodically from the GUI
+    thread.
+
+    Parameters:
+    - :param snapshot_slot: slot the LiveParser writes its snapshots to
+    - :param display_args: additional positional parameters passed to `update_live_display`
+    - :param latency_stats: records the timing of the snapshot when supplied
+    - :param session_recorder: records the snapshot when supplied
+    """
+    snapshot = snapshot_slot.take()
+    if snapshot is not None:
+        player_data, combat_time, line_timing = snapshot
+        update_live_display(
+                self, player_data, combat_time, *display_args, session_recorder=session_recorder)
+        if latency_stats is not None:
+            latency_stats.record_display(*line_timing)
+            self.widgets.live_parser_stats_label.setText(latency_stats.summary())
+
+
+def pull_replay_snapshot(self, replay: LiveSessionReplay, *display_args):
+    """
+    Displays the snapshot of a replayed session that is due, if there is one. Called periodically
+    from the GUI thread.
+
+    Parameters:
+    - :param replay: the running replay
+    - :param display_args: additional positional parameters passed to `update_live_display`
+    """
+    snapshot = replay.take()
+    if snapshot is not None:
+        update_live_display(self, *snapshot, *display_args)
+
+
 @Slot()
 def update_live_table(self, data: list):
     """
@@ -391,14 +427,25 @@ def update_live_table(self, data: list):
 
 
 @Slot()
-def update_live_graph(curve_data: list):
+def update_live_graph(self, graph_buffer: LiveGraphBuffer):
     """
-    Updates the graph of the live parser with the supplied data
+    Updates the graph of the live parser with the supplied data. Creates a new curve for every
+    player that was not plotted yet; the curve of each player has the color of the player's buffer
+    row, matching the legend column of the table. Curves of players without data in the shown
+    window are hidden and not updated.
 
     Parameters:
-    - :param curve_data: list containing pairs of curve items and data lists; curve items will be \
-    updated with the data
+    - :param graph_buffer: buffer containing the history of all tracked players
     """
-    time_data = list(range(-14, 1))
-    for curve, data_points in curve_data:
-        curve.setData(time_data, data_points)
+    curves = self.widgets.live_parser_curves
+    colors = self.theme['plot']['live_color_cycler']
+    while len(curves) < len(graph_buffer.players):
+        color = colors[len(curves) % len(colors)]
+        curves.append(self.widgets.live_parser_plot.plot(pen=mkPen(color, width=1)))
+    time_data = graph_buffer.time
+    for row, (curve, active) in enumerate(zip(curves, graph_buffer.active_rows())):
+        if active:
+            curve.setData(time_data, graph_buffer.view(row))
+            curve.setVisible(True)
+        elif curve.isVisible():
+            curve.setVisible(False)
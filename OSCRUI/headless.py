@@ -0,0 +1,290 @@
+import argparse
+import json
+import os
+import selectors
+import signal
+import socket
+import sys
+import time
+
+from .iofunctions import get_live_parser_settings, load_settings
+from .livedata import LiveLogParser, SnapshotSlot
+
+
+SSE_RESPONSE_HEADER = (
+        b'HTTP/1.1 200 OK\r\n'
+        b'Content-Type: text/event-stream\r\n'
+        b'Cache-Control: no-cache\r\n'
+        b'Connection: keep-alive\r\n'
+        b'Access-Control-Allow-Origin: *\r\n\r\n')
+BAD_REQUEST_RESPONSE = b'HTTP/1.1 400 Bad Request\r\nContent-Length: 0\r\nConnection: close\r\n\r\n'
+MAX_REQUEST_SIZE = 8192
+
+
+def encode_snapshot(player_data: dict, combat_time: float, line_timing: tuple) -> bytes:
+    """
+    Returns LiveParser snapshot as single JSON line.
+
+    Parameters:
+    - :param player_data: maps `(name, handle)` to the values of the player
+    - :param combat_time: duration of the entire combat
+    - :param line_timing: log time of the last line and time it was read
+    """
+    players = list()
+    for (name, handle), values in player_data.items():
+        players.append({'name': name, 'handle': handle, **values})
+    snapshot = {
+        'time': round(time.time(), 3),
+        'combat_time': combat_time,
+        'last_line_time': line_timing[0],
+        'players': players
+    }
+    return json.dumps(snapshot, separators=(',', ':')).encode('utf-8') + b'\n'
+
+
+class StreamClient():
+    """
+    Connected client of a `SnapshotBroadcaster`.
+    """
+    def __init__(self, connection: socket.socket, http: bool):
+        self.connection = connection
+        self.http = http
+        self.streaming = not http
+        self.request = b''
+        self.pending = memoryview(b'')
+
+    def frame(self, line: bytes) -> bytes:
+        """
+        Returns line framed for this client: as is for raw sockets, as event for SSE clients.
+        """
+        if self.http:
+            return b'data: ' + line + b'\n'
+        return line
+
+
+class SnapshotBroadcaster():
+    """
+    Serves JSON lines to any number of clients connected to a Unix socket or to a HTTP
+    server-sent-events endpoint, using a single thread and non-blocking sockets.
+
+    A client that has not received the previous line completely skips new lines until it has
+    caught up, so slow clients never queue up data and only ever receive the newest snapshot.
+    """
+    def __init__(self):
+        self._selector = selectors.DefaultSelector()
+        self._clients: dict[socket.socket, StreamClient] = dict()
+        self._servers: dict[socket.socket, bool] = dict()
+
+    def listen_unix(self, path: str):
+        """
+        Accepts clients on a Unix socket at `path`, replacing a stale socket file.
+        """
+        if not hasattr(socket, 'AF_UNIX'):
+            raise OSError('Unix sockets are not supported on this system.')
+        if os.path.exists(path):
+            os.remove(path)
+        server = socket.socket(socket.AF_UNIX, socket.SOCK_STREAM)
+        server.bind(path)
+        self._add_server(server, http=False)
+
+    def listen_http(self, host: str, port: int):
+        """
+        Accepts server-sent-events clients on `host`:`port`.
+        """
+        server = socket.socket(socket.AF_INET, socket.SOCK_STREAM)
+        server.setsockopt(socket.SOL_SOCKET, socket.SO_REUSEADDR, 1)
+        server.bind((host, port))
+        self._add_server(server, http=True)
+
+    def _add_server(self, server: socket.socket, http: bool):
+        server.listen()
+        server.setblocking(False)
+        self._servers[server] = http
+        self._selector.register(server, selectors.EVENT_READ)
+
+    @property
+    def client_count(self) -> int:
+        return len(self._clients)
+
+    def poll(self, timeout: float):
+        """
+        Handles new connections, incoming requests and pending writes for up to `timeout` seconds.
+        """
+        if len(self._servers) == 0:
+            time.sleep(max(timeout, 0))
+            return
+        for key, events in self._selector.select(max(timeout, 0)):
+            sock = key.fileobj
+            if sock in self._servers:
+                self._accept(sock)
+                continue
+            if events & selectors.EVENT_READ and sock in self._clients:
+                self._receive(self._clients[sock])
+            if events & selectors.EVENT_WRITE and sock in self._clients:
+                self._flush(self._clients[sock])
+
+    def broadcast(self, line: bytes):
+        """
+        Sends line to every client that is ready to receive it.
+        """
+        for client in tuple(self._clients.values()):
+            if client.streaming and len(client.pending) == 0:
+                client.pending = memoryview(client.frame(line))
+                self._flush(client)
+
+    def close(self):
+        """
+        Disconnects all clients and closes the servers.
+        """
+        for client in tuple(self._clients.values()):
+            self._drop(client)
+        for server in self._servers:
+            self._selector.unregister(server)
+            if server.family == getattr(socket, 'AF_UNIX', None):
+                path = server.getsockname()
+                server.close()
+                if os.path.exists(path):
+                    os.remove(path)
+            else:
+                server.close()
+        self._servers.clear()
+        self._selector.close()
+
+    def _accept(self, server: socket.socket):
+        try:
+            connection, _ = server.accept()
+        except BlockingIOError:
+            return
+        connection.setblocking(False)
+        client = StreamClient(connection, self._servers[server])
+        self._clients[connection] = client
+        self._selector.register(connection, selectors.EVENT_READ)
+
+    def _receive(self, client: StreamClient):
+        try:
+            data = client.connection.recv(4096)
+        except (BlockingIOError, InterruptedError):
+            return
+        except OSError:
+            data = b''
+        if not data:
+            self._drop(client)
+            return
+        if client.streaming:
+            return
+        client.request += data
+        if b'\r\n\r\n' in client.request:
+            if client.request.startswith(b'GET '):
+                client.streaming = True
+                client.pending = memoryview(SSE_RESPONSE_HEADER)
+            else:
+                client.pending = memoryview(BAD_REQUEST_RESPONSE)
+            self._flush(client)
+            if not client.streaming and len(client.pending) == 0:
+                self._drop(client)
+        elif len(client.request) > MAX_REQUEST_SIZE:
+            self._drop(client)
+
+    def _flush(self, client: StreamClient):
+        try:
+            sent = client.connection.send(client.pending)
+        except (BlockingIOError, InterruptedError):
+            sent = 0
+        except OSError:
+            self._drop(client)
+            return
+        client.pending = client.pending[sent:]
+        events = selectors.EVENT_READ
+        if len(client.pending) > 0:
+            events |= selectors.EVENT_WRITE
+        self._selector.modify(client.connection, events)
+
+    def _drop(self, client: StreamClient):
+        self._clients.pop(client.connection, None)
+        try:
+            self._selector.unregister(client.connection)
+        except (KeyError, ValueError):
+            pass
+        client.connection.close()
+
+
+def parse_arguments(argv: list[str]) -> argparse.Namespace:
+    """
+    Parses the command line arguments of the headless live mode.
+    """
+    parser = argparse.ArgumentParser(
+            prog='main.py --headless',
+            description='Runs the LiveParser without GUI and streams its snapshots as JSON Lines.')
+    parser.add_argument('--headless', action='store_true', help='run without GUI')
+    parser.add_argument(
+            '--log', default='', help='combatlog to follow; defaults to the STO Logfile setting')
+    parser.add_argument(
+            '--stdout', action='store_true',
+            help='write snapshots to stdout; default if no other output is given')
+    parser.add_argument('--unix', default='', metavar='PATH', help='serve on Unix socket at PATH')
+    parser.add_argument(
+            '--http', default='', metavar='[HOST:]PORT',
+            help='serve server-sent events on HOST:PORT; HOST defaults to 127.0.0.1')
+    parser.add_argument(
+            '--rate', type=float, default=10.0,
+            help='maximum number of snapshots sent per second (default: 10)')
+    return parser.parse_args(argv)
+
+
+def run_headless(argv: list[str], app_directory: str, config: dict) -> int:
+    """
+    Runs the LiveParser headless until interrupted and streams every new snapshot as JSON line to
+    the selected outputs. Returns the exit code.
+
+    Parameters:
+    - :param argv: command line arguments
+    - :param app_directory: absolute path to the app directory
+    - :param config: app configuration
+    """
+    args = parse_arguments(argv)
+    settings = load_settings(app_directory, config)
+    log_path = args.log if args.log else settings.value('sto_log_path')
+    if not log_path or not os.path.isfile(log_path):
+        print(f'Invalid Logfile: "{log_path}"', file=sys.stderr)
+        return 1
+    broadcaster = SnapshotBroadcaster()
+    try:
+        if args.unix:
+            broadcaster.listen_unix(args.unix)
+        if args.http:
+            host, _, port = args.http.rpartition(':')
+            broadcaster.listen_http(host if host else '127.0.0.1', int(port))
+    except (OSError, ValueError) as e:
+        print(f'Could not open output: {e}', file=sys.stderr)
+        broadcaster.close()
+        return 1
+    to_stdout = args.stdout or not (args.unix or args.http)
+
+    snapshot_slot = SnapshotSlot()
+    live_parser = LiveLogParser(
+            log_path, update_callback=snapshot_slot.put,
+            settings=get_live_parser_settings(settings))
+    interval = 1 / max(args.rate, 0.1)
+    signal.signal(signal.SIGTERM, lambda *_: sys.exit(0))
+    live_parser.start()
+    try:
+        next_update = time.monotonic()
+        while True:
+            broadcaster.poll(next_update - time.monotonic())
+            if time.monotonic() < next_update:
+                continue
+            next_update = max(next_update + interval, time.monotonic())
+            snapshot = snapshot_slot.take()
+            if snapshot is None:
+                continue
+            line = encode_snapshot(*snapshot)
+            if to_stdout:
+                sys.stdout.buffer.write(line)
+                sys.stdout.buffer.flush()
+            broadcaster.broadcast(line)
+    except (KeyboardInterrupt, BrokenPipeError):
+        pass
+    finally:
+        live_parser.stop()
+        broadcaster.close()
+    return 0
@@ -1,6 +1,7 @@
 import os
 import webbrowser
 
+from PySide6.QtCore import QSettings
 from PySide6.QtWidgets import QFileDialog
 from PySide6.QtGui import QIcon
 
@@ -34,6 +35,33 @@ def browse_path(self, default_path: str = None, types: str = 'Any File (*.*)', s
             return ''
     return f
 
+
+def browse_paths(self, default_path: str = None, types: str = 'Any File (*.*)') -> list[str]:
+    """
+    Opens file dialog prompting the user to select one or more files. Returns the selected paths.
+
+    Parameters:
+    - :param default_path: path that the file dialog opens at
+    - :param types: allowed file extensions, see `browse_path`
+    """
+    if default_path is None or not os.path.isdir(default_path):
+        default_path = self.app_dir
+    paths = QFileDialog.getOpenFileNames(self.window, 'Open Logs', default_path, types)[0]
+    return [path for path in paths if os.path.isfile(path)]
+
+
+def browse_folder(self, default_path: str = None) -> str:
+    """
+    Opens file dialog prompting the user to select a folder. Returns an empty string if the
+    dialog was cancelled.
+
+    Parameters:
+    - :param default_path: path that the file dialog opens at
+    """
+    if default_path is None or not os.path.isdir(default_path):
+        default_path = self.app_dir
+    return QFileDialog.getExistingDirectory(self.window, 'Open Folder', default_path)
+
 # --------------------------------------------------------------------------------------------------
 # static functions
 # --------------------------------------------------------------------------------------------------
@@ -82,6 +110,41 @@ def load_icon_series(icons: dict, app_directory: str) -> dict[str, QIcon]:
     return icon_dict
 
 
+def load_settings(app_directory: str, config: dict) -> QSettings:
+    """
+    Opens the stored settings and fills in defaults for missing values.
+
+    Parameters:
+    - :param app_directory: absolute path to the app directory
+    - :param config: app configuration containing the settings path and the default settings
+    """
+    # For Windows, Keep the Local settings for now as people are more familiar with that.
+    if os.name == "nt":
+        settings_path = os.path.abspath(app_directory + config["settings_path"])
+        settings = QSettings(settings_path, QSettings.Format.IniFormat)
+    else:
+        settings = QSettings("OSCR", "OSCR-UI")
+
+    for setting, value in config['default_settings'].items():
+        if settings.value(setting, None) is None:
+            settings.setValue(setting, value)
+    return settings
+
+
+def get_live_parser_settings(settings: QSettings) -> dict:
+    """
+    Returns settings relevant to the LiveParser
+
+    Parameters:
+    - :param settings: the app settings
+    """
+    return {
+        'seconds_between_combats': settings.value('seconds_between_combats', type=int),
+        'combats_to_parse': settings.value('combats_to_parse', type=int),
+        'graph_resolution': settings.value('graph_resolution', type=float)
+    }
+
+
 def open_link(link: str = ''):
     """
     Opens provided link
@@ -0,0 +1,279 @@
+import argparse
+from collections.abc import Callable
+import json
+import os
+import shutil
+import statistics
+import sys
+import tempfile
+import threading
+import time
+
+from OSCR import OSCR
+from PySide6.QtCore import QCoreApplication, QModelIndex
+
+from .datamodels import LeagueTableModel
+from .leagueconnector import (
+        fetch_combat, ladder_page_params, ladder_page_rows, upload_combat, LEAGUE_TABLE_HEADER,
+        OSCRClient)
+from .leaguemock import add_mock_arguments, create_mock_server, mock_combatlog
+from .leaguerequests import LeagueRequests
+
+BENCHMARKS = ('ladder', 'paging', 'download', 'upload')
+PAGING_TIMEOUT = 120
+
+
+class BenchmarkResult():
+    """
+    Timings of a single benchmark.
+    """
+    def __init__(self, name: str, timings: list[float], size: float = 0, unit: str = ''):
+        """
+        Parameters:
+        - :param name: name of the benchmark
+        - :param timings: duration of every run in seconds
+        - :param size: amount of work done per run, e.g. bytes or entries
+        - :param unit: unit of `size`; empty when the throughput is not meaningful
+        """
+        self.name = name
+        self.timings = timings
+        self.size = size
+        self.unit = unit
+
+    @property
+    def throughput(self) -> float:
+        """
+        Returns work done per second, based on the median run.
+        """
+        median = statistics.median(self.timings)
+        return self.size / median if median > 0 else 0
+
+    def to_dict(self) -> dict:
+        return {
+            'name': self.name, 'runs': len(self.timings),
+            'mean': statistics.mean(self.timings), 'median': statistics.median(self.timings),
+            'min': min(self.timings), 'max': max(self.timings),
+            'throughput': self.throughput if self.unit else None, 'unit': self.unit
+        }
+
+    def __str__(self) -> str:
+        timings = ' '.join(
+                f'{value * 1000:>9.1f}' for value in (
+                    statistics.mean(self.timings), statistics.median(self.timings),
+                    min(self.timings), max(self.timings)))
+        throughput = ''
+        if self.unit == 'B':
+            throughput = f'{self.throughput / 1024 ** 2:>9.2f} MiB/s'
+        elif self.unit:
+            throughput = f'{self.throughput:>9.0f} {self.unit}/s'
+        return f'{self.name:<28}{len(self.timings):>5} {timings}  {throughput}'
+
+
+def measure(func: Callable[[int], object], runs: int, setup: Callable[[int], object] | None = None):
+    """
+    Returns durations of `runs` calls of `func` in seconds. `func` and `setup` are called with
+    the number of the run; the time spent in `setup` is not measured.
+    """
+    timings = list()
+    for run in range(runs):
+        if setup is not None:
+            setup(run)
+        start = time.perf_counter()
+        func(run)
+        timings.append(time.perf_counter() - start)
+    return timings
+
+
+class LeagueBenchmarks():
+    """
+    Benchmarks of the league client against the mock league server. Every client gets its own
+    empty caches inside `folder`.
+    """
+    def __init__(self, server_url: str, config: dict, folder: str, runs: int):
+        self._url = server_url
+        self._config = config
+        self._folder = folder
+        self._runs = runs
+        self._clients = 0
+
+    def client(self) -> OSCRClient:
+        """
+        Returns new client with empty caches.
+        """
+        self._clients += 1
+        config = dict(self._config)
+        config['league_cache_folder_path'] = os.path.join(
+                self._folder, f'league_cache_{self._clients}')
+        config['log_cache_folder_path'] = os.path.join(self._folder, f'log_cache_{self._clients}')
+        return OSCRClient(config, self._url)
+
+    def ladder(self) -> list[BenchmarkResult]:
+        """
+        Loads variants, ladders and the first page of a ladder, like selecting a ladder in the
+        app, with empty and with populated response cache.
+        """
+        clients = list()
+
+        def load_ladder(run: int):
+            client = clients[-1]
+            client.variants(ordering='-start_date')
+            ladder = client.ladders(variant='Default').results[0]
+            client.ladder_entries(ladder.id, 1)
+
+        cold = measure(load_ladder, self._runs, lambda run: clients.append(self.client()))
+        warm = measure(load_ladder, self._runs)
+        return [
+                BenchmarkResult('ladder load (cold)', cold),
+                BenchmarkResult('ladder load (revalidated)', warm)]
+
+    def paging(self) -> list[BenchmarkResult]:
+        """
+        Loads a complete ladder page by page through `LeagueTableModel`, the way scrolling to the
+        bottom of the ladder table does.
+        """
+        app = QCoreApplication.instance() or QCoreApplication([])
+        total = 0
+
+        def load_all_pages(run: int):
+            nonlocal total
+            client = self.client()
+            requests = LeagueRequests(self._config['league_pool_size'])
+            ladder_id = client.ladders(variant='Default').results[0].id
+            index, rows, ids, total = ladder_page_rows(client.ladder_entries(ladder_id, 1))
+
+            def load_page(page: int):
+                requests.request(
+                        ('ladder_entries', page),
+                        lambda: client.get(
+                                'ladder_entries', ladder_page_params(ladder_id, page))[0],
+                        lambda data: model.insert_page(page, *ladder_page_rows(data)[:3]),
+                        lambda error: model.page_failed(page), group='ladder_page',
+                        exclusive=False)
+
+            model = LeagueTableModel(
+                    rows, LEAGUE_TABLE_HEADER, index, None, None, combatlog_id_list=ids,
+                    entry_count=total, page_loader=load_page)
+            deadline = time.monotonic() + PAGING_TIMEOUT
+            while model.rowCount(QModelIndex()) < total and time.monotonic() < deadline:
+                if model.canFetchMore(QModelIndex()):
+                    model.fetchMore(QModelIndex())
+                elif not requests.group_pending('ladder_page'):
+                    model.resume_fetching()
+                app.processEvents()
+                time.sleep(0.001)
+            requests.cancel_all()
+
+        timings = measure(load_all_pages, self._runs)
+        return [BenchmarkResult('scroll paging', timings, total, 'entries')]
+
+    def download(self) -> list[BenchmarkResult]:
+        """
+        Downloads combat logs into the log cache, reads them from the cache and parses the first
+        combat, like viewing a ladder entry.
+        """
+        client = self.client()
+        # the mock server creates its log on the first download
+        fetch_combat(self.client(), 1)
+        paths = list()
+        cold = measure(lambda run: paths.append(fetch_combat(client, 1000 + run)), self._runs)
+        cached = measure(lambda run: fetch_combat(client, 1000 + run), self._runs)
+        parser = OSCR(settings={'templog_folder_path': os.path.join(self._folder, 'templog')})
+
+        def parse(run: int):
+            parser.reset_parser()
+            parser.analyze_log_file(paths[run], max_combats=1)
+
+        parsing = measure(parse, self._runs)
+        size = os.path.getsize(paths[0])
+        return [
+                BenchmarkResult('download (cold)', cold, size, 'B'),
+                BenchmarkResult('download (cached)', cached, size, 'B'),
+                BenchmarkResult('view (parse first combat)', parsing, size, 'B')]
+
+    def upload(self, upload_size: int) -> list[BenchmarkResult]:
+        """
+        Compresses and uploads a combat log of `upload_size` bytes.
+        """
+        client = self.client()
+        log_path = os.path.join(self._folder, 'upload.log')
+        with open(log_path, 'wb') as log_file:
+            log_file.write(mock_combatlog(0, upload_size))
+        size = os.path.getsize(log_path)
+        temp_folder = os.path.join(self._folder, 'upload')
+        os.makedirs(temp_folder, exist_ok=True)
+        timings = measure(
+                lambda run: upload_combat(
+                    client, log_path, 0, size, temp_folder, lambda stage, fraction: None),
+                self._runs)
+        return [BenchmarkResult('upload', timings, size, 'B')]
+
+
+def parse_arguments(argv: list[str]) -> argparse.Namespace:
+    """
+    Parses the command line arguments of the league benchmarks.
+    """
+    parser = argparse.ArgumentParser(
+            prog='main.py --league-bench',
+            description='Benchmarks the league client against the mock league server.')
+    parser.add_argument('--league-bench', action='store_true', help='run the benchmarks')
+    parser.add_argument(
+            '--runs', type=int, default=5, help='runs per benchmark (default: 5)')
+    parser.add_argument(
+            '--only', nargs='+', choices=BENCHMARKS, default=BENCHMARKS,
+            help='benchmarks to run (default: all)')
+    parser.add_argument(
+            '--upload-size', type=int, default=16 * 1024 ** 2,
+            help='size of the uploaded log in bytes (default: 16777216)')
+    parser.add_argument('--json', default='', metavar='PATH', help='also write results to PATH')
+    add_mock_arguments(parser)
+    return parser.parse_args(argv)
+
+
+def run_league_benchmarks(argv: list[str], config: dict) -> int:
+    """
+    Starts the mock league server, runs the selected benchmarks against it and prints the results.
+    Returns the exit code.
+
+    Parameters:
+    - :param argv: command line arguments
+    - :param config: app configuration
+    """
+    args = parse_arguments(argv)
+    runs = max(args.runs, 1)
+    server = create_mock_server(args, '127.0.0.1', 0)
+    threading.Thread(target=server.serve_forever, daemon=True).start()
+    folder = tempfile.mkdtemp(prefix='oscr_league_bench_')
+    benchmarks = LeagueBenchmarks(server.url, config, folder, runs)
+    results: list[BenchmarkResult] = list()
+    print(
+            f'benchmark{" " * 19} runs   mean ms median ms    min ms    max ms  throughput\n'
+            f'{"-" * 92}', flush=True)
+    try:
+        for name in BENCHMARKS:
+            if name not in args.only:
+                continue
+            if name == 'upload':
+                new_results = benchmarks.upload(max(args.upload_size, 1))
+            else:
+                new_results = getattr(benchmarks, name)()
+            for result in new_results:
+                print(result, flush=True)
+            results.extend(new_results)
+    except Exception as e:
+        print(f'Benchmark failed: {e!r}', file=sys.stderr)
+        return 1
+    finally:
+        server.shutdown()
+        server.server_close()
+        shutil.rmtree(folder, ignore_errors=True)
+    print(f'{"-" * 92}\nserver: ' + ', '.join(
+            f'{endpoint} {stats["requests"]} requests' for endpoint, stats in server.stats.items()))
+    if args.json:
+        with open(args.json, 'w', encoding='utf-8') as file:
+            json.dump({
+                'server': {
+                    'latency': args.latency, 'bandwidth': args.bandwidth,
+                    'error_rate': args.error_rate, 'ladder_size': args.ladder_size,
+                    'log_size': args.log_size, 'stats': server.stats},
+                'results': [result.to_dict() for result in results]}, file, indent=2)
+    return 0
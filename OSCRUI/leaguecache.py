@@ -0,0 +1,243 @@
+from collections.abc import Callable
+import hashlib
+import json
+import os
+import tempfile
+import threading
+import time
+from typing import BinaryIO
+
+# seconds a cached response is used without asking the server
+LEAGUE_CACHE_TTL = {
+    'variants': 24 * 3600,
+    'ladders': 3600,
+    'ladder_entries': 300
+}
+
+
+class CacheEntry():
+    """
+    Cached response body with its validators.
+    """
+    def __init__(self, body: bytes, stored: float, etag: str = '', last_modified: str = ''):
+        self.body = body
+        self.stored = stored
+        self.etag = etag
+        self.last_modified = last_modified
+
+    def fresh(self, ttl: float) -> bool:
+        return time.time() - self.stored < ttl
+
+    @property
+    def validators(self) -> dict:
+        """
+        Returns the conditional request headers revalidating this entry.
+        """
+        headers = dict()
+        if self.etag:
+            headers['If-None-Match'] = self.etag
+        if self.last_modified:
+            headers['If-Modified-Since'] = self.last_modified
+        return headers
+
+
+class ResponseCache():
+    """
+    Persistent cache of league server responses, one file per endpoint and parameter set. Evicts
+    the least recently used entries when the cache grows larger than its size limit. Safe to use
+    from multiple threads.
+    """
+    def __init__(self, folder: str, max_size: int):
+        """
+        Parameters:
+        - :param folder: folder holding the cache files; created if missing
+        - :param max_size: size limit of the cache in bytes
+        """
+        self._folder = folder
+        self._max_size = max_size
+        self._lock = threading.Lock()
+        os.makedirs(folder, exist_ok=True)
+
+    @staticmethod
+    def key(endpoint: str, params: dict) -> str:
+        """
+        Returns cache key of request to `endpoint` with `params`.
+        """
+        request = json.dumps([endpoint, params], sort_keys=True, default=str)
+        return hashlib.sha1(request.encode()).hexdigest()
+
+    def get(self, endpoint: str, params: dict) -> CacheEntry | None:
+        """
+        Returns cached response of request or None if the request was not cached.
+        """
+        path = os.path.join(self._folder, self.key(endpoint, params))
+        try:
+            with open(path, 'rb') as file:
+                header = json.loads(file.readline())
+                body = file.read()
+            os.utime(path)
+        except (OSError, ValueError):
+            return None
+        return CacheEntry(body, header['stored'], header['etag'], header['last_modified'])
+
+    def put(self, endpoint: str, params: dict, entry: CacheEntry):
+        """
+        Stores response of request, replacing the previous response.
+        """
+        path = os.path.join(self._folder, self.key(endpoint, params))
+        header = {'stored': entry.stored, 'etag': entry.etag, 'last_modified': entry.last_modified}
+        with self._lock:
+            try:
+                with open(path + '.tmp', 'wb') as file:
+                    file.write(json.dumps(header).encode() + b'\n')
+                    file.write(entry.body)
+                os.replace(path + '.tmp', path)
+            except OSError:
+                return
+            self._evict()
+
+    def touch(self, endpoint: str, params: dict, entry: CacheEntry):
+        """
+        Marks the cached response as fresh after the server confirmed it is unchanged.
+        """
+        entry.stored = time.time()
+        self.put(endpoint, params, entry)
+
+    def _evict(self):
+        files = list()
+        total_size = 0
+        with os.scandir(self._folder) as folder:
+            for file in folder:
+                if file.is_file() and not file.name.endswith('.tmp'):
+                    stat = file.stat()
+                    files.append((stat.st_mtime, stat.st_size, file.path))
+                    total_size += stat.st_size
+        if total_size <= self._max_size:
+            return
+        files.sort()
+        for _, size, path in files:
+            try:
+                os.remove(path)
+            except OSError:
+                continue
+            total_size -= size
+            if total_size <= self._max_size:
+                break
+
+
+class HashingWriter():
+    """
+    Binary file wrapper computing the SHA-256 hash of everything written through it.
+    """
+    def __init__(self, file: BinaryIO):
+        self._file = file
+        self.hash = hashlib.sha256()
+
+    def write(self, data: bytes) -> int:
+        self.hash.update(data)
+        return self._file.write(data)
+
+
+class LogCache():
+    """
+    Content-addressed cache of downloaded combat logs. Every log is stored once under the hash of
+    its content; an index maps combatlog ids to content hashes. Evicts the least recently used logs
+    when the cache grows larger than its size limit. Safe to use from multiple threads.
+    """
+    def __init__(self, folder: str, max_size: int):
+        """
+        Parameters:
+        - :param folder: folder holding the logs; created if missing
+        - :param max_size: size limit of the cache in bytes
+        """
+        self._folder = folder
+        self._max_size = max_size
+        self._lock = threading.Lock()
+        self._index_path = os.path.join(folder, 'index.json')
+        os.makedirs(folder, exist_ok=True)
+        try:
+            with open(self._index_path, 'r', encoding='utf-8') as index_file:
+                self._index: dict[str, str] = json.load(index_file)
+        except (OSError, ValueError):
+            self._index = dict()
+        for name in os.listdir(folder):
+            if name.endswith('.tmp'):
+                os.remove(os.path.join(folder, name))
+
+    def _path(self, content_hash: str) -> str:
+        return os.path.join(self._folder, f'{content_hash}.log')
+
+    def get(self, log_id: int) -> str | None:
+        """
+        Returns path to the cached log with combatlog id `log_id` or None if it is not cached.
+        """
+        with self._lock:
+            content_hash = self._index.get(str(log_id))
+        if content_hash is None:
+            return None
+        path = self._path(content_hash)
+        try:
+            os.utime(path)
+        except OSError:
+            return None
+        return path
+
+    def store(self, log_id: int, write: Callable[[BinaryIO], object]) -> str:
+        """
+        Stores log by calling `write` with a binary file to write the log into.
+
+        Parameters:
+        - :param log_id: combatlog id of the log
+        - :param write: writes the log into the file passed to it; exceptions are re-raised
+
+        :return: path to the cached log
+        """
+        with tempfile.NamedTemporaryFile(
+                mode='wb', dir=self._folder, suffix='.tmp', delete=False) as file:
+            writer = HashingWriter(file)
+            try:
+                write(writer)
+            except BaseException:
+                file.close()
+                os.remove(file.name)
+                raise
+        content_hash = writer.hash.hexdigest()
+        path = self._path(content_hash)
+        with self._lock:
+            os.replace(file.name, path)
+            self._index[str(log_id)] = content_hash
+            self._evict(keep=path)
+            self._save_index()
+        return path
+
+    def _evict(self, keep: str):
+        files = list()
+        total_size = 0
+        with os.scandir(self._folder) as folder:
+            for file in folder:
+                if file.name.endswith('.log'):
+                    stat = file.stat()
+                    files.append((stat.st_mtime, stat.st_size, file.path))
+                    total_size += stat.st_size
+        files.sort()
+        for _, size, path in files:
+            if total_size <= self._max_size:
+                break
+            if path == keep:
+                continue
+            try:
+                os.remove(path)
+            except OSError:
+                continue
+            total_size -= size
+        self._index = {
+                log_id: content_hash for log_id, content_hash in self._index.items()
+                if os.path.exists(self._path(content_hash))}
+
+    def _save_index(self):
+        try:
+            with open(self._index_path + '.tmp', 'w', encoding='utf-8') as index_file:
+                json.dump(self._index, index_file)
+            os.replace(self._index_path + '.tmp', self._index_path)
+        except OSError:
+            pass
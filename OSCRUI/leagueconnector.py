@@ -1,64 +1,222 @@
 """Backend interface to the OSCR web server"""
 
-import gzip
+from collections import OrderedDict
+from collections.abc import Callable
+from datetime import datetime
 import json
 import os
 import tempfile
+import time
+import zlib
+from typing import BinaryIO
 
 from OSCR_django_client.api import (
         CombatlogApi, LadderApi, LadderEntriesApi, VariantApi)
-from OSCR_django_client.api_client import ApiClient
-from OSCR_django_client.exceptions import ServiceException
+from OSCR_django_client.exceptions import ApiException
+from OSCR_django_client.rest import RESTResponse
+from PySide6.QtCore import QModelIndex, QSignalBlocker, QTimer
 from PySide6.QtGui import QIcon
-from PySide6.QtWidgets import QListWidgetItem, QMessageBox
+from PySide6.QtWidgets import QListWidgetItem
+import urllib3
 
 from .callbacks import switch_main_tab, switch_overview_tab
-from .datafunctions import CustomThread, analyze_log_callback
-from .datamodels import LeagueTableModel, SortingProxy
+from .datafunctions import analyze_log_callback
+from .datamodels import LeagueTableModel, StoredLadderTableModel
 from .dialogs import show_message
+from .leaguecache import CacheEntry, LEAGUE_CACHE_TTL, LogCache, ResponseCache
+from .leaguerequests import LeagueRequests
+from .leaguesnapshots import snapshot_ladder
+from .leaguetransport import create_api_client
+from .leagueupload import (
+        compress_log_range, hash_log_range, MultipartFileBody, UploadJob, UploadLedger)
+from .localleague import ingest_local_logs, LocalLadder
+from .logfiles import write_ranges
 from .style import theme_font
-from .subwindows import uploadresult_dialog
+from .subwindows import (
+        refresh_ladder_snapshots, refresh_local_ladders, upload_summary_dialog,
+        uploadresult_dialog)
 from .textedit import format_datetime_str
 from .translation import tr
+from .widgets import PaintWatcher
 
 LEAGUE_TABLE_HEADER = (
         'Name', 'Handle', 'DPS', 'Total Damage', 'Deaths', 'Combat Time', 'Date', 'Max One Hit',
         'Debuff', 'Highest Damage Ability')
 
+# the environment variable of the same name overrides the server, e.g. to use the mock league
+# server started with `main.py --league-mock`
 OSCR_SERVER_BACKEND = "https://oscr.stobuilds.com/"
-# OSCR_SERVER_BACKEND = "http://127.0.0.1:8000"
+DOWNLOAD_CHUNK_SIZE = 64 * 1024
+# requests of the startup prefetch start after all requests made by the user
+PREFETCH_PRIORITY = -1
+
+# endpoint: (api attribute of OSCRClient, api method, response type)
+LEAGUE_ENDPOINTS = {
+    'variants': ('api_variant', 'variant_list', 'VariantList200Response'),
+    'ladders': ('api_ladder', 'ladder_list', 'LadderList200Response'),
+    'ladder_entries': (
+            'api_ladder_entries', 'ladder_entries_list', 'LadderEntriesList200Response')
+}
 
 
 def establish_league_connection(self):
     """
-    Connects to the league server if not already connected.
+    Connects to the league server if not already connected and fetches the available maps.
+    """
+    if self.league_api is None:
+        self.league_api = OSCRClient(self.config)
+        self.league_requests = LeagueRequests(self.config['league_pool_size'])
+    # the maps may be missing when the prefetch after startup failed
+    if self.widgets.variant_combo.count() == 0:
+        league_request(
+                self, 'variants', {'ordering': '-start_date'},
+                lambda variants: insert_maps(self, variants))
+    # the prefetch inserts the maps without loading the ladders of the selected season
+    elif (self.widgets.ladder_selector.count() == 0
+            and not self.league_requests.group_pending('season')):
+        update_seasonal_records(self, self.widgets.variant_combo.currentText())
+
+
+def schedule_league_prefetch(self):
+    """
+    Prefetches the favorite ladders shortly after the main window was painted for the first time,
+    so the prefetch does not delay showing the window.
+    """
+    def window_painted():
+        self.window.removeEventFilter(paint_watcher)
+        paint_watcher.deleteLater()
+        QTimer.singleShot(
+                self.config['league_prefetch_delay'], lambda: prefetch_favorite_ladders(self))
+
+    paint_watcher = PaintWatcher(window_painted, self.window)
+    self.window.installEventFilter(paint_watcher)
+
+
+def prefetch_favorite_ladders(self):
+    """
+    Connects to the league server and loads the maps and the first page of every favorite ladder
+    of the current season into the response cache, so favorites open without waiting. Runs at low
+    priority and without error messages. Does nothing when there are no favorites.
+    """
+    favorites = set(self.settings.value('favorite_ladders', type=list))
+    if self.league_api is not None or len(favorites) == 0:
+        return
+    self.league_api = OSCRClient(self.config)
+    self.league_requests = LeagueRequests(self.config['league_pool_size'])
+
+    def maps_loaded(variants):
+        # selecting the season would load its ladders in the foreground
+        blocker = QSignalBlocker(self.widgets.variant_combo)
+        insert_maps(self, variants)
+        blocker.unblock()
+        league_request(
+                self, 'ladders', {'variant': self.widgets.variant_combo.currentText()},
+                ladders_loaded, show_errors=False, priority=PREFETCH_PRIORITY)
+
+    def ladders_loaded(ladders):
+        for ladder in ladders.results:
+            params = ladder_page_params(ladder.id, 1)
+            cached = self.league_api.cached('ladder_entries', params)
+            if ladder_key(ladder) in favorites and (cached is None or not cached[1]):
+                league_request(
+                        self, 'ladder_entries', params, lambda data: None, exclusive=False,
+                        show_errors=False, priority=PREFETCH_PRIORITY)
+
+    league_request(
+            self, 'variants', {'ordering': '-start_date'}, maps_loaded, show_errors=False,
+            priority=PREFETCH_PRIORITY)
+
+
+def league_request(
+        self, endpoint: str, params: dict, on_result, group: str | None = None,
+        stale: bool = True, exclusive: bool = True, on_error=None, show_errors: bool = True,
+        priority: int = 0):
+    """
+    Requests data from the league server. A cached response is passed to `on_result` right away;
+    if it is out of date, it is refreshed in the background and `on_result` is called again when
+    the response changed. Errors are only shown when no cached response could be displayed.
 
     Parameters:
-    - :param fetch_ladder: fetches available maps and updates map selector if true
+    - :param endpoint: key of `LEAGUE_ENDPOINTS`
+    - :param params: parameters of the request
+    - :param on_result: called with the response data on the GUI thread
+    - :param group: request group, see `LeagueRequests.request`
+    - :param stale: False when out of date responses must not be passed to `on_result`
+    - :param exclusive: see `LeagueRequests.request`
+    - :param on_error: called with the exception when the request failed
+    - :param show_errors: False to never inform the user about failed requests
+    - :param priority: see `LeagueRequests.request`
     """
-    if self.league_api is None:
-        self.league_api = OSCRClient()
-        map_fetch_thread = CustomThread(
-            self.window, lambda: fetch_and_insert_maps(self)
-        )
-        map_fetch_thread.start()
+    cached = self.league_api.cached(endpoint, params)
+    if cached is not None and (stale or cached[1]):
+        if group is not None and exclusive:
+            self.league_requests.cancel_group(group)
+        on_result(cached[0])
+        if cached[1]:
+            return
+        shown = True
+    else:
+        shown = False
+
+    def result_callback(response):
+        data, changed = response
+        if changed or not shown:
+            on_result(data)
 
+    def error_callback(error):
+        if on_error is not None:
+            on_error(error)
+        if not shown and show_errors:
+            show_league_error(self, error)
 
-def fetch_and_insert_maps(self):
+    self.league_requests.request(
+            (endpoint, tuple(sorted(params.items()))),
+            lambda: self.league_api.get(endpoint, params), result_callback, error_callback, group,
+            exclusive, priority=priority)
+
+
+def insert_maps(self, variants):
     """
-    Retrieves maps from API and inserts them into the list.
+    Inserts maps retrieved from API into the list.
+
+    Parameters:
+    - :param variants: paginated variant list returned by the API
     """
     # Only populate the table once.
     if self.widgets.variant_combo.count() > 0:
         return
 
-    variants = self.league_api.variants(ordering="-start_date")
     for variant in variants.results:
         self.widgets.variant_combo.addItem(variant.name)
         if variant.name == 'Default':
             self.widgets.variant_combo.setCurrentText('Default')
 
 
+def league_error_message(error: Exception) -> str:
+    """
+    Returns message describing why a request to the league server failed.
+
+    Parameters:
+    - :param error: exception raised by the request
+    """
+    if isinstance(error, ApiException):
+        try:
+            return json.loads(error.body).get('detail', tr('Failed to parse error from server'))
+        except Exception:
+            return tr('Failed to parse error from server')
+    return tr('Could not connect to the league server.')
+
+
+def show_league_error(self, error: Exception):
+    """
+    Informs the user about a failed request to the league server.
+
+    Parameters:
+    - :param error: exception raised by the request
+    """
+    show_message(self, 'Open Source Combatlog Reader', league_error_message(error), 'error')
+
+
 def update_seasonal_records(self, new_season: str):
     """
     Update the default records widget
@@ -66,26 +224,43 @@ def update_seasonal_records(self, new_season: str):
     Parameters:
     - :param new_season: Name of the season to be shown
     """
-    ladders = self.league_api.ladders(variant=new_season)
-    if ladders is not None:
-        self.widgets.ladder_selector.clear()
-        for ladder in ladders.results:
-            solo = "[Solo]" if ladder.is_solo else ""
-            key = f"{ladder.name} {solo}|{ladder.difficulty}"
-            text = f"{ladder.name} {solo}"
-            self.league_api.ladder_dict[key] = ladder
-            item = QListWidgetItem(text)
-            item.difficulty = ladder.difficulty
-            if ladder.difficulty != 'Any' and ladder.difficulty is not None:
-                icon = self.icons[f'TFO-{ladder.difficulty.lower()}']
-                icon.addPixmap(icon.pixmap(18, 24), QIcon.Mode.Selected)
-                item.setIcon(icon)
-            self.widgets.ladder_selector.addItem(item)
+    league_request(
+            self, 'ladders', {'variant': new_season},
+            lambda ladders: insert_ladders(self, ladders), group='season')
+
+
+def ladder_key(ladder) -> str:
+    """
+    Returns key identifying `ladder` in the ladder selector and the favorite ladders.
+    """
+    solo = "[Solo]" if ladder.is_solo else ""
+    return f"{ladder.name} {solo}|{ladder.difficulty}"
+
+
+def insert_ladders(self, ladders):
+    """
+    Inserts ladders retrieved from API into the ladder selector.
+
+    Parameters:
+    - :param ladders: paginated ladder list returned by the API
+    """
+    self.widgets.ladder_selector.clear()
+    for ladder in ladders.results:
+        solo = "[Solo]" if ladder.is_solo else ""
+        text = f"{ladder.name} {solo}"
+        self.league_api.ladder_dict[ladder_key(ladder)] = ladder
+        item = QListWidgetItem(text)
+        item.difficulty = ladder.difficulty
+        if ladder.difficulty != 'Any' and ladder.difficulty is not None:
+            icon = self.icons[f'TFO-{ladder.difficulty.lower()}']
+            icon.addPixmap(icon.pixmap(18, 24), QIcon.Mode.Selected)
+            item.setIcon(icon)
+        self.widgets.ladder_selector.addItem(item)
 
 
 def apply_league_table_filter(self, filter_text: str):
     """
-    Sets filter to proxy model of league table
+    Sets name filter of league table
 
     Parameters:
     - :param filter_text: text to filter the table for
@@ -96,29 +271,25 @@ def apply_league_table_filter(self, filter_text: str):
         pass
 
 
-def slot_ladder(self, selected_map_item: QListWidgetItem):
+def ladder_page_params(ladder_id: int, page: int) -> dict:
+    """
+    Returns parameters of the request for page `page` of ladder `ladder_id`.
     """
-    Fetches current ladder and puts it into the table.
+    return {'ladder': str(ladder_id), 'page': page, 'ordering': '-data__DPS', 'page_size': 50}
 
-    Parameters:
-    - :param selected_map_item: item containing name and difficulty of clicked map
+
+def ladder_page_rows(ladder_data) -> tuple[list, list, list, int]:
     """
-    map_key = f'{selected_map_item.text()}|{selected_map_item.difficulty}'
-    if map_key not in self.league_api.ladder_dict:
-        return
+    Converts page of ladder entries to table rows.
 
-    selected_ladder = self.league_api.ladder_dict[map_key]
-    self.league_api.current_ladder_id = selected_ladder.id
-    ladder_data = self.league_api.ladder_entries(selected_ladder.id)
-    if ladder_data.count > 50:
-        self.league_api.entire_ladder_loaded = False
-    else:
-        self.league_api.entire_ladder_loaded = True
-    self.league_api.pages_loaded = 1
+    Parameters:
+    - :param ladder_data: paginated ladder entry list returned by the API
+
+    :return: tuple containing table index, table data, combatlog ids and total number of entries
+    """
     table_index = list()
     table_data = list()
     logfile_ids = list()
-
     for entry in ladder_data.results:
         logfile_ids.append(entry.combatlog)
         row = entry.data
@@ -137,6 +308,47 @@ def slot_ladder(self, selected_map_item: QListWidgetItem):
                 row.get("build", "Unknown"),
             )
         )
+    return table_index, table_data, logfile_ids, ladder_data.count
+
+
+def slot_ladder(self, selected_map_item: QListWidgetItem):
+    """
+    Fetches current ladder and puts it into the table. Cancels loading the previously selected
+    ladder.
+
+    Parameters:
+    - :param selected_map_item: item containing name and difficulty of clicked map
+    """
+    map_key = f'{selected_map_item.text()}|{selected_map_item.difficulty}'
+    if map_key not in self.league_api.ladder_dict:
+        return
+
+    selected_ladder = self.league_api.ladder_dict[map_key]
+    self.league_requests.cancel_group('ladder_page')
+    self.league_api.current_ladder_id = selected_ladder.id
+    league_request(
+            self, 'ladder_entries', ladder_page_params(selected_ladder.id, 1),
+            lambda data: insert_ladder(self, selected_ladder.id, *ladder_page_rows(data)),
+            group='ladder')
+
+
+def insert_ladder(
+        self, ladder_id: int, table_index: list, table_data: list, logfile_ids: list,
+        entry_count: int):
+    """
+    Puts first page of ladder into the table. Further pages are loaded by the model when the
+    table is scrolled down.
+
+    Parameters:
+    - :param ladder_id: id of the ladder
+    - :param table_index: ranks of the entries
+    - :param table_data: table rows
+    - :param logfile_ids: combatlog ids of the entries
+    - :param entry_count: total number of entries in the ladder
+    """
+    if ladder_id != self.league_api.current_ladder_id:
+        return
+    self.league_requests.cancel_group('ladder_page')
 
     model = LeagueTableModel(
         table_data,
@@ -145,214 +357,683 @@ def slot_ladder(self, selected_map_item: QListWidgetItem):
         theme_font(self, "table_header"),
         theme_font(self, "table"),
         combatlog_id_list=logfile_ids,
+        entry_count=entry_count,
+        page_loader=lambda page: request_ladder_page(self, model, ladder_id, page)
     )
-    sorting_proxy = SortingProxy()
-    sorting_proxy.setSourceModel(model)
     table = self.widgets.ladder_table
-    table.setModel(sorting_proxy)
+    table.setModel(model)
     table.resizeColumnsToContents()
     table.scrollToTop()
+    self.widgets.ladder_snapshot_label.setText('')
+
+
+def request_ladder_page(self, model: LeagueTableModel, ladder_id: int, page: int):
+    """
+    Fetches page of ladder entries in the background and hands it to the model.
+
+    Parameters:
+    - :param model: model requesting the page
+    - :param ladder_id: id of the ladder
+    - :param page: number of the page
+    """
+    league_request(
+            self, 'ladder_entries', ladder_page_params(ladder_id, page),
+            lambda data: model.insert_page(page, *ladder_page_rows(data)[:3]),
+            group='ladder_page', stale=False, exclusive=False,
+            on_error=lambda error: model.page_failed(page))
+
+
+def prefetch_ladder(self, scroll_value: int):
+    """
+    Loads the next pages of the ladder when the table is scrolled close to its end. Called when
+    the vertical scroll bar of the ladder table moves.
+
+    Parameters:
+    - :param scroll_value: new value of the scroll bar
+    """
+    scroll_bar = self.widgets.ladder_table.verticalScrollBar()
+    if scroll_bar.maximum() - scroll_value <= 2 * scroll_bar.pageStep():
+        model = self.widgets.ladder_table.model()
+        if model is not None:
+            model.fetchMore(QModelIndex())
 
 
 def extend_ladder(self):
     """
-    Extends the ladder table by 50 newly fetched rows.
+    Loads the next pages of the ladder, retrying pages that failed to load.
     """
-    if self.league_api.entire_ladder_loaded:
+    model = self.widgets.ladder_table.model()
+    if model is None:
         return
-    if self.league_api.current_ladder_id is None:
+    model.resume_fetching()
+    model.fetchMore(QModelIndex())
+
+
+def save_ladder_snapshot(self):
+    """
+    Stores all entries of the ladder shown in the ladder table in a new snapshot. The pages are
+    fetched in the background.
+    """
+    if self.league_api is None or self.league_api.current_ladder_id is None:
         return
+    ladder_id = self.league_api.current_ladder_id
+    for ladder in self.league_api.ladder_dict.values():
+        if ladder.id == ladder_id:
+            break
+    else:
+        return
+    key = ('snapshot', ladder_id)
+    label = self.widgets.ladder_snapshot_label
+    label.setText(tr('Saving snapshot'))
+
+    def fetch_page(page: int) -> tuple[list, list, list, int]:
+        return ladder_page_rows(
+                self.league_api.get('ladder_entries', ladder_page_params(ladder_id, page))[0])
+
+    def report_progress(done: int, total: int):
+        self.league_requests.report_progress(key, (done, total))
+
+    def show_progress(progress: tuple[int, int]):
+        label.setText(f"{tr('Saving snapshot')} {progress[0]}/{progress[1]}")
+
+    def snapshot_saved(snapshot: int):
+        label.setText(tr('Snapshot saved'))
+        refresh_ladder_snapshots(self)
+
+    def snapshot_failed(error: Exception):
+        label.setText('')
+        show_league_error(self, error)
+
+    self.league_requests.request(
+            key,
+            lambda: snapshot_ladder(fetch_page, self.ladder_snapshots, ladder, report_progress),
+            snapshot_saved, snapshot_failed, group='snapshot', exclusive=False,
+            on_progress=show_progress)
+
+
+def show_ladder_snapshot(self, snapshot: int):
+    """
+    Shows a stored ladder snapshot in the ladder table. Loading, sorting and filtering the
+    snapshot does not need the league server.
+
+    Parameters:
+    - :param snapshot: id of the snapshot
+    """
+    stored_snapshot = self.ladder_snapshots.snapshot(snapshot)
+    if stored_snapshot is None:
+        return
+    created = datetime.fromtimestamp(stored_snapshot.created).strftime('%Y-%m-%d %H:%M')
+    show_stored_ladder(
+            self, self.ladder_snapshots, snapshot,
+            f"{tr('Snapshot')}: {stored_snapshot.title}, {created}")
 
-    ladder_data = self.league_api.ladder_entries(
-        self.league_api.current_ladder_id, self.league_api.pages_loaded + 1
-    )
-    if ladder_data is not None:
-        if len(ladder_data.results) < 50:
-            self.league_api.entire_ladder_loaded = True
-        self.league_api.pages_loaded += 1
-        table_index = list()
-        table_data = list()
-        logfile_ids = list()
-        for entry in ladder_data.results:
-            logfile_ids.append(entry.combatlog)
-            row = entry.data
-            table_index.append(entry.rank)
-            table_data.append(
-                (
-                    row["name"],
-                    row["handle"],
-                    row["DPS"],
-                    row["total_damage"],
-                    row["deaths"],
-                    row["combat_time"],
-                    format_datetime_str(entry.var_date),
-                    row["max_one_hit"],
-                    row["debuff"],
-                    row.get("build", "Unknown"),
-                )
-            )
-        self.widgets.ladder_table.model().sourceModel().extend_data(
-            table_index, table_data, logfile_ids
-        )
+
+def show_stored_ladder(self, store, ladder, title: str):
+    """
+    Shows a ladder stored in a local database in the ladder table.
+
+    Parameters:
+    - :param store: database containing the ladder, see `StoredLadderTableModel`
+    - :param ladder: key of the ladder in `store`
+    - :param title: shown next to the search bar
+    """
+    if self.league_api is not None:
+        self.league_requests.cancel_group('ladder')
+        self.league_requests.cancel_group('ladder_page')
+        self.league_api.current_ladder_id = None
+    self.widgets.ladder_selector.clearSelection()
+    self.widgets.favorite_ladder_selector.clearSelection()
+    model = StoredLadderTableModel(
+            store, ladder, tr(LEAGUE_TABLE_HEADER), theme_font(self, 'table_header'),
+            theme_font(self, 'table'))
+    table = self.widgets.ladder_table
+    table.setModel(model)
+    table.resizeColumnsToContents()
+    table.scrollToTop()
+    self.widgets.ladder_snapshot_label.setText(title)
+
+
+def add_local_league_logs(self, paths: list[str]):
+    """
+    Adds the combats of logs to the local league. The logs are analyzed in the background.
+
+    Parameters:
+    - :param paths: paths to the logs
+    """
+    if len(paths) == 0:
+        return
+    key = ('local_league', tuple(paths))
+    label = self.widgets.local_league_label
+    label.setText(tr('Analyzing logs'))
+    label.setToolTip('')
+
+    def report_progress(done: int, total: int, added: int):
+        self.local_league_requests.report_progress(key, (done, total, added))
+
+    def show_progress(progress: tuple[int, int, int]):
+        done, total, added = progress
+        label.setText(f"{tr('Analyzing logs')} {done}/{total}, {tr('new combats')}: {added}")
+
+    def logs_added(result: tuple[int, int, list[str]]):
+        analyzed, added, errors = result
+        text = f"{tr('Logs analyzed')}: {analyzed}, {tr('new combats')}: {added}"
+        if len(errors) > 0:
+            text += f", {tr('errors')}: {len(errors)}"
+            label.setToolTip('\n'.join(errors))
+        label.setText(text)
+        refresh_local_ladders(self)
+
+    def logs_failed(error: Exception):
+        label.setText('')
+        show_message(self, tr('Local League'), f'{error!r}', 'error')
+
+    self.local_league_requests.request(
+            key,
+            lambda: ingest_local_logs(
+                self.local_league, paths, self.parser_settings, report_progress,
+                self.app_closing),
+            logs_added, logs_failed, group='local_league', exclusive=False,
+            on_progress=show_progress)
+
+
+def show_local_ladder(self, ladder: LocalLadder):
+    """
+    Shows a ladder of the local league in the ladder table.
+    """
+    show_stored_ladder(
+            self, self.local_league, ladder.key, f"{tr('Local League')}: {ladder.title}")
+
+
+def view_local_combat(self, combat: int):
+    """
+    Copies a combat of the local league out of its log in the background and shows it in the
+    overview.
+
+    Parameters:
+    - :param combat: id of the combat in the local league
+    """
+    location = self.local_league.combat_location(combat)
+    if location is None:
+        return
+    path = os.path.join(self.config['templog_folder_path'], f'local_league_{combat}.log')
+
+    def combat_copied(path: str):
+        analyze_log_callback(self, path=path, hidden_path=True)
+        switch_overview_tab(self, self.settings.value('first_overview_tab', type=int))
+        switch_main_tab(self, 1)
+
+    def copy_failed(error: Exception):
+        show_message(
+                self, tr('Local League'),
+                tr('The log containing this combat was moved or changed.'), 'warning')
+
+    self.local_league_requests.request(
+            ('local_combat', combat), lambda: copy_local_combat(*location, path), combat_copied,
+            copy_failed, group='local_combat')
+
+
+def copy_local_combat(log_path: str, start: int, end: int, content_hash: str, path: str) -> str:
+    """
+    Copies a combat of the local league out of its log, provided the log did not change since the
+    combat was added. Runs in a worker thread.
+
+    Parameters:
+    - :param log_path: log containing the combat
+    - :param start: first byte of the combat
+    - :param end: byte after the last byte of the combat
+    - :param content_hash: hash of the combat stored in the local league
+    - :param path: logfile to copy the combat to
+
+    :return: `path`
+    """
+    if hash_log_range(log_path, start, end) != content_hash:
+        raise FileNotFoundError(log_path)
+    write_ranges(log_path, path, ((start, end),))
+    return path
+
+
+def fetch_combat(league_api, log_id: int) -> str:
+    """
+    Downloads combat log into the log cache unless it is cached already. Runs in a worker thread.
+
+    Parameters:
+    - :param league_api: client to use
+    - :param log_id: id of the combat log
+
+    :return: path to the cached log
+    """
+    path = league_api.log_cache.get(log_id)
+    if path is None:
+        path = league_api.log_cache.store(log_id, lambda file: league_api.download_to(log_id, file))
+    return path
 
 
 def download_and_view_combat(self):
     """
-    Download a combat log and view its contents in the overview / analysis pages.
+    Download a combat log and view its contents in the overview / analysis pages. Logs that were
+    viewed before are taken from the log cache; if their combats are still held in memory, they are
+    shown without parsing the log again.
     """
     table = self.widgets.ladder_table
-    table_model = table.model().sourceModel()
     selection = table.selectedIndexes()
-    original_index = table.model().mapToSource(selection[0])
-    row = original_index.row()
-    log_id = table_model._combatlog_id_list[row]
-    result = self.league_api.download(log_id)
-    result = gzip.decompress(result)
-
-    with tempfile.NamedTemporaryFile(
-        mode="w", encoding="utf-8", dir=self.config['templog_folder_path'], delete=False
-    ) as file:
-        file.write(result.decode())
-    analyze_log_callback(
-        self, path=file.name, hidden_path=True
-    )
+    if len(selection) == 0:
+        return
+    model = table.model()
+    if isinstance(model, StoredLadderTableModel) and model.store is self.local_league:
+        view_local_combat(self, model.combatlog_id(selection[0].row()))
+        return
+    log_id = model.combatlog_id(selection[0].row())
+    remember_viewed_combats(self)
+    path = self.league_api.log_cache.get(log_id)
+    if path is not None and log_id in self.league_api.analyzed_logs:
+        cached_path, combats = self.league_api.analyzed_logs[log_id]
+        if cached_path == path:
+            self.league_api.analyzed_logs.move_to_end(log_id)
+            view_downloaded_combat(self, log_id, path, combats)
+            return
+    self.league_requests.request(
+            ('download', log_id), lambda: fetch_combat(self.league_api, log_id),
+            lambda path: view_downloaded_combat(self, log_id, path),
+            lambda error: show_league_error(self, error), group='download')
+
+
+def view_downloaded_combat(self, log_id: int, path: str, combats: list | None = None):
+    """
+    Analyzes downloaded combat log and switches to the overview.
+
+    Parameters:
+    - :param log_id: combatlog id of the log
+    - :param path: path to the downloaded log
+    - :param combats: analyzed combats of the log, most recent first; parsed from the log if None
+    """
+    analyze_log_callback(self, path=path, hidden_path=True, combats=combats)
+    if self.parser.log_path == path:
+        self.league_api.viewed_log = (log_id, path)
     switch_overview_tab(self, self.settings.value('first_overview_tab', type=int))
     switch_main_tab(self, 1)
 
 
+def remember_viewed_combats(self):
+    """
+    Keeps the analyzed combats of the last viewed ladder log in memory, if they are still shown.
+    """
+    if self.league_api.viewed_log is None:
+        return
+    log_id, path = self.league_api.viewed_log
+    combats = self.parser.combats
+    if (self.parser.log_path != path or (self.thread is not None and self.thread.is_alive())
+            or len(combats) == 0 or None in combats):
+        return
+    self.league_api.analyzed_logs[log_id] = (path, list(combats))
+    self.league_api.analyzed_logs.move_to_end(log_id)
+    while len(self.league_api.analyzed_logs) > self.config['league_analyzed_logs']:
+        self.league_api.analyzed_logs.popitem(last=False)
+
+
 def upload_callback(self):
     """
-    Helper function to grab the current combat and upload it to the backend.
+    Adds the combats selected in the sidebar to the upload queue and starts uploading them.
     """
-    try:
-        current_combat = self.parser.combats[self.current_combats.currentIndex().data()[0]]
-    except IndexError:
+    indexes = self.current_combats.selectionModel().selectedRows()
+    if len(indexes) == 0 and self.current_combats.currentIndex().isValid():
+        indexes = [self.current_combats.currentIndex()]
+    jobs = list()
+    for index in sorted(indexes, key=lambda index: index.row()):
+        combat_id, map_name, date, time, difficulty = index.data()
+        try:
+            combat = self.parser.combats[combat_id]
+        except IndexError:
+            continue
+        if combat is None:
+            continue
+        name = f'{map_name} {difficulty}' if difficulty else map_name
+        name = f'{name} ({date} {time})'
+        jobs.append(UploadJob(combat.log_file, combat.file_pos[0], combat.file_pos[1], name))
+    if len(jobs) == 0:
         show_message(self, tr("Logfile Upload"), tr("No data to upload."), 'info')
         return
+    self.upload_queue.add(jobs)
+    run_upload_queue(self)
 
+
+def run_upload_queue(self):
+    """
+    Starts queued uploads until the configured number of uploads is running.
+    """
+    if self.upload_queue.next_queued() is None:
+        return
     establish_league_connection(self)
+    while self.upload_queue.count(UploadJob.RUNNING) < self.config['upload_concurrency']:
+        job = self.upload_queue.next_queued()
+        if job is None:
+            break
+        start_upload_job(self, job)
+    self.upload_queue.save()
+    self.widgets.upload_queue_model.refresh()
+    update_upload_status(self)
+
+
+def start_upload_job(self, job: UploadJob):
+    """
+    Uploads the combat of `job` in the background.
+    """
+    job.status = UploadJob.RUNNING
+    job.detail = ''
+    job.progress = 0
+    self.upload_batch.append(job)
+    key = job.key
+    log_path, start, end, content_hash = job.log_path, job.start, job.end, job.content_hash
+
+    def report_progress(stage: str, fraction: float):
+        self.league_requests.report_progress(key, (stage, fraction))
+
+    def report_hash(current_hash: str):
+        self.league_requests.report_progress(key, ('hash', current_hash))
+
+    def show_progress(progress: tuple[str, float | str]):
+        stage, value = progress
+        if stage == 'hash':
+            # saved while the upload runs, so a resumed job can tell whether the log changed
+            job.content_hash = value
+            self.upload_queue.save()
+            return
+        # compression makes up the first, the upload the second half of a job
+        job.progress = value / 2 if stage == 'compress' else 0.5 + value / 2
+        update_upload_status(self)
+
+    self.league_requests.request(
+            key,
+            lambda: upload_job(
+                    self.league_api, self.upload_ledger, log_path, start, end, content_hash,
+                    self.config['templog_folder_path'], report_progress, report_hash),
+            lambda outcome: upload_job_finished(self, job, outcome),
+            lambda error: upload_job_failed(self, job, error), on_progress=show_progress)
 
-    with tempfile.NamedTemporaryFile(delete=False, dir=self.config['templog_folder_path']) as temp:
-        with open(current_combat.log_file, 'rb') as log_file:
-            log_file.seek(current_combat.file_pos[0])
-            data = gzip.compress(
-                    log_file.read(current_combat.file_pos[1] - current_combat.file_pos[0]))
-            temp.write(data)
-            temp.flush()
-    res = self.league_api.upload(temp.name)
-    if res:
-        uploadresult_dialog(self, res)
-    os.remove(temp.name)
+
+def upload_job_finished(self, job: UploadJob, outcome: tuple):
+    """
+    Stores the outcome of a finished upload job and continues with the queue.
+
+    Parameters:
+    - :param job: finished job
+    - :param outcome: return value of `upload_job`
+    """
+    job.status, job.content_hash, job.combatlog, job.detail, job.result = outcome
+    if job.status == UploadJob.SKIPPED:
+        job.detail = tr('Already uploaded')
+    continue_upload_queue(self)
+
+
+def upload_job_failed(self, job: UploadJob, error: Exception):
+    """
+    Marks upload job as failed and continues with the queue.
+    """
+    job.status = UploadJob.FAILED
+    if isinstance(error, (OSError, ValueError)):
+        job.detail = str(error)
+    else:
+        job.detail = league_error_message(error)
+    continue_upload_queue(self)
+
+
+def continue_upload_queue(self):
+    """
+    Starts the next queued uploads. Shows the results once the queue ran empty.
+    """
+    self.upload_queue.save()
+    self.widgets.upload_queue_model.refresh()
+    run_upload_queue(self)
+    if self.upload_queue.count(UploadJob.QUEUED, UploadJob.RUNNING) > 0:
+        return
+    batch = self.upload_batch
+    self.upload_batch = list()
+    update_upload_status(self)
+    if len(batch) == 1 and batch[0].result is not None:
+        uploadresult_dialog(self, batch[0].result)
+    elif len(batch) > 0:
+        upload_summary_dialog(self)
+
+
+def update_upload_status(self):
+    """
+    Shows progress of the running uploads next to the upload button.
+    """
+    label = self.widgets.upload_progress_label
+    if self.upload_queue.count(UploadJob.QUEUED, UploadJob.RUNNING) == 0:
+        label.hide()
+        return
+    done = sum(1 for job in self.upload_batch if job.finished)
+    progress = sum(job.progress for job in self.upload_batch if not job.finished)
+    queued = self.upload_queue.count(UploadJob.QUEUED)
+    total = len(self.upload_batch) + queued
+    label.setText(f"{tr('Uploading')} {done}/{total} ({(done + progress) / total:.0%})")
+    label.show()
+
+
+def upload_job(
+        league_api: 'OSCRClient', ledger: UploadLedger, log_path: str, start: int, end: int,
+        content_hash: str, temp_folder: str, progress: Callable[[str, float], None],
+        hashed: Callable[[str], None]) -> tuple:
+    """
+    Uploads a combat unless the ledger shows it was uploaded before. Runs in a worker thread.
+
+    Parameters:
+    - :param league_api: league client
+    - :param ledger: ledger of uploaded combats
+    - :param log_path: path to the log containing the combat
+    - :param start: first byte of the combat
+    - :param end: byte after the last byte of the combat
+    - :param content_hash: hash of the combat computed by a previous run of the job or empty
+    - :param temp_folder: folder the compressed combat is stored in during the upload
+    - :param progress: see `upload_combat`
+    - :param hashed: called with the hash of the combat before it is uploaded
+
+    :return: status, content hash, combatlog id, result message and server response
+    """
+    current_hash = hash_log_range(log_path, start, end)
+    if content_hash and current_hash != content_hash:
+        raise ValueError(tr('The logfile changed since the combat was queued.'))
+    hashed(current_hash)
+    record = ledger.get(current_hash)
+    if record is not None:
+        return UploadJob.SKIPPED, current_hash, record['combatlog'], record['detail'], None
+    result = upload_combat(league_api, log_path, start, end, temp_folder, progress)
+    ledger.add(current_hash, result.combatlog, result.detail)
+    return UploadJob.UPLOADED, current_hash, result.combatlog, result.detail, result
+
+
+def upload_combat(
+        league_api: 'OSCRClient', log_path: str, start: int, end: int, temp_folder: str,
+        progress: Callable[[str, float], None]):
+    """
+    Compresses bytes `start` to `end` of the log at `log_path` into a temporary file and uploads
+    it. Runs in a worker thread.
+
+    Parameters:
+    - :param league_api: league client
+    - :param log_path: path to the log containing the combat
+    - :param start: first byte of the combat
+    - :param end: byte after the last byte of the combat
+    - :param temp_folder: folder the compressed combat is stored in during the upload
+    - :param progress: called with the stage ("compress" or "upload") and its completed fraction
+
+    :return: upload result as returned by the server
+    """
+    size = max(end - start, 1)
+    with tempfile.NamedTemporaryFile(dir=temp_folder, suffix='.gz', delete=False) as temp:
+        try:
+            compress_log_range(
+                    log_path, start, end, temp, lambda done: progress('compress', done / size))
+        except BaseException:
+            temp.close()
+            os.remove(temp.name)
+            raise
+    try:
+        return league_api.upload(
+                temp.name, lambda sent, total: progress('upload', sent / max(total, 1)))
+    finally:
+        os.remove(temp.name)
 
 
 class OSCRClient:
-    def __init__(self):
-        """Initialize an instance of the OSCR backlend client"""
+    def __init__(self, config: dict, address: str | None = None):
+        """
+        Initialize an instance of the OSCR backlend client
 
-        self.address = OSCR_SERVER_BACKEND
-        self.api_client = ApiClient()
-        self.api_client.configuration.host = self.address
+        Parameters:
+        - :param config: app config; contains the settings of the response cache and the
+        connection pool
+        - :param address: address of the league server; defaults to `OSCR_SERVER_BACKEND`
+        """
+
+        if address is None:
+            address = os.environ.get('OSCR_SERVER_BACKEND', OSCR_SERVER_BACKEND)
+        self.address = address
+        self.api_client = create_api_client(
+                self.address, config['league_pool_size'], config['league_retries'],
+                config['league_retry_backoff'])
+        # (connect, read) timeouts in seconds for small requests and for up- and downloads
+        self.timeout = tuple(config['league_timeout'])
+        self.transfer_timeout = tuple(config['league_transfer_timeout'])
         self.api_combatlog = CombatlogApi(api_client=self.api_client)
         self.api_ladder = LadderApi(api_client=self.api_client)
         self.api_ladder_entries = LadderEntriesApi(api_client=self.api_client)
         self.api_variant = VariantApi(api_client=self.api_client)
+        self.cache = ResponseCache(
+                config['league_cache_folder_path'], config['league_cache_size'])
+        self.log_cache = LogCache(config['log_cache_folder_path'], config['log_cache_size'])
+        # combatlog id: (path, analyzed combats) of recently viewed ladder logs
+        self.analyzed_logs: OrderedDict[int, tuple[str, list]] = OrderedDict()
+        self.viewed_log: tuple[int, str] | None = None
         self.ladder_dict: dict = dict()
         self.ladder_dict_season: dict = dict()
         self.current_ladder_id = None
-        self.pages_loaded: int = -1
-        self.entire_ladder_loaded: bool = True
 
-    def upload(self, filename):
-        """Upload a combat log located at path for analysis"""
+    # The methods below raise on failure; `LeagueRequests` hands the exception to the caller.
+
+    def upload(self, filename, progress: Callable[[int, int], None] | None = None):
+        """
+        Upload a combat log located at path for analysis. The file is streamed from disk instead
+        of being read into memory.
 
+        Parameters:
+        - :param filename: path to the gzip compressed log
+        - :param progress: called with the number of bytes sent and the file size
+        """
+        method, url, headers, _, _ = self.api_client.param_serialize(
+                method='POST', resource_path='/combatlog/uploadv2/',
+                header_params={'Accept': 'application/json'}, auth_settings=['Basic'])
+        body = MultipartFileBody('file', filename, progress)
+        headers['Content-Type'] = body.content_type
+        headers['Content-Length'] = str(body.length)
+        response = self.api_client.rest_client.pool_manager.urlopen(
+                method, url, body=body, headers=headers, preload_content=False,
+                timeout=urllib3.Timeout(
+                    connect=self.transfer_timeout[0], read=self.transfer_timeout[1]))
         try:
-            return self.api_combatlog.combatlog_uploadv2(file=filename)
-        except ServiceException as e:
-            reply = QMessageBox()
-            reply.setWindowTitle("Open Source Combatlog Reader")
-            try:
-                data = json.loads(e.body)
-                reply.setText(
-                    data.get("detail", tr("Failed to parse error from server"))
-                )
-            except Exception:
-                reply.setText(tr("Failed to parse error from server"))
-            reply.exec()
+            rest_response = RESTResponse(response)
+            rest_response.read()
+            # raises ApiException for error responses
+            return self.api_client.response_deserialize(
+                    rest_response, {'200': 'CombatLogUploadV2Response'}).data
+        finally:
+            response.release_conn()
 
     def download(self, id):
         """Download a combat log"""
+        return self.api_combatlog.combatlog_download(
+                id=id, _request_timeout=self.transfer_timeout)
+
+    def download_to(self, id, file: BinaryIO) -> int:
+        """
+        Downloads a combat log and writes it decompressed into `file`. The download is streamed
+        through an incremental decompressor, so only a single chunk is held in memory.
+
+        :return: number of bytes written
+        """
+        response = self.api_combatlog.combatlog_download_without_preload_content(
+                id=id, _request_timeout=self.transfer_timeout)
         try:
-            return self.api_combatlog.combatlog_download(id=id)
-        except ServiceException as e:
-            reply = QMessageBox()
-            reply.setWindowTitle("Open Source Combatlog Reader")
-            try:
-                data = json.loads(e.body)
-                reply.setText(
-                    data.get("detail", tr("Failed to parse error from server"))
-                )
-            except Exception:
-                reply.setText(tr("Failed to parse error from server"))
-            reply.exec()
-
-        return None
+            if response.status != 200:
+                rest_response = RESTResponse(response)
+                rest_response.read()
+                # raises ApiException
+                self.api_client.response_deserialize(rest_response, {'200': 'bytearray'})
+            written = 0
+            decompressor = zlib.decompressobj(wbits=31)
+            member_open = False
+            for chunk in response.stream(DOWNLOAD_CHUNK_SIZE):
+                while chunk:
+                    data = decompressor.decompress(chunk, DOWNLOAD_CHUNK_SIZE)
+                    file.write(data)
+                    written += len(data)
+                    # logs may consist of several concatenated gzip members
+                    if decompressor.eof:
+                        chunk = decompressor.unused_data
+                        decompressor = zlib.decompressobj(wbits=31)
+                        member_open = False
+                    else:
+                        chunk = decompressor.unconsumed_tail
+                        member_open = True
+            if member_open:
+                data = decompressor.flush()
+                file.write(data)
+                written += len(data)
+                if not decompressor.eof:
+                    raise EOFError('Download ended before the end of the compressed log.')
+            return written
+        finally:
+            response.release_conn()
 
     def ladders(self, **kwargs):
         """Fetch the list of ladders"""
-        try:
-            return self.api_ladder.ladder_list(**kwargs)
-        except ServiceException as e:
-            reply = QMessageBox()
-            reply.setWindowTitle("Open Source Combatlog Reader")
-            try:
-                data = json.loads(e.body)
-                reply.setText(
-                    data.get("detail", tr("Failed to parse error from server"))
-                )
-            except Exception:
-                reply.setText(tr("Failed to parse error from server"))
-            reply.exec()
-
-        return None
+        return self.get('ladders', kwargs)[0]
 
     def ladder_entries(self, id, page=1):
         """Fetch the nth page of ladder entries"""
-        try:
-            return self.api_ladder_entries.ladder_entries_list(
-                ladder=str(id),
-                page=page,
-                ordering="-data__DPS",
-                page_size=50,
-            )
-        except ServiceException as e:
-            reply = QMessageBox()
-            reply.setWindowTitle("Open Source Combatlog Reader")
-            try:
-                data = json.loads(e.body)
-                reply.setText(
-                    data.get("detail", tr("Failed to parse error from server"))
-                )
-            except Exception:
-                reply.setText(tr("Failed to parse error from server"))
-            reply.exec()
-
-        return None
+        return self.get('ladder_entries', ladder_page_params(id, page))[0]
 
     def variants(self, **kwargs):
         """Return a list of Variants"""
+        return self.get('variants', kwargs)[0]
 
+    def cached(self, endpoint: str, params: dict) -> tuple[object, bool] | None:
+        """
+        Returns cached response of request and whether it is still fresh, or None if the request
+        is not cached. Does not touch the network.
+        """
+        entry = self.cache.get(endpoint, params)
+        if entry is None:
+            return None
         try:
-            return self.api_variant.variant_list(**kwargs)
-        except ServiceException as e:
-            reply = QMessageBox()
-            reply.setWindowTitle("Open Source Combatlog Reader")
-            try:
-                data = json.loads(e.body)
-                reply.setText(
-                    data.get("detail", tr("Failed to parse error from server"))
-                )
-            except Exception:
-                reply.setText(tr("Failed to parse error from server"))
-            reply.exec()
-
-        return None
+            data = self.api_client.deserialize(
+                    entry.body.decode(), LEAGUE_ENDPOINTS[endpoint][2], 'application/json')
+        except Exception:
+            return None
+        return data, entry.fresh(LEAGUE_CACHE_TTL[endpoint])
+
+    def get(self, endpoint: str, params: dict) -> tuple[object, bool]:
+        """
+        Requests `endpoint`, revalidating the cached response if there is one, and updates the
+        cache.
+
+        :return: response data and whether it differs from the previously cached response
+        """
+        api_name, method_name, response_type = LEAGUE_ENDPOINTS[endpoint]
+        method = getattr(getattr(self, api_name), f'{method_name}_without_preload_content')
+        entry = self.cache.get(endpoint, params)
+        headers = entry.validators if entry is not None else None
+        response = method(**params, _headers=headers, _request_timeout=self.timeout)
+        if response.status == 304 and entry is not None:
+            self.cache.touch(endpoint, params, entry)
+            data = self.api_client.deserialize(
+                    entry.body.decode(), response_type, 'application/json')
+            return data, False
+        rest_response = RESTResponse(response)
+        rest_response.read()
+        # raises ApiException for error responses
+        data = self.api_client.response_deserialize(rest_response, {'200': response_type}).data
+        self.cache.put(endpoint, params, CacheEntry(
+                rest_response.data, time.time(), response.headers.get('ETag', ''),
+                response.headers.get('Last-Modified', '')))
+        return data, entry is None or entry.body != rest_response.data
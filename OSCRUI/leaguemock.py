@@ -0,0 +1,448 @@
+import argparse
+from datetime import datetime, timedelta, timezone
+import gzip
+import hashlib
+from http.server import BaseHTTPRequestHandler, ThreadingHTTPServer
+import json
+import math
+import random
+import re
+import sys
+import tempfile
+import threading
+import time
+from urllib.parse import parse_qs, urlparse
+import zlib
+
+MOCK_MAPS = (
+        'Infected Space', 'Hive Space', 'Azure Nebula Rescue', 'Borg Disconnected', 'Counterpoint',
+        'Gateway to Grethor', 'Operation Wolf', 'Bug Hunt', 'Khitomer Space', 'Storming the Spire')
+MOCK_DIFFICULTIES = ('Normal', 'Advanced', 'Elite')
+MOCK_VARIANTS = (
+        ('Default', '2024-01-01T00:00:00Z', '2099-01-01T00:00:00Z'),
+        ('Season 1', '2024-01-01T00:00:00Z', '2024-07-01T00:00:00Z'))
+MOCK_START_TIME = datetime(2024, 12, 22, 10, tzinfo=timezone.utc)
+# longer logs are split into several combats, OSCR fails to analyze combats lasting hours
+MOCK_COMBAT_DURATION = timedelta(minutes=10)
+MOCK_COMBAT_PAUSE = timedelta(minutes=5)
+COMBATLOG_DOWNLOAD_PATH = re.compile(r'^/combatlog/(\d+)/download/$')
+TRANSFER_CHUNK_SIZE = 64 * 1024
+
+
+def mock_log_line(
+        line_time: datetime, owner: tuple[str, str], target: tuple[str, str], event_id: str,
+        damage: float) -> bytes:
+    """
+    Returns a single damage line of a combat log.
+
+    Parameters:
+    - :param line_time: time of the attack
+    - :param owner: name and id of the attacker
+    - :param target: name and id of the target
+    - :param event_id: id of the ability
+    - :param damage: damage dealt; the base damage is 20 percent higher
+    """
+    stamp = line_time.strftime('%y:%m:%d:%H:%M:%S.') + str(line_time.microsecond // 100000)
+    return (
+            f'{stamp}::{owner[0]},{owner[1]},,*,{target[0]},{target[1]},Phaser,{event_id},'
+            f'Phaser,,{damage:.1f},{damage * 1.2:.1f}\n').encode()
+
+
+def mock_combatlog(log_id: int, size: int) -> bytes:
+    """
+    Returns synthetic combat log of about `size` bytes. The same id always yields the same log.
+    Combats last at most `MOCK_COMBAT_DURATION`, so small logs consist of a single combat. Every
+    combat ends with a player being hit a second after the last player attack, as OSCR fails to
+    analyze player attacks at the very end of some combats.
+
+    Parameters:
+    - :param log_id: combatlog id
+    - :param size: approximate size of the log in bytes
+    """
+    rng = random.Random(log_id)
+    players = [
+            (f'Player{i}', f'P[{i + 1}@{log_id % 100000} Player{i}@handle{i}]') for i in range(5)]
+    lines = list()
+    written = 0
+    line_time = combat_start = MOCK_START_TIME
+    while True:
+        target = rng.randrange(30, 40)
+        mob = ('Mob', f'C[{target} Mob]')
+        if written >= size or line_time - combat_start > MOCK_COMBAT_DURATION:
+            line_time += timedelta(seconds=1)
+            lines.append(mock_log_line(
+                    line_time, mob, players[rng.randrange(len(players))], 'Pha0',
+                    rng.uniform(50, 500)))
+            if written >= size:
+                break
+            line_time += MOCK_COMBAT_PAUSE
+            combat_start = line_time
+        line = mock_log_line(
+                line_time, players[rng.randrange(len(players))], mob, f'Pha{target % 3}',
+                rng.uniform(50, 5000))
+        lines.append(line)
+        written += len(line)
+        line_time += timedelta(milliseconds=10 * rng.randrange(1, 6))
+    return b''.join(lines)
+
+
+class MockLeagueServer(ThreadingHTTPServer):
+    """
+    Local stand-in for the OSCR league server. Serves synthetic variants, ladders, ladder entries
+    and combat logs and accepts uploads, with configurable latency, bandwidth and error injection.
+    Counts requests and transferred bytes per endpoint.
+    """
+    daemon_threads = True
+
+    def __init__(
+            self, address: tuple[str, int], latency: float = 0, bandwidth: float = 0,
+            error_rate: float = 0, error_status: int = 503, ladder_size: int = 1000,
+            log_size: int = 256 * 1024, seed: int = 0):
+        """
+        Parameters:
+        - :param address: host and port to listen on; port 0 selects a free port
+        - :param latency: delay before every response in seconds
+        - :param bandwidth: limit of the transfer rate of every connection in bytes per second;
+        0 disables the limit
+        - :param error_rate: share of requests answered with `error_status` instead
+        - :param error_status: HTTP status of injected errors
+        - :param ladder_size: number of entries of every ladder
+        - :param log_size: approximate size of the downloaded combat log in bytes
+        - :param seed: seed of the error injection
+        """
+        super().__init__(address, MockLeagueHandler)
+        self.latency = latency
+        self.bandwidth = bandwidth
+        self.error_rate = error_rate
+        self.error_status = error_status
+        self.ladder_size = ladder_size
+        self.log_size = log_size
+        self.ladders = [
+                {
+                    'id': i + 1, 'name': name, 'difficulty': difficulty, 'metric': 'DPS',
+                    'is_solo': False, 'is_space': 'Space' in name, 'variant': variant,
+                    'variant_name': variant}
+                for i, (variant, name, difficulty) in enumerate(
+                    (variant[0], name, difficulty) for variant in MOCK_VARIANTS
+                    for name in MOCK_MAPS for difficulty in MOCK_DIFFICULTIES)]
+        self.stats: dict[str, dict[str, int]] = dict()
+        self._random = random.Random(seed)
+        self._lock = threading.Lock()
+        self._log: bytes | None = None
+        self._next_upload_id = 1
+
+    @property
+    def url(self) -> str:
+        host, port = self.server_address[:2]
+        return f'http://{host}:{port}'
+
+    def inject_error(self) -> bool:
+        with self._lock:
+            return self.error_rate > 0 and self._random.random() < self.error_rate
+
+    def count(self, endpoint: str, received: int = 0, sent: int = 0):
+        with self._lock:
+            stats = self.stats.setdefault(endpoint, {'requests': 0, 'received': 0, 'sent': 0})
+            stats['requests'] += 1
+            stats['received'] += received
+            stats['sent'] += sent
+
+    def compressed_log(self) -> bytes:
+        """
+        Returns gzip compressed synthetic log served for every combatlog id. It is created on the
+        first request, so that later downloads only measure the transfer.
+        """
+        with self._lock:
+            if self._log is None:
+                self._log = gzip.compress(mock_combatlog(0, self.log_size), mtime=0)
+            return self._log
+
+    def next_upload_id(self) -> int:
+        with self._lock:
+            upload_id = self._next_upload_id
+            self._next_upload_id += 1
+            return upload_id
+
+    def ladder_entries(self, ladder_id: int, page: int, page_size: int) -> tuple[int, list]:
+        """
+        Returns total number of entries of the ladder and the entries of `page`, ordered by DPS.
+        """
+        first_rank = (page - 1) * page_size + 1
+        last_rank = min(first_rank + page_size, self.ladder_size + 1)
+        entries = list()
+        for rank in range(first_rank, last_rank):
+            dps = 1_000_000 / (1 + rank / 100)
+            combat_time = 60 + rank % 240
+            entries.append({
+                'id': ladder_id * 1_000_000 + rank, 'rank': rank, 'ladder_rank': rank,
+                'date': (MOCK_START_TIME - timedelta(minutes=rank)).strftime(
+                    '%Y-%m-%dT%H:%M:%S.%fZ'),
+                'player': f'Player{rank}@handle{rank}', 'ladder': ladder_id,
+                'combatlog': ladder_id * 1_000_000 + rank,
+                'data': {
+                    'name': f'Player{rank}', 'handle': f'@handle{rank}', 'DPS': dps,
+                    'total_damage': dps * combat_time, 'deaths': rank % 4,
+                    'combat_time': combat_time, 'max_one_hit': dps * 3, 'debuff': rank % 50 / 100,
+                    'build': ('Beam', 'Torpedo', 'Exotic', 'Cannon')[rank % 4]
+                }
+            })
+        return self.ladder_size, entries
+
+
+class MockLeagueHandler(BaseHTTPRequestHandler):
+    """
+    Handles requests to the mock league server.
+    """
+    protocol_version = 'HTTP/1.1'
+    server: MockLeagueServer
+
+    def log_message(self, format, *args):
+        pass
+
+    def do_GET(self):
+        url = urlparse(self.path)
+        query = {key: values[-1] for key, values in parse_qs(url.query).items()}
+        if self.delay_or_fail():
+            return
+        if url.path == '/variant/':
+            self.send_page('variants', [
+                    {'name': name, 'start_date': start, 'end_date': end}
+                    for name, start, end in MOCK_VARIANTS], query)
+        elif url.path == '/ladder/':
+            ladders = [
+                    ladder for ladder in self.server.ladders
+                    if 'variant' not in query or ladder['variant'] == query['variant']]
+            self.send_page('ladders', ladders, query)
+        elif url.path == '/ladder-entries/':
+            try:
+                ladder_id = int(query['ladder'])
+                page = int(query.get('page', 1))
+                page_size = int(query.get('page_size', 50))
+            except (KeyError, ValueError):
+                self.send_json('ladder_entries', 400, {'detail': 'Invalid query.'})
+                return
+            count, entries = self.server.ladder_entries(ladder_id, page, page_size)
+            if page > 1 and len(entries) == 0:
+                self.send_json('ladder_entries', 404, {'detail': 'Invalid page.'})
+                return
+            self.send_json('ladder_entries', 200, {
+                    'count': count, 'next': None, 'previous': None, 'results': entries})
+        elif COMBATLOG_DOWNLOAD_PATH.match(url.path):
+            data = self.server.compressed_log()
+            self.send_response(200)
+            self.send_header('Content-Type', 'application/octet-stream')
+            self.send_header('Content-Length', str(len(data)))
+            self.end_headers()
+            self.write_throttled(data)
+            self.server.count('download', sent=len(data))
+        else:
+            self.send_json('unknown', 404, {'detail': 'Not found.'})
+
+    def do_POST(self):
+        if urlparse(self.path).path != '/combatlog/uploadv2/':
+            self.skip_body()
+            self.send_json('unknown', 404, {'detail': 'Not found.'})
+            return
+        with tempfile.TemporaryFile() as body:
+            received = self.read_throttled(body)
+            if self.delay_or_fail():
+                return
+            body.seek(0)
+            try:
+                log_size = self.decompressed_upload_size(body)
+            except (ValueError, zlib.error, EOFError):
+                self.send_json('upload', 400, {'detail': 'Invalid combat log.'}, received)
+                return
+        upload_id = self.server.next_upload_id()
+        self.send_json('upload', 200, {
+                'detail': 'Combat log uploaded.', 'combatlog': upload_id, 'results': [
+                    {'name': 'Size', 'updated': True, 'detail': 'Bytes received', 'value': log_size}
+                ]}, received)
+
+    def delay_or_fail(self) -> bool:
+        """
+        Waits for the configured latency and answers with an injected error if one is due.
+
+        :return: True when an error was sent
+        """
+        if self.server.latency > 0:
+            time.sleep(self.server.latency)
+        if self.server.inject_error():
+            self.send_json('error', self.server.error_status, {'detail': 'Injected error.'})
+            return True
+        return False
+
+    def send_page(self, endpoint: str, results: list, query: dict):
+        page = int(query.get('page', 1))
+        page_size = int(query.get('page_size', 100))
+        page_results = results[(page - 1) * page_size:page * page_size]
+        self.send_json(endpoint, 200, {
+                'count': len(results), 'next': None, 'previous': None, 'results': page_results})
+
+    def send_json(self, endpoint: str, status: int, body: dict, received: int = 0):
+        """
+        Sends JSON response. Successful responses carry an ETag and are answered with
+        304 Not Modified when the client already holds them.
+        """
+        data = json.dumps(body).encode()
+        etag = f'"{hashlib.sha1(data).hexdigest()}"'
+        if status == 200 and self.headers.get('If-None-Match') == etag:
+            self.send_response(304)
+            self.send_header('ETag', etag)
+            self.send_header('Content-Length', '0')
+            self.end_headers()
+            self.server.count(endpoint, received)
+            return
+        self.send_response(status)
+        self.send_header('Content-Type', 'application/json')
+        self.send_header('Content-Length', str(len(data)))
+        if status == 200:
+            self.send_header('ETag', etag)
+        elif status in (429, 503):
+            self.send_header('Retry-After', '0')
+        self.end_headers()
+        self.write_throttled(data)
+        self.server.count(endpoint, received, len(data))
+
+    def write_throttled(self, data: bytes):
+        for start in range(0, len(data), TRANSFER_CHUNK_SIZE):
+            chunk = data[start:start + TRANSFER_CHUNK_SIZE]
+            self.wfile.write(chunk)
+            self.throttle(len(chunk))
+
+    def read_throttled(self, target) -> int:
+        remaining = int(self.headers.get('Content-Length', 0))
+        received = 0
+        while remaining > 0:
+            chunk = self.rfile.read(min(remaining, TRANSFER_CHUNK_SIZE))
+            if not chunk:
+                break
+            target.write(chunk)
+            remaining -= len(chunk)
+            received += len(chunk)
+            self.throttle(len(chunk))
+        return received
+
+    def skip_body(self):
+        remaining = int(self.headers.get('Content-Length', 0))
+        while remaining > 0:
+            chunk = self.rfile.read(min(remaining, TRANSFER_CHUNK_SIZE))
+            if not chunk:
+                break
+            remaining -= len(chunk)
+
+    def throttle(self, size: int):
+        if self.server.bandwidth > 0:
+            time.sleep(size / self.server.bandwidth)
+
+    def decompressed_upload_size(self, body) -> int:
+        """
+        Returns size of the gzip compressed file in the multipart request body, which may consist
+        of several gzip members.
+        """
+        match = re.search(r'boundary=([^;]+)', self.headers.get('Content-Type', ''))
+        if match is None:
+            raise ValueError('missing boundary')
+        boundary = match.group(1).strip('"').encode()
+        head = body.read(4096)
+        header_end = head.find(b'\r\n\r\n')
+        if not head.startswith(b'--' + boundary) or header_end < 0:
+            raise ValueError('invalid multipart body')
+        total = body.seek(0, 2)
+        tail_size = len(b'\r\n--' + boundary + b'--\r\n')
+        body.seek(header_end + 4)
+        remaining = total - header_end - 4 - tail_size
+        decompressor = zlib.decompressobj(wbits=31)
+        size = 0
+        while remaining > 0:
+            chunk = body.read(min(remaining, TRANSFER_CHUNK_SIZE))
+            remaining -= len(chunk)
+            while chunk:
+                size += len(decompressor.decompress(chunk))
+                if decompressor.eof:
+                    chunk = decompressor.unused_data
+                    decompressor = zlib.decompressobj(wbits=31)
+                else:
+                    chunk = b''
+        if size == 0:
+            raise EOFError('empty upload')
+        return size
+
+
+def parse_arguments(argv: list[str]) -> argparse.Namespace:
+    """
+    Parses the command line arguments of the mock league server.
+    """
+    parser = argparse.ArgumentParser(
+            prog='main.py --league-mock',
+            description='Runs a local stand-in for the OSCR league server.')
+    parser.add_argument('--league-mock', action='store_true', help='run the mock league server')
+    parser.add_argument(
+            '--http', default='8000', metavar='[HOST:]PORT',
+            help='serve on HOST:PORT; HOST defaults to 127.0.0.1 (default: 8000)')
+    add_mock_arguments(parser)
+    return parser.parse_args(argv)
+
+
+def add_mock_arguments(parser: argparse.ArgumentParser):
+    """
+    Adds the options configuring `MockLeagueServer` to `parser`.
+    """
+    parser.add_argument(
+            '--latency', type=float, default=0,
+            help='delay before every response in seconds (default: 0)')
+    parser.add_argument(
+            '--bandwidth', type=float, default=0,
+            help='transfer rate limit per connection in bytes per second (default: unlimited)')
+    parser.add_argument(
+            '--error-rate', type=float, default=0,
+            help='share of requests answered with an error (default: 0)')
+    parser.add_argument(
+            '--error-status', type=int, default=503,
+            help='HTTP status of injected errors (default: 503)')
+    parser.add_argument(
+            '--ladder-size', type=int, default=1000,
+            help='number of entries of every ladder (default: 1000)')
+    parser.add_argument(
+            '--log-size', type=int, default=256 * 1024,
+            help='approximate size of downloaded combat logs in bytes (default: 262144)')
+    parser.add_argument(
+            '--seed', type=int, default=0, help='seed of the error injection (default: 0)')
+
+
+def create_mock_server(args: argparse.Namespace, host: str, port: int) -> MockLeagueServer:
+    """
+    Returns mock league server configured by the parsed command line arguments.
+    """
+    return MockLeagueServer(
+            (host, port), latency=args.latency, bandwidth=args.bandwidth,
+            error_rate=args.error_rate, error_status=args.error_status,
+            ladder_size=max(args.ladder_size, 0), log_size=max(args.log_size, 1), seed=args.seed)
+
+
+def run_league_mock(argv: list[str]) -> int:
+    """
+    Runs the mock league server until interrupted. Returns the exit code.
+
+    Parameters:
+    - :param argv: command line arguments
+    """
+    args = parse_arguments(argv)
+    host, _, port = args.http.rpartition(':')
+    try:
+        server = create_mock_server(args, host if host else '127.0.0.1', int(port))
+    except (OSError, ValueError) as e:
+        print(f'Could not start server: {e}', file=sys.stderr)
+        return 1
+    ladder_pages = math.ceil(server.ladder_size / 50)
+    print(
+            f'Mock league server listening on {server.url} ({len(server.ladders)} ladders with '
+            f'{server.ladder_size} entries / {ladder_pages} pages each)\n'
+            f'Start OSCR with OSCR_SERVER_BACKEND={server.url} to use it.', flush=True)
+    try:
+        server.serve_forever()
+    except KeyboardInterrupt:
+        pass
+    finally:
+        server.server_close()
+    return 0
@@ -0,0 +1,187 @@
+from collections.abc import Callable, Hashable
+
+from PySide6.QtCore import QObject, QRunnable, QThreadPool, Qt, Signal
+
+
+class RequestHandle():
+    """
+    Handle of a single caller on a league request. Cancelling it drops the result for this caller.
+    """
+    def __init__(
+            self, on_result: Callable, on_error: Callable | None,
+            on_progress: Callable | None = None):
+        self.on_result = on_result
+        self.on_error = on_error
+        self.on_progress = on_progress
+        self.cancelled = False
+        self.finished = False
+
+    @property
+    def pending(self) -> bool:
+        return not (self.cancelled or self.finished)
+
+
+class RequestRunnable(QRunnable):
+    """
+    Executes the request function in a thread of the pool and reports back to the manager.
+    """
+    def __init__(self, manager: 'LeagueRequests', key: Hashable, func: Callable):
+        super().__init__()
+        self._manager = manager
+        self._key = key
+        self._func = func
+
+    def run(self):
+        try:
+            result, error = self._func(), None
+        except Exception as e:
+            result, error = None, e
+        try:
+            self._manager.request_finished.emit(self._key, result, error)
+        except RuntimeError:
+            # the manager has been deleted as the app closed while the request was running
+            pass
+
+
+class LeagueRequests(QObject):
+    """
+    Runs requests to the league server in a thread pool and delivers their results on the GUI
+    thread.
+
+    - Identical requests (same key) issued while one is in flight are coalesced into a single call.
+    - A request may belong to a group; issuing a new exclusive request in that group cancels the
+      previous ones. Cancelled callers never receive a result, so stale data cannot reach the
+      widgets.
+    - Requests that have not started yet are removed from the pool once no caller waits for them;
+      requests that already started are left to finish and their result is discarded.
+    - Long running requests may report progress through `report_progress`, which is safe to call
+      from the worker thread.
+    - Requests waiting for a free thread start in order of priority. A low priority request that
+      has not started yet is moved up when an identical request with higher priority is issued.
+    """
+    request_finished = Signal(object, object, object)
+    request_progress = Signal(object, object)
+
+    def __init__(self, max_threads: int = 4):
+        """
+        Parameters:
+        - :param max_threads: maximum number of concurrently running requests
+        """
+        super().__init__()
+        self._pool = QThreadPool(self)
+        self._pool.setMaxThreadCount(max_threads)
+        self._handles: dict[Hashable, list[RequestHandle]] = dict()
+        self._runnables: dict[Hashable, RequestRunnable] = dict()
+        self._priorities: dict[Hashable, int] = dict()
+        self._groups: dict[str, list[tuple[Hashable, RequestHandle]]] = dict()
+        self.request_finished.connect(self._deliver, Qt.ConnectionType.QueuedConnection)
+        self.request_progress.connect(
+                self._deliver_progress, Qt.ConnectionType.QueuedConnection)
+
+    def request(
+            self, key: Hashable, func: Callable, on_result: Callable,
+            on_error: Callable | None = None, group: str | None = None,
+            exclusive: bool = True, on_progress: Callable | None = None,
+            priority: int = 0) -> RequestHandle:
+        """
+        Executes `func` in the background and calls `on_result` with its return value, or
+        `on_error` with the raised exception, on the GUI thread.
+
+        Parameters:
+        - :param key: identifies the request; requests with equal keys are coalesced
+        - :param func: function performing the request, called without arguments
+        - :param on_result: called with the result
+        - :param on_error: called with the exception raised by `func`
+        - :param group: group the request belongs to
+        - :param exclusive: cancels the pending requests of `group` before issuing the new one
+        - :param on_progress: called with every value `func` reports through `report_progress`
+        - :param priority: requests with higher priority start first when all threads are busy
+
+        :return: handle that can be used to cancel the request
+        """
+        if group is not None and exclusive:
+            self.cancel_group(group)
+        handle = RequestHandle(on_result, on_error, on_progress)
+        if key in self._handles:
+            self._handles[key].append(handle)
+            runnable = self._runnables[key]
+            if priority > self._priorities[key] and self._pool.tryTake(runnable):
+                self._priorities[key] = priority
+                self._pool.start(runnable, priority)
+        else:
+            self._handles[key] = [handle]
+            runnable = RequestRunnable(self, key, func)
+            runnable.setAutoDelete(False)
+            self._runnables[key] = runnable
+            self._priorities[key] = priority
+            self._pool.start(runnable, priority)
+        if group is not None:
+            members = self._groups.setdefault(group, list())
+            members[:] = [member for member in members if member[1].pending]
+            members.append((key, handle))
+        return handle
+
+    def report_progress(self, key: Hashable, value):
+        """
+        Passes progress `value` of the request with `key` to its callers on the GUI thread.
+        """
+        self.request_progress.emit(key, value)
+
+    def group_pending(self, group: str) -> bool:
+        """
+        Returns True when a request of `group` has neither finished nor been cancelled.
+        """
+        return any(handle.pending for _, handle in self._groups.get(group, tuple()))
+
+    def cancel_group(self, group: str):
+        """
+        Cancels the pending requests of `group`.
+        """
+        for key, handle in self._groups.pop(group, tuple()):
+            self.cancel(key, handle)
+
+    def cancel(self, key: Hashable, handle: RequestHandle):
+        """
+        Cancels the request of a single caller.
+        """
+        handle.cancelled = True
+        handles = self._handles.get(key)
+        if handles is None:
+            return
+        if handle in handles:
+            handles.remove(handle)
+        if len(handles) == 0 and self._pool.tryTake(self._runnables[key]):
+            del self._handles[key]
+            del self._runnables[key]
+            del self._priorities[key]
+
+    def cancel_all(self):
+        """
+        Cancels all requests and discards the requests that have not started yet.
+        """
+        for handles in self._handles.values():
+            for handle in handles:
+                handle.cancelled = True
+        self._pool.clear()
+        self._handles.clear()
+        self._runnables.clear()
+        self._priorities.clear()
+        self._groups.clear()
+
+    def _deliver(self, key: Hashable, result, error: Exception | None):
+        handles = self._handles.pop(key, list())
+        self._runnables.pop(key, None)
+        self._priorities.pop(key, None)
+        for handle in handles:
+            if handle.cancelled:
+                continue
+            handle.finished = True
+            if error is None:
+                handle.on_result(result)
+            elif handle.on_error is not None:
+                handle.on_error(error)
+
+    def _deliver_progress(self, key: Hashable, value):
+        for handle in self._handles.get(key, tuple()):
+            if handle.pending and handle.on_progress is not None:
+                handle.on_progress(value)
@@ -0,0 +1,322 @@
+from collections.abc import Callable
+import sqlite3
+import threading
+import time
+
+# database columns of the ladder table columns, see `LEAGUE_TABLE_HEADER`
+ENTRY_COLUMNS = (
+        'name', 'handle', 'dps', 'total_damage', 'deaths', 'combat_time', 'date', 'max_one_hit',
+        'debuff', 'build')
+
+SNAPSHOT_SCHEMA = '''
+CREATE TABLE IF NOT EXISTS snapshot (
+    id INTEGER PRIMARY KEY,
+    ladder INTEGER NOT NULL,
+    name TEXT NOT NULL,
+    difficulty TEXT,
+    variant TEXT,
+    is_solo INTEGER NOT NULL DEFAULT 0,
+    created REAL NOT NULL,
+    entry_count INTEGER NOT NULL DEFAULT 0,
+    complete INTEGER NOT NULL DEFAULT 0
+);
+CREATE TABLE IF NOT EXISTS entry (
+    snapshot INTEGER NOT NULL,
+    position INTEGER NOT NULL,
+    rank INTEGER,
+    combatlog INTEGER,
+    name TEXT,
+    handle TEXT,
+    dps REAL,
+    total_damage REAL,
+    deaths INTEGER,
+    combat_time REAL,
+    date TEXT,
+    max_one_hit REAL,
+    debuff REAL,
+    build TEXT,
+    search_key TEXT,
+    PRIMARY KEY (snapshot, position)
+) WITHOUT ROWID;
+CREATE INDEX IF NOT EXISTS entry_dps ON entry (snapshot, dps);
+CREATE INDEX IF NOT EXISTS entry_handle ON entry (snapshot, handle);
+CREATE INDEX IF NOT EXISTS entry_date ON entry (snapshot, date);
+'''
+
+
+class LadderSnapshot():
+    """
+    Stored copy of a ladder taken at a certain point in time.
+    """
+    def __init__(
+            self, id: int, ladder: int, name: str, difficulty: str | None, variant: str | None,
+            is_solo: int, created: float, entry_count: int, complete: int):
+        self.id = id
+        self.ladder = ladder
+        self.name = name
+        self.difficulty = difficulty
+        self.variant = variant
+        self.is_solo = bool(is_solo)
+        self.created = created
+        self.entry_count = entry_count
+        self.complete = bool(complete)
+
+    @property
+    def title(self) -> str:
+        """
+        Returns name of the ladder as shown in the ladder selector.
+        """
+        solo = ' [Solo]' if self.is_solo else ''
+        return f'{self.name}{solo} ({self.difficulty})'
+
+
+class SQLiteStore():
+    """
+    SQLite database used from several threads. Every thread uses its own connection, so the
+    database can be written in the background while the GUI thread reads it.
+    """
+    schema = ''
+
+    def __init__(self, path: str):
+        """
+        Parameters:
+        - :param path: path to the database file; created when it is first used
+        """
+        self._path = path
+        self._local = threading.local()
+        self._schema_lock = threading.Lock()
+        self._schema_ready = False
+
+    @property
+    def path(self) -> str:
+        return self._path
+
+    @property
+    def connection(self) -> sqlite3.Connection:
+        """
+        Returns the connection of the calling thread.
+        """
+        connection = getattr(self._local, 'connection', None)
+        if connection is None:
+            connection = sqlite3.connect(self._path, timeout=10)
+            connection.execute('PRAGMA journal_mode=WAL')
+            with self._schema_lock:
+                if not self._schema_ready:
+                    connection.executescript(self.schema)
+                    self.prepare(connection)
+                    connection.commit()
+                    self._schema_ready = True
+            self._local.connection = connection
+        return connection
+
+    def prepare(self, connection: sqlite3.Connection):
+        """
+        Called with the first connection after the schema has been created.
+        """
+        pass
+
+    @staticmethod
+    def search_key(name: str, handle: str) -> str:
+        """
+        Returns the string name filters are matched against, see `LeagueTableModel.search_key`.
+        """
+        return (name + handle).casefold()
+
+    @staticmethod
+    def filter_clause(name_filter: str) -> tuple[str, tuple]:
+        if name_filter:
+            return ' AND instr(search_key, ?) > 0', (name_filter.casefold(),)
+        return '', ()
+
+
+class LadderSnapshotStore(SQLiteStore):
+    """
+    SQLite database holding snapshots of ladders.
+    """
+    schema = SNAPSHOT_SCHEMA
+
+    def prepare(self, connection: sqlite3.Connection):
+        # snapshots interrupted by closing the app
+        connection.execute(
+                'DELETE FROM entry WHERE snapshot IN '
+                '(SELECT id FROM snapshot WHERE complete = 0)')
+        connection.execute('DELETE FROM snapshot WHERE complete = 0')
+
+    def create_snapshot(
+            self, ladder: int, name: str, difficulty: str | None, variant: str | None,
+            is_solo: bool) -> int:
+        """
+        Creates an empty, incomplete snapshot and returns its id.
+        """
+        with self.connection as connection:
+            cursor = connection.execute(
+                    'INSERT INTO snapshot (ladder, name, difficulty, variant, is_solo, created) '
+                    'VALUES (?, ?, ?, ?, ?, ?)',
+                    (ladder, name, difficulty, variant, int(bool(is_solo)), time.time()))
+        return cursor.lastrowid
+
+    def add_entries(
+            self, snapshot: int, position: int, index: list, rows: list, combatlog_ids: list):
+        """
+        Stores ladder entries in a snapshot.
+
+        Parameters:
+        - :param snapshot: id of the snapshot
+        - :param position: position of the first entry in the ladder, starting at 0
+        - :param index: ranks of the entries
+        - :param rows: table rows, see `ladder_page_rows`
+        - :param combatlog_ids: combatlog ids of the entries
+        """
+        with self.connection as connection:
+            connection.executemany(
+                    f'INSERT OR REPLACE INTO entry (snapshot, position, rank, combatlog, '
+                    f'{", ".join(ENTRY_COLUMNS)}, search_key) '
+                    f'VALUES ({", ".join("?" * (len(ENTRY_COLUMNS) + 5))})',
+                    (
+                        (snapshot, position + offset, rank, combatlog_id, *row,
+                            self.search_key(row[0], row[1]))
+                        for offset, (rank, row, combatlog_id)
+                        in enumerate(zip(index, rows, combatlog_ids))))
+
+    def finish_snapshot(self, snapshot: int):
+        """
+        Marks a snapshot as complete, making it visible in `snapshots`.
+        """
+        with self.connection as connection:
+            connection.execute(
+                    'UPDATE snapshot SET complete = 1, entry_count = '
+                    '(SELECT COUNT(*) FROM entry WHERE snapshot = ?) WHERE id = ?',
+                    (snapshot, snapshot))
+
+    def delete_snapshot(self, snapshot: int):
+        with self.connection as connection:
+            connection.execute('DELETE FROM entry WHERE snapshot = ?', (snapshot,))
+            connection.execute('DELETE FROM snapshot WHERE id = ?', (snapshot,))
+
+    def snapshots(self, ladder: int | None = None) -> list[LadderSnapshot]:
+        """
+        Returns complete snapshots, newest first.
+
+        Parameters:
+        - :param ladder: only returns snapshots of the ladder with this id if supplied
+        """
+        query = 'SELECT * FROM snapshot WHERE complete = 1'
+        parameters = ()
+        if ladder is not None:
+            query += ' AND ladder = ?'
+            parameters = (ladder,)
+        cursor = self.connection.execute(query + ' ORDER BY created DESC', parameters)
+        return [LadderSnapshot(*row) for row in cursor]
+
+    def snapshot(self, snapshot: int) -> LadderSnapshot | None:
+        row = self.connection.execute('SELECT * FROM snapshot WHERE id = ?', (snapshot,)).fetchone()
+        return None if row is None else LadderSnapshot(*row)
+
+    def count(self, snapshot: int, name_filter: str = '') -> int:
+        """
+        Returns number of entries of a snapshot that match `name_filter`.
+        """
+        clause, parameters = self.filter_clause(name_filter)
+        return self.connection.execute(
+                f'SELECT COUNT(*) FROM entry WHERE snapshot = ?{clause}',
+                (snapshot, *parameters)).fetchone()[0]
+
+    def entries(
+            self, snapshot: int, name_filter: str = '', sort_column: int = -1,
+            descending: bool = True, offset: int = 0,
+            limit: int = -1) -> tuple[list, list, list]:
+        """
+        Returns entries of a snapshot in the format of `ladder_page_rows`.
+
+        Parameters:
+        - :param snapshot: id of the snapshot
+        - :param name_filter: only returns entries with names or handles containing this text
+        - :param sort_column: ladder table column to sort by; -1 keeps the order of the ladder
+        - :param descending: True to sort the highest values first
+        - :param offset: number of entries to skip
+        - :param limit: maximum number of entries returned; -1 returns all
+
+        :return: tuple containing ranks, table rows and combatlog ids
+        """
+        clause, parameters = self.filter_clause(name_filter)
+        if 0 <= sort_column < len(ENTRY_COLUMNS):
+            direction = 'DESC' if descending else 'ASC'
+            order = f'{ENTRY_COLUMNS[sort_column]} {direction}, position'
+        else:
+            order = 'position'
+        cursor = self.connection.execute(
+                f'SELECT rank, combatlog, {", ".join(ENTRY_COLUMNS)} FROM entry '
+                f'WHERE snapshot = ?{clause} ORDER BY {order} LIMIT ? OFFSET ?',
+                (snapshot, *parameters, limit, offset))
+        index = list()
+        rows = list()
+        combatlog_ids = list()
+        for rank, combatlog_id, *row in cursor:
+            index.append(rank)
+            rows.append(tuple(row))
+            combatlog_ids.append(combatlog_id)
+        return index, rows, combatlog_ids
+
+    def diff(self, old: int, new: int) -> list[tuple]:
+        """
+        Compares the best entry of every player in two snapshots.
+
+        Parameters:
+        - :param old: id of the older snapshot
+        - :param new: id of the newer snapshot
+
+        :return: rows containing name, handle, new rank, old rank, new DPS and old DPS; values of
+        players missing in one of the snapshots are None. Sorted by new rank, followed by players
+        that dropped out of the ladder.
+        """
+        cursor = self.connection.execute('''
+            WITH old AS (
+                SELECT name, handle, MIN(rank) AS rank, MAX(dps) AS dps FROM entry
+                WHERE snapshot = :old GROUP BY name, handle),
+            new AS (
+                SELECT name, handle, MIN(rank) AS rank, MAX(dps) AS dps FROM entry
+                WHERE snapshot = :new GROUP BY name, handle)
+            SELECT new.name, new.handle, new.rank, old.rank, new.dps, old.dps, 0 AS dropped
+            FROM new LEFT JOIN old ON old.name = new.name AND old.handle = new.handle
+            UNION ALL
+            SELECT old.name, old.handle, NULL, old.rank, NULL, old.dps, 1 AS dropped
+            FROM old LEFT JOIN new ON old.name = new.name AND old.handle = new.handle
+            WHERE new.handle IS NULL
+            ORDER BY dropped, 3, 4''', {'old': old, 'new': new})
+        return [row[:6] for row in cursor]
+
+
+def snapshot_ladder(
+        fetch_page: Callable[[int], tuple[list, list, list, int]], store: LadderSnapshotStore,
+        ladder, progress: Callable[[int, int], None] | None = None) -> int:
+    """
+    Stores all entries of a ladder in a new snapshot and returns the id of the snapshot. The
+    snapshot is removed again if a page cannot be fetched.
+
+    Parameters:
+    - :param fetch_page: called with the number of a page; returns the page in the format of \
+    `ladder_page_rows`
+    - :param store: database to store the snapshot in
+    - :param ladder: ladder returned by the API
+    - :param progress: called with the number of stored entries and the total number of entries \
+    after each page
+    """
+    snapshot = store.create_snapshot(
+            ladder.id, ladder.name, ladder.difficulty, ladder.variant_name, ladder.is_solo)
+    try:
+        page = 1
+        position = 0
+        while True:
+            index, rows, combatlog_ids, entry_count = fetch_page(page)
+            store.add_entries(snapshot, position, index, rows, combatlog_ids)
+            position += len(rows)
+            if progress is not None:
+                progress(position, entry_count)
+            if len(rows) == 0 or position >= entry_count:
+                break
+            page += 1
+        store.finish_snapshot(snapshot)
+    except BaseException:
+        store.delete_snapshot(snapshot)
+        raise
+    return snapshot
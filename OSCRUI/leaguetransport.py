@@ -0,0 +1,45 @@
+import socket
+
+from OSCR_django_client.api_client import ApiClient
+from OSCR_django_client.configuration import Configuration
+from urllib3.connection import HTTPConnection
+from urllib3.util.retry import Retry
+
+# responses worth retrying: rate limiting and temporary server or gateway failures
+RETRY_STATUS_CODES = (429, 500, 502, 503, 504)
+
+
+def create_retry(retries: int, backoff_factor: float) -> Retry:
+    """
+    Returns retry policy with exponential backoff. Connection failures are retried for every
+    request since the server never saw it; read failures and error responses only for idempotent
+    requests, so uploads are never sent twice.
+
+    Parameters:
+    - :param retries: maximum number of retries per request
+    - :param backoff_factor: delay before the second retry in seconds; doubles with every retry
+    """
+    return Retry(
+            total=retries, connect=retries, read=retries, status=retries,
+            backoff_factor=backoff_factor, status_forcelist=RETRY_STATUS_CODES,
+            allowed_methods=Retry.DEFAULT_ALLOWED_METHODS, respect_retry_after_header=True,
+            raise_on_status=False)
+
+
+def create_api_client(
+        host: str, pool_size: int, retries: int, backoff_factor: float) -> ApiClient:
+    """
+    Returns API client using a pool of keep-alive connections and retrying failed requests.
+
+    Parameters:
+    - :param host: address of the league server
+    - :param pool_size: number of connections kept open to the server; should be at least the
+    number of requests running in parallel
+    - :param retries: maximum number of retries per request
+    - :param backoff_factor: see `create_retry`
+    """
+    configuration = Configuration(host=host, retries=create_retry(retries, backoff_factor))
+    configuration.connection_pool_maxsize = pool_size
+    configuration.socket_options = HTTPConnection.default_socket_options + [
+            (socket.SOL_SOCKET, socket.SO_KEEPALIVE, 1)]
+    return ApiClient(configuration)
@@ -0,0 +1,293 @@
+from collections import deque
+from collections.abc import Callable
+from concurrent.futures import ThreadPoolExecutor
+import gzip
+import hashlib
+import json
+import mmap
+import os
+import threading
+import time
+from typing import BinaryIO
+from uuid import uuid4
+
+UPLOAD_CHUNK_SIZE = 1024 * 1024
+COMPRESSION_WORKERS = min(os.cpu_count() or 1, 8)
+
+
+def compress_log_range(
+        path: str, start: int, end: int, target: BinaryIO,
+        progress: Callable[[int], None] | None = None, workers: int = COMPRESSION_WORKERS) -> int:
+    """
+    Compresses bytes `start` to `end` of the file at `path` into `target`. The range is split into
+    chunks that are compressed in parallel to separate gzip members and written in order, yielding
+    a single valid gzip stream. At most two chunks per worker are held in memory.
+
+    Parameters:
+    - :param path: path to the file
+    - :param start: first byte of the range
+    - :param end: byte after the last byte of the range
+    - :param target: binary file the compressed data is written to
+    - :param progress: called with the number of compressed bytes of the range after each chunk
+    - :param workers: number of chunks compressed in parallel
+
+    :return: number of bytes written to target
+    """
+    if end <= start:
+        return 0
+    pending = deque()
+    written = 0
+    done = 0
+
+    def write_oldest_member():
+        nonlocal written, done
+        written += target.write(pending.popleft().result())
+        done = min(done + UPLOAD_CHUNK_SIZE, end - start)
+        if progress is not None:
+            progress(done)
+
+    with open(path, 'rb') as log_file, \
+            mmap.mmap(log_file.fileno(), 0, access=mmap.ACCESS_READ) as mapped_log, \
+            ThreadPoolExecutor(workers) as executor:
+        for chunk_start in range(start, end, UPLOAD_CHUNK_SIZE):
+            chunk = mapped_log[chunk_start:min(chunk_start + UPLOAD_CHUNK_SIZE, end)]
+            # zlib releases the GIL while compressing, so the threads run in parallel
+            pending.append(executor.submit(gzip.compress, chunk, mtime=0))
+            if len(pending) >= 2 * workers:
+                write_oldest_member()
+        while len(pending) > 0:
+            write_oldest_member()
+    return written
+
+
+class MultipartFileBody():
+    """
+    Re-iterable multipart/form-data request body that streams a single file from disk.
+    """
+    def __init__(
+            self, field_name: str, path: str,
+            progress: Callable[[int, int], None] | None = None):
+        """
+        Parameters:
+        - :param field_name: name of the form field
+        - :param path: path to the file
+        - :param progress: called with the number of bytes sent and the file size after each chunk
+        """
+        self._boundary = uuid4().hex
+        self._path = path
+        self._size = os.path.getsize(path)
+        self._progress = progress
+        self._head = (
+                f'--{self._boundary}\r\n'
+                f'Content-Disposition: form-data; name="{field_name}"; '
+                f'filename="{os.path.basename(path)}"\r\n'
+                'Content-Type: application/octet-stream\r\n\r\n').encode()
+        self._tail = f'\r\n--{self._boundary}--\r\n'.encode()
+
+    @property
+    def content_type(self) -> str:
+        return f'multipart/form-data; boundary={self._boundary}'
+
+    @property
+    def length(self) -> int:
+        return len(self._head) + self._size + len(self._tail)
+
+    def __iter__(self):
+        yield self._head
+        sent = 0
+        with open(self._path, 'rb') as file:
+            while chunk := file.read(UPLOAD_CHUNK_SIZE):
+                yield chunk
+                sent += len(chunk)
+                if self._progress is not None:
+                    self._progress(sent, self._size)
+        yield self._tail
+
+
+def hash_log_range(path: str, start: int, end: int) -> str:
+    """
+    Returns SHA-256 hash of bytes `start` to `end` of the file at `path`.
+    """
+    content_hash = hashlib.sha256()
+    if end <= start:
+        return content_hash.hexdigest()
+    with open(path, 'rb') as log_file, \
+            mmap.mmap(log_file.fileno(), 0, access=mmap.ACCESS_READ) as mapped_log:
+        for chunk_start in range(start, end, UPLOAD_CHUNK_SIZE):
+            content_hash.update(mapped_log[chunk_start:min(chunk_start + UPLOAD_CHUNK_SIZE, end)])
+    return content_hash.hexdigest()
+
+
+def write_json(path: str, data):
+    """
+    Replaces the file at `path` with `data` serialized to JSON. The file is never left half
+    written.
+    """
+    try:
+        with open(path + '.tmp', 'w', encoding='utf-8') as file:
+            json.dump(data, file)
+        os.replace(path + '.tmp', path)
+    except OSError:
+        pass
+
+
+def read_json(path: str, default):
+    """
+    Returns data of the JSON file at `path` or `default` if the file is missing or invalid.
+    """
+    try:
+        with open(path, 'r', encoding='utf-8') as file:
+            return json.load(file)
+    except (OSError, ValueError):
+        return default
+
+
+class UploadLedger():
+    """
+    Persistent record of the combats uploaded from this machine, keyed by the content hash of the
+    combat's bytes. Safe to use from multiple threads.
+    """
+    def __init__(self, path: str):
+        """
+        Parameters:
+        - :param path: path to the ledger file; created on the first upload
+        """
+        self._path = path
+        self._lock = threading.Lock()
+        self._entries: dict[str, dict] = read_json(path, dict())
+
+    def get(self, content_hash: str) -> dict | None:
+        """
+        Returns record of the upload with `content_hash` or None if it was not uploaded.
+        """
+        with self._lock:
+            return self._entries.get(content_hash)
+
+    def add(self, content_hash: str, combatlog: int | None, detail: str):
+        """
+        Records a successful upload.
+
+        Parameters:
+        - :param content_hash: content hash of the uploaded bytes
+        - :param combatlog: combatlog id assigned by the server
+        - :param detail: result message of the server
+        """
+        with self._lock:
+            self._entries[content_hash] = {
+                    'combatlog': combatlog, 'detail': detail, 'uploaded': time.time()}
+            write_json(self._path, self._entries)
+
+
+class UploadJob():
+    """
+    Single combat in the upload queue.
+    """
+    QUEUED = 'queued'
+    RUNNING = 'running'
+    UPLOADED = 'uploaded'
+    SKIPPED = 'skipped'
+    FAILED = 'failed'
+
+    def __init__(
+            self, log_path: str, start: int, end: int, name: str, content_hash: str = '',
+            status: str = QUEUED, detail: str = '', combatlog: int | None = None):
+        """
+        Parameters:
+        - :param log_path: path to the log containing the combat
+        - :param start: first byte of the combat
+        - :param end: byte after the last byte of the combat
+        - :param name: description of the combat shown to the user
+        - :param content_hash: hash of the combat; empty until the job ran for the first time
+        - :param status: one of QUEUED, RUNNING, UPLOADED, SKIPPED, FAILED
+        - :param detail: result message
+        - :param combatlog: combatlog id assigned by the server
+        """
+        self.log_path = log_path
+        self.start = start
+        self.end = end
+        self.name = name
+        self.content_hash = content_hash
+        self.status = status
+        self.detail = detail
+        self.combatlog = combatlog
+        # full server response and progress of the running upload; only kept in memory
+        self.result = None
+        self.progress = 0
+
+    @property
+    def key(self) -> tuple:
+        return ('upload', self.log_path, self.start, self.end)
+
+    @property
+    def finished(self) -> bool:
+        return self.status in (self.UPLOADED, self.SKIPPED, self.FAILED)
+
+    def to_dict(self) -> dict:
+        return {
+            'log_path': self.log_path, 'start': self.start, 'end': self.end, 'name': self.name,
+            'content_hash': self.content_hash, 'status': self.status, 'detail': self.detail,
+            'combatlog': self.combatlog
+        }
+
+
+class UploadQueue():
+    """
+    Persistent queue of combats to upload. Jobs that were running when the app was closed are
+    queued again when the queue is loaded.
+    """
+    def __init__(self, path: str):
+        """
+        Parameters:
+        - :param path: path to the queue file; created when the first job is added
+        """
+        self._path = path
+        self.jobs: list[UploadJob] = list()
+        for job_data in read_json(path, list()):
+            try:
+                job = UploadJob(**job_data)
+            except TypeError:
+                continue
+            if job.status == UploadJob.RUNNING:
+                job.status = UploadJob.QUEUED
+            self.jobs.append(job)
+
+    def add(self, jobs: list[UploadJob]) -> int:
+        """
+        Appends jobs to the queue, ignoring combats that are already waiting or running.
+
+        :return: number of jobs added
+        """
+        waiting = {job.key for job in self.jobs if not job.finished}
+        added = 0
+        for job in jobs:
+            if job.key not in waiting:
+                waiting.add(job.key)
+                self.jobs.append(job)
+                added += 1
+        self.save()
+        return added
+
+    def next_queued(self) -> UploadJob | None:
+        """
+        Returns the oldest job waiting to be started or None if there is none.
+        """
+        for job in self.jobs:
+            if job.status == UploadJob.QUEUED:
+                return job
+        return None
+
+    def count(self, *status: str) -> int:
+        """
+        Returns number of jobs having one of the given states.
+        """
+        return sum(1 for job in self.jobs if job.status in status)
+
+    def clear_finished(self):
+        """
+        Removes finished jobs from the queue.
+        """
+        self.jobs = [job for job in self.jobs if not job.finished]
+        self.save()
+
+    def save(self):
+        write_json(self._path, [job.to_dict() for job in self.jobs])
@@ -0,0 +1,917 @@
+from collections import deque
+from datetime import datetime
+import struct
+from threading import Condition, current_thread, Event, Thread
+import time
+from typing import Callable, Hashable
+
+import numpy as np
+
+from OSCR import LiveParser
+from OSCR.combat import Combat
+from OSCR.constants import BANNED_ABILITIES
+from OSCR.datamodels import LogLine
+from OSCR.utilities import to_datetime
+
+
+class LiveGraphBuffer():
+    """
+    Preallocated ring buffer holding the live graph history of every tracked player.
+
+    Every value is written twice, `window_length` columns apart. This keeps the most recent
+    `window_length` values of each player contiguous in memory, so the data for a curve is always
+    a view into the buffer and never a copy.
+    """
+    def __init__(self, window_length: int, capacity: int = 8):
+        """
+        Parameters:
+        - :param window_length: number of data points shown per curve
+        - :param capacity: number of players the buffer initially has room for; grows on demand
+        """
+        self._length = max(int(window_length), 2)
+        self._data = np.zeros((max(capacity, 1), 2 * self._length), dtype=np.float64)
+        self._time = np.arange(1 - self._length, 1, dtype=np.float64)
+        self._rows: dict[Hashable, int] = dict()
+        self._position = 0
+
+    @property
+    def window_length(self) -> int:
+        return self._length
+
+    @property
+    def time(self) -> np.ndarray:
+        """
+        Time values of the data points; the most recent data point is at 0.
+        """
+        return self._time
+
+    @property
+    def players(self) -> dict[Hashable, int]:
+        """
+        Tracked players and the buffer row they are stored in.
+        """
+        return self._rows
+
+    def row(self, player: Hashable) -> int:
+        """
+        Returns the buffer row of `player`, assigning a new one if the player is not yet tracked.
+        """
+        try:
+            return self._rows[player]
+        except KeyError:
+            row = len(self._rows)
+            if row >= self._data.shape[0]:
+                grown = np.zeros((2 * self._data.shape[0], 2 * self._length), dtype=np.float64)
+                grown[:row] = self._data
+                self._data = grown
+            self._rows[player] = row
+            return row
+
+    def push(self, values: dict[Hashable, float]):
+        """
+        Advances the buffer by one data point. Tracked players missing from `values` are
+        recorded as 0.
+
+        Parameters:
+        - :param values: maps players to their newest value
+        """
+        for player in values:
+            self.row(player)
+        self._position = (self._position + 1) % self._length
+        first = self._position - 1
+        if first < 0:
+            first += self._length
+        column = np.zeros(self._data.shape[0], dtype=np.float64)
+        for player, value in values.items():
+            column[self._rows[player]] = value
+        self._data[:, first] = column
+        self._data[:, first + self._length] = column
+
+    def view(self, row: int) -> np.ndarray:
+        """
+        Returns the history of the player stored in `row`, oldest value first, as view into the
+        buffer.
+        """
+        return self._data[row, self._position:self._position + self._length]
+
+    def active_rows(self) -> np.ndarray:
+        """
+        Returns boolean array telling for every tracked player whether they have non-zero values
+        in the current window.
+        """
+        window = self._data[:len(self._rows), self._position:self._position + self._length]
+        return np.any(window != 0, axis=1)
+
+    def reset(self):
+        """
+        Forgets all tracked players and their history.
+        """
+        self._data[:] = 0
+        self._rows.clear()
+        self._position = 0
+
+
+class SnapshotSlot():
+    """
+    Single-slot mailbox handing the newest LiveParser snapshot from the parser thread to the GUI.
+
+    The parser thread is the only writer and the GUI thread the only reader, and both only swap
+    a single reference. Writing replaces any snapshot that has not been taken yet, so stale
+    intermediate snapshots are dropped instead of queued.
+    """
+    def __init__(self):
+        self._latest: tuple[int, tuple] = (0, ())
+        self._written = 0
+        self._taken = 0
+        self._dropped = 0
+
+    @property
+    def dropped(self) -> int:
+        """
+        Number of snapshots that were replaced before the GUI took them.
+        """
+        return self._dropped
+
+    def put(self, *snapshot):
+        """
+        Stores a new snapshot, replacing the previous one. Called from the parser thread.
+        """
+        self._written += 1
+        self._latest = (self._written, snapshot)
+
+    def take(self) -> tuple | None:
+        """
+        Returns the newest snapshot or None if there was no new snapshot since the last call.
+        Called from the GUI thread.
+        """
+        sequence, snapshot = self._latest
+        if sequence == self._taken:
+            return None
+        self._dropped += sequence - self._taken - 1
+        self._taken = sequence
+        return snapshot
+
+
+class LogTailReader():
+    """
+    Follows a growing logfile and hands its complete lines to consumers, each reading through its
+    own `TailCursor`. The LiveParser is the only consumer at the moment; the main analysis does not
+    read the log through it, but receives the combats the LiveParser isolated, see
+    `get_live_combats`. Additional cursors would share the reads and decoding of the file.
+
+    Lines are kept until every cursor has passed them; once the slowest cursor is `max_lines`
+    lines behind, the reader stops reading ahead until it catches up. (The limit is checked before
+    each read block, so it may be exceeded by a single block.)
+
+    The reader starts following the end of the file when the first cursor subscribes and stops
+    when the last cursor is closed.
+    """
+    def __init__(self, log_path: str, max_lines: int = 50000, poll_interval: float = 0.5):
+        """
+        Parameters:
+        - :param log_path: path to the logfile
+        - :param max_lines: maximum number of lines held for the slowest consumer
+        - :param poll_interval: seconds between checks for new data
+        """
+        self.log_path = log_path
+        self._max_lines = max_lines
+        self._poll_interval = poll_interval
+        self._condition = Condition()
+        self._lines: deque[tuple[str, int, int, float]] = deque()
+        self._first_index = 0
+        self._cursors: list[TailCursor] = list()
+        self._position = 0
+        self._last_line = ''
+        self._active = Event()
+        self._thread = None
+
+    @property
+    def active(self) -> bool:
+        return self._active.is_set()
+
+    def subscribe(self) -> 'TailCursor':
+        """
+        Returns a new cursor positioned at the current end of the log. Starts the reader if it is
+        not running.
+        """
+        with self._condition:
+            if not self._active.is_set():
+                self.start()
+            cursor = TailCursor(
+                    self, self._first_index + len(self._lines), self._position, self._last_line)
+            self._cursors.append(cursor)
+            return cursor
+
+    def unsubscribe(self, cursor: 'TailCursor'):
+        """
+        Removes the cursor. Stops the reader when this was the last cursor.
+        """
+        with self._condition:
+            if cursor in self._cursors:
+                self._cursors.remove(cursor)
+            self.trim()
+            if len(self._cursors) == 0:
+                self.stop()
+
+    def start(self):
+        """
+        Starts following the log from its current end.
+        """
+        with open(self.log_path, 'rb') as logfile:
+            end = logfile.seek(0, 2)
+            logfile.seek(max(end - 4096, 0))
+            tail = logfile.read(end - logfile.tell()).rstrip(b'\r\n')
+        self._last_line = tail.rsplit(b'\n', 1)[-1].decode('utf-8', errors='replace')
+        self._lines.clear()
+        self._first_index = 0
+        self._position = end
+        self._active.set()
+        self._thread = Thread(target=self.follow, daemon=True)
+        self._thread.start()
+
+    def stop(self):
+        """
+        Stops the reader; returns immediately.
+        """
+        self._active.clear()
+        with self._condition:
+            self._condition.notify_all()
+
+    def follow(self):
+        """
+        Reads new lines until the reader is stopped. Runs in the reader thread.
+        """
+        remainder = b''
+        with open(self.log_path, 'rb') as logfile:
+            logfile.seek(self._position)
+            while self._active.is_set() and self._thread is current_thread():
+                with self._condition:
+                    while self._active.is_set() and self.backlog() >= self._max_lines:
+                        self._condition.wait(self._poll_interval)
+                chunk = logfile.read(65536)
+                if not chunk:
+                    with self._condition:
+                        self._condition.wait(self._poll_interval)
+                    continue
+                data = remainder + chunk
+                complete_end = data.rfind(b'\n') + 1
+                remainder = data[complete_end:]
+                if complete_end == 0:
+                    continue
+                read_time = time.time()
+                position = self._position
+                new_lines = list()
+                for raw_line in data[:complete_end].splitlines(keepends=True):
+                    new_lines.append((
+                            raw_line.decode('utf-8', errors='replace'), position,
+                            position + len(raw_line), read_time))
+                    position += len(raw_line)
+                with self._condition:
+                    if self._thread is not current_thread():
+                        break
+                    self._lines.extend(new_lines)
+                    self._position = position
+                    self._last_line = new_lines[-1][0]
+                    self.trim()
+                    self._condition.notify_all()
+
+    def backlog(self) -> int:
+        """
+        Number of lines the slowest cursor has not read yet.
+        """
+        if len(self._cursors) == 0:
+            return 0
+        end = self._first_index + len(self._lines)
+        return end - min(cursor.index for cursor in self._cursors)
+
+    def trim(self):
+        """
+        Discards lines every cursor has read. Must be called holding the condition.
+        """
+        if len(self._cursors) == 0:
+            first_needed = self._first_index + len(self._lines)
+        else:
+            first_needed = min(cursor.index for cursor in self._cursors)
+        while self._first_index < first_needed:
+            self._lines.popleft()
+            self._first_index += 1
+
+    def read(self, cursor: 'TailCursor', timeout: float, max_count: int) -> list:
+        """
+        Returns up to `max_count` lines following the cursor position, waiting up to `timeout`
+        seconds if there are none.
+        """
+        with self._condition:
+            end = self._first_index + len(self._lines)
+            if cursor.index >= end and self._active.is_set():
+                self._condition.wait(timeout)
+                end = self._first_index + len(self._lines)
+            count = min(end - cursor.index, max_count)
+            if count <= 0:
+                return list()
+            offset = cursor.index - self._first_index
+            lines = [self._lines[index] for index in range(offset, offset + count)]
+            cursor.index += count
+            self.trim()
+            self._condition.notify_all()
+            return lines
+
+
+class TailCursor():
+    """
+    Read position of a single consumer of a `LogTailReader`.
+    """
+    def __init__(self, reader: LogTailReader, index: int, position: int, previous_line: str):
+        """
+        Parameters:
+        - :param reader: reader the cursor belongs to
+        - :param index: index of the next line to read in the line sequence of the reader
+        - :param position: byte position in the log the cursor starts at
+        - :param previous_line: last complete line before the start position
+        """
+        self.reader = reader
+        self.index = index
+        self.start_position = position
+        self.previous_line = previous_line
+
+    def read(
+            self, timeout: float = 0.5,
+            max_count: int = 10000) -> list[tuple[str, int, int, float]]:
+        """
+        Returns the next lines as tuples `(line, start byte, end byte, read time)`; waits up to
+        `timeout` seconds when there are none.
+        """
+        return self.reader.read(self, timeout, max_count)
+
+    def close(self):
+        """
+        Unsubscribes the cursor from its reader.
+        """
+        self.reader.unsubscribe(self)
+
+
+class LiveLogParser(LiveParser):
+    """
+    LiveParser keeping track of when the most recent log line was written and when it was read.
+    The update callback receives a third positional argument containing the tuple
+    `(log time of the last line, time the last line was read)` as POSIX timestamps.
+
+    Additionally retains the lines of the current combat together with their byte range in the
+    log. When a combat ends, it is handed off as isolated `Combat`, so it can be analyzed without
+    reading the log again.
+
+    Lines are read through a cursor of a `LogTailReader`.
+    """
+    def __init__(
+            self, log_path: str, update_callback: Callable = None, settings: dict = None,
+            combat_callback: Callable[[Combat], None] = None, tail_reader: LogTailReader = None):
+        """
+        Parameters:
+        - :param log_path: path to combatlog that is being analyzed
+        - :param update_callback: called once every second while the parser is running with the \
+        player data, the combat time and the line timing
+        - :param settings: contains settings, see `OSCR.LiveParser`; additionally uses \
+        "graph_resolution" and "combats_to_parse"
+        - :param combat_callback: called from the parser thread with every finished combat
+        - :param tail_reader: reader following `log_path`; the parser creates its own when omitted
+        """
+        if settings is None:
+            settings = dict()
+        super().__init__(log_path, update_callback=self.forward_update, settings=settings)
+        self._forward_callback = update_callback
+        self._combat_callback = combat_callback
+        self._graph_resolution = settings.get('graph_resolution', 0.2)
+        self.finished_combats: deque[Combat] = deque(maxlen=settings.get('combats_to_parse', 10))
+        self._combat_lines: deque[LogLine] = deque()
+        self._combat_start = 0
+        self._combat_end = 0
+        self._combat_partial = False
+        self._previous_line_time: datetime | None = None
+        if tail_reader is None:
+            tail_reader = LogTailReader(log_path)
+        self._tail_reader = tail_reader
+        self.last_line_time = 0.0
+        self.last_read_time = 0.0
+
+    def forward_update(self, player_data: dict, combat_time: float):
+        """
+        Passes the refined data together with the line timing on to the update callback.
+        """
+        self._forward_callback(player_data, combat_time, (self.last_line_time, self.last_read_time))
+
+    def analyze(self):
+        """
+        Analyzes the log continuously until LiveParser.stop() is called. Clears existing data first
+        when called.
+        """
+        with self._lock:
+            self._players = dict()
+        self._reset = False
+        self._combat_lines = deque()
+        cursor = self._tail_reader.subscribe()
+        self._combat_start = self._combat_end = cursor.start_position
+        self._previous_line_time = self.line_time(cursor.previous_line)
+        self._combat_partial = self._previous_line_time is not None
+        self._active.set()
+        try:
+            while self._active.is_set():
+                lines = cursor.read(timeout=0.5)
+                if len(lines) == 0:
+                    self.register_inactivity(0.5)
+                    continue
+                for line, line_start, line_end, read_time in lines:
+                    self.process_line(line, line_start, line_end, read_time)
+        finally:
+            cursor.close()
+        # the combat running when the parser stopped did not end at a pause; the analysis reads it
+        # from the log instead, see `insert_live_combats`
+        self._combat_partial = True
+        self.finish_combat()
+
+    def register_inactivity(self, seconds: float):
+        """
+        Flags the collected data for reset once the log has been inactive for longer than the time
+        between combats.
+
+        Parameters:
+        - :param seconds: duration since the last check for new data
+        """
+        if self._reset:
+            return
+        elif self._inactive_seconds >= self.settings['seconds_between_combats']:
+            self._inactive_seconds = 0
+            self._reset = True
+            self.finish_combat()
+        else:
+            self._inactive_seconds += seconds
+
+    def process_line(
+            self, line: str, line_start: int = 0, line_end: int = 0, read_time: float = 0.0):
+        """
+        Adds the data of a single log line to the collected player data and to the current combat.
+
+        Parameters:
+        - :param line: the log line
+        - :param line_start: byte position of the line in the log
+        - :param line_end: byte position following the line in the log
+        - :param read_time: time the line was read; defaults to now
+        """
+        if self._reset:
+            with self._lock:
+                self._players = dict()
+            self._reset = False
+        self._inactive_seconds = 0
+        time_data, attack_data = line.split('::')
+        log_time = to_datetime(time_data)
+        timestamp = log_time.timestamp()
+        self.last_line_time = timestamp
+        self.last_read_time = read_time if read_time > 0 else time.time()
+        attack_data = attack_data.split(',')
+        self.retain_line(log_time, attack_data, line_start, line_end)
+        player_attacks = attack_data[1].startswith('P')
+        player_attacked = attack_data[5].startswith('P') and not attack_data[2]
+        if not player_attacks and not player_attacked:
+            return
+        magnitude = float(attack_data[10])
+        magnitude2 = float(attack_data[11])
+        is_shield = attack_data[8] == 'Shield'
+        is_heal = (
+                (is_shield and magnitude < 0 and magnitude2 >= 0)
+                or (attack_data[8] == 'HitPoints' and magnitude < 0))
+        is_kill = 'Kill' in attack_data[9]
+        magnitude = abs(magnitude)
+        magnitude2 = abs(magnitude2)
+        attacker_id = attack_data[1]
+        target_id = attack_data[5]
+
+        with self._lock:
+            if player_attacks:
+                if attacker_id not in self._players:
+                    self._players[attacker_id] = self.new_player()
+                attacker = self._players[attacker_id]
+                if not is_heal and target_id != '*':
+                    if attacker['combat_start'] is None:
+                        attacker['combat_start'] = timestamp
+                    attacker['combat_end'] = timestamp
+                    attacker['damage'] += magnitude
+                    attacker['damage_buffer'] += magnitude
+                    attacker['base_damage_buffer'] += magnitude2
+                    if is_kill:
+                        attacker['kills'] += 1
+                else:
+                    attacker['heal'] += magnitude
+            if player_attacked and not is_shield:
+                if target_id not in self._players:
+                    self._players[target_id] = self.new_player()
+                target = self._players[target_id]
+                target['attacks_in_buffer'] += 1
+                if is_kill:
+                    target['deaths'] += 1
+
+    def retain_line(
+            self, log_time: datetime, attack_data: list[str], line_start: int, line_end: int):
+        """
+        Appends line to the current combat, finishing the combat first if the line starts a new
+        one.
+        """
+        if attack_data[6] in BANNED_ABILITIES:
+            return
+        if self._previous_line_time is not None:
+            combat_delta = (log_time - self._previous_line_time).total_seconds()
+            if combat_delta > self.settings['seconds_between_combats']:
+                self.finish_combat()
+        self._previous_line_time = log_time
+        if len(self._combat_lines) == 0:
+            self._combat_start = line_start
+        self._combat_end = line_end
+        self._combat_lines.append(LogLine(
+                log_time, *attack_data[:10], float(attack_data[10]), float(attack_data[11])))
+
+    def finish_combat(self):
+        """
+        Hands off the lines retained since the last combat ended as isolated combat. Combats with
+        less than 20 lines are discarded, like the full parser does, and so are the combats that
+        were already running when the parser started or still running when it stopped.
+        """
+        lines = self._combat_lines
+        self._combat_lines = deque()
+        partial = self._combat_partial
+        self._combat_partial = False
+        if len(lines) < 20 or partial:
+            return
+        combat = Combat(self._graph_resolution, -1, self.log_path)
+        combat.log_data = lines
+        combat.start_time = lines[0].timestamp
+        combat.end_time = lines[-1].timestamp
+        combat.file_pos = [self._combat_start, self._combat_end]
+        self.finished_combats.append(combat)
+        if self._combat_callback is not None:
+            self._combat_callback(combat)
+
+    @staticmethod
+    def line_time(line: str) -> datetime | None:
+        """
+        Returns the log time of `line` or None if it is not a valid log line.
+        """
+        try:
+            return to_datetime(line.split('::')[0])
+        except (ValueError, TypeError, IndexError):
+            return None
+
+    @staticmethod
+    def new_player() -> dict:
+        """
+        Returns empty player data.
+        """
+        return {
+            'damage': 0,
+            'combat_start': None,
+            'combat_end': None,
+            'base_damage_buffer': 0,
+            'damage_buffer': 0,
+            'heal': 0,
+            'attacks_in_buffer': 0,
+            'kills': 0,
+            'deaths': 0
+        }
+
+
+class LiveLatencyStats():
+    """
+    Collects the time stamps each live update passes through (log line written, line read,
+    display updated, table painted) and computes latency percentiles from them.
+    """
+    PERCENTILES = (50, 95, 99)
+    CSV_HEADER = 'line_time,read_time,display_time,paint_time\n'
+
+    def __init__(self, sample_size: int = 600, csv_path: str = ''):
+        """
+        Parameters:
+        - :param sample_size: number of most recent updates the statistics are computed from
+        - :param csv_path: when not empty, every completed sample is appended to this file
+        """
+        self._samples = np.zeros((sample_size, 4), dtype=np.float64)
+        self._sample_count = 0
+        self._pending = None
+        self._csv_file = None
+        if csv_path:
+            try:
+                self._csv_file = open(csv_path, 'a', encoding='utf-8')
+                if self._csv_file.tell() == 0:
+                    self._csv_file.write(self.CSV_HEADER)
+            except OSError:
+                self._csv_file = None
+
+    def record_display(self, line_time: float, read_time: float):
+        """
+        Records that an update containing data up to the given line was just displayed.
+
+        Parameters:
+        - :param line_time: log time of the most recent line contained in the update
+        - :param read_time: time the most recent line was read by the parser
+        """
+        if line_time > 0:
+            self._pending = (line_time, read_time, time.time())
+
+    def record_paint(self):
+        """
+        Records that the table was painted; completes the pending sample if there is one.
+        """
+        if self._pending is None:
+            return
+        sample = (*self._pending, time.time())
+        self._pending = None
+        self._samples[self._sample_count % len(self._samples)] = sample
+        self._sample_count += 1
+        if self._csv_file is not None:
+            self._csv_file.write(','.join(f'{value:.3f}' for value in sample) + '\n')
+
+    @property
+    def latencies(self) -> np.ndarray:
+        """
+        Latency of every recorded sample in seconds. Columns: line written -> line read,
+        line read -> displayed, displayed -> painted, line written -> painted
+        """
+        samples = self._samples[:min(self._sample_count, len(self._samples))]
+        return np.column_stack((
+                np.diff(samples, axis=1), samples[:, 3] - samples[:, 0]))
+
+    def percentiles(self) -> np.ndarray | None:
+        """
+        Returns p50, p95 and p99 of each latency column (see `latencies`) as 3x4 array or None
+        if nothing was recorded yet.
+        """
+        if self._sample_count == 0:
+            return None
+        return np.percentile(self.latencies, self.PERCENTILES, axis=0)
+
+    @property
+    def update_rate(self) -> float:
+        """
+        Painted updates per second over the recorded samples.
+        """
+        samples = self._samples[:min(self._sample_count, len(self._samples)), 3]
+        if len(samples) < 2:
+            return 0.0
+        time_span = samples.max() - samples.min()
+        if time_span <= 0:
+            return 0.0
+        return (len(samples) - 1) / time_span
+
+    def summary(self) -> str:
+        """
+        Returns text summarizing end-to-end latency and update rate.
+        """
+        percentiles = self.percentiles()
+        if percentiles is None:
+            return 'Latency: ---'
+        p50, p95, p99 = percentiles[:, 3]
+        return (
+                f'Latency p50/p95/p99: {p50:.2f}/{p95:.2f}/{p99:.2f}s '
+                f'| {self.update_rate:.1f} upd/s')
+
+    def close(self):
+        """
+        Closes the CSV file if there is one.
+        """
+        if self._csv_file is not None:
+            self._csv_file.close()
+            self._csv_file = None
+
+
+LIVE_SESSION_MAGIC = b'OSCRLIV1'
+LIVE_SESSION_FLOAT_COLUMNS = ('dps', 'combat_time', 'local_debuff', 'local_attacks_in_share', 'hps')
+LIVE_SESSION_INT_COLUMNS = ('kills', 'deaths')
+_PLAYER_RECORD = struct.Struct('<cHH')
+_SNAPSHOT_RECORD = struct.Struct('<cddH')
+
+
+class LiveSessionRecorder():
+    """
+    Appends the snapshots displayed by the live parser to a compact binary file.
+
+    The file starts with `LIVE_SESSION_MAGIC` followed by two kinds of records:
+    - player record: `b'P'`, player id (uint16), length of the name (uint16), name and handle as \
+    utf-8 separated by a unit separator; written once per player before their first snapshot
+    - snapshot record: `b'S'`, wall time (float64), combat time (float64), player count n \
+    (uint16), followed by the columns: n player ids (uint16), one float32 column with n values \
+    for each of `LIVE_SESSION_FLOAT_COLUMNS` and one uint32 column for each of \
+    `LIVE_SESSION_INT_COLUMNS`
+
+    Column buffers are preallocated and written without copying, so recording a snapshot allocates
+    next to nothing.
+    """
+    def __init__(self, path: str, capacity: int = 16):
+        """
+        Parameters:
+        - :param path: file to write the session to; is overwritten
+        - :param capacity: number of players per snapshot the column buffers initially hold
+        """
+        self.path = path
+        self._file = open(path, 'wb')
+        self._file.write(LIVE_SESSION_MAGIC)
+        self._player_ids: dict[tuple, int] = dict()
+        self._allocate(capacity)
+
+    def _allocate(self, capacity: int):
+        self._capacity = capacity
+        self._ids = np.zeros(capacity, dtype='<u2')
+        self._float_columns = tuple(
+                np.zeros(capacity, dtype='<f4') for _ in LIVE_SESSION_FLOAT_COLUMNS)
+        self._int_columns = tuple(
+                np.zeros(capacity, dtype='<u4') for _ in LIVE_SESSION_INT_COLUMNS)
+
+    def player_id(self, player: tuple) -> int:
+        """
+        Returns the id of `player`, writing a player record if the player is new.
+        """
+        try:
+            return self._player_ids[player]
+        except KeyError:
+            player_id = len(self._player_ids)
+            self._player_ids[player] = player_id
+            name = '\x1f'.join(player).encode('utf-8')
+            self._file.write(_PLAYER_RECORD.pack(b'P', player_id, len(name)))
+            self._file.write(name)
+            return player_id
+
+    def record(self, player_data: dict, combat_time: float):
+        """
+        Appends a snapshot to the file.
+
+        Parameters:
+        - :param player_data: maps `(name, handle)` to the values of the player
+        - :param combat_time: duration of the entire combat
+        """
+        if self._file is None:
+            return
+        count = len(player_data)
+        if count > self._capacity:
+            self._allocate(max(count, 2 * self._capacity))
+        for index, (player, values) in enumerate(player_data.items()):
+            self._ids[index] = self.player_id(player)
+            for column, key in zip(self._float_columns, LIVE_SESSION_FLOAT_COLUMNS):
+                column[index] = values[key]
+            for column, key in zip(self._int_columns, LIVE_SESSION_INT_COLUMNS):
+                column[index] = values[key]
+        self._file.write(_SNAPSHOT_RECORD.pack(b'S', time.time(), combat_time, count))
+        self._file.write(self._ids[:count].data)
+        for column in self._float_columns:
+            self._file.write(column[:count].data)
+        for column in self._int_columns:
+            self._file.write(column[:count].data)
+
+    def close(self):
+        """
+        Flushes and closes the file.
+        """
+        if self._file is not None:
+            self._file.close()
+            self._file = None
+
+
+class LiveSessionReader():
+    """
+    Loads a session written by `LiveSessionRecorder`.
+    """
+    def __init__(self, path: str):
+        """
+        Parameters:
+        - :param path: session file
+
+        Raises ValueError when the file is not a valid session file.
+        """
+        with open(path, 'rb') as session_file:
+            data = session_file.read()
+        if not data.startswith(LIVE_SESSION_MAGIC):
+            raise ValueError('Not a LiveParser session file.')
+        players: list[tuple] = list()
+        times = list()
+        self._snapshots: list[tuple[float, np.ndarray, tuple[np.ndarray, ...]]] = list()
+        position = len(LIVE_SESSION_MAGIC)
+        try:
+            while position < len(data):
+                record_type = data[position:position + 1]
+                if record_type == b'P':
+                    _, player_id, length = _PLAYER_RECORD.unpack_from(data, position)
+                    position += _PLAYER_RECORD.size
+                    name = data[position:position + length].decode('utf-8')
+                    players.append(tuple(name.split('\x1f')))
+                    position += length
+                elif record_type == b'S':
+                    _, wall_time, combat_time, count = _SNAPSHOT_RECORD.unpack_from(data, position)
+                    position += _SNAPSHOT_RECORD.size
+                    ids = np.frombuffer(data, '<u2', count, position)
+                    position += 2 * count
+                    columns = list()
+                    for _ in LIVE_SESSION_FLOAT_COLUMNS:
+                        columns.append(np.frombuffer(data, '<f4', count, position))
+                        position += 4 * count
+                    for _ in LIVE_SESSION_INT_COLUMNS:
+                        columns.append(np.frombuffer(data, '<u4', count, position))
+                        position += 4 * count
+                    times.append(wall_time)
+                    self._snapshots.append((combat_time, ids, tuple(columns)))
+                else:
+                    raise ValueError(f'Invalid record at byte {position}.')
+        except (struct.error, ValueError, UnicodeDecodeError) as e:
+            # a session cut off while writing is still usable up to the last complete snapshot
+            if len(self._snapshots) == 0:
+                raise ValueError(f'Invalid LiveParser session file: {e}')
+        self._players = players
+        self.times = np.array(times[:len(self._snapshots)], dtype=np.float64)
+        if len(self.times) > 0:
+            self.times -= self.times[0]
+
+    def __len__(self) -> int:
+        return len(self._snapshots)
+
+    @property
+    def duration(self) -> float:
+        """
+        Seconds between the first and the last snapshot.
+        """
+        return float(self.times[-1]) if len(self.times) > 0 else 0.0
+
+    def index_at(self, session_time: float) -> int:
+        """
+        Returns the index of the last snapshot recorded at or before `session_time` seconds into
+        the session.
+        """
+        return max(int(np.searchsorted(self.times, session_time, side='right')) - 1, 0)
+
+    def snapshot(self, index: int) -> tuple[dict, float]:
+        """
+        Returns the snapshot at `index` as `(player data, combat time)` in the format of the
+        LiveParser.
+        """
+        combat_time, ids, columns = self._snapshots[index]
+        keys = LIVE_SESSION_FLOAT_COLUMNS + LIVE_SESSION_INT_COLUMNS
+        player_data = dict()
+        for row, player_id in enumerate(ids):
+            player_data[self._players[player_id]] = {
+                    key: column[row].item() for key, column in zip(keys, columns)}
+        return player_data, combat_time
+
+
+class LiveSessionReplay():
+    """
+    Plays back a recorded session in real time multiplied by `speed`.
+    """
+    def __init__(self, session: LiveSessionReader, speed: float = 1.0):
+        """
+        Parameters:
+        - :param session: the recorded session
+        - :param speed: playback speed; 1 replays the session in real time
+        """
+        self.session = session
+        self.speed = speed
+        self._session_time = 0.0
+        self._started_at = None
+        self._index = -1
+
+    @property
+    def session_time(self) -> float:
+        """
+        Seconds into the session the playback is at.
+        """
+        if self._started_at is None:
+            return self._session_time
+        return self._session_time + (time.monotonic() - self._started_at) * self.speed
+
+    @property
+    def finished(self) -> bool:
+        return self._index >= len(self.session) - 1
+
+    def start(self):
+        """
+        Starts or resumes the playback; restarts it when it has finished.
+        """
+        if self.finished:
+            self._session_time = 0.0
+            self._index = -1
+        if self._started_at is None:
+            self._started_at = time.monotonic()
+
+    def pause(self):
+        """
+        Pauses the playback.
+        """
+        if self._started_at is not None:
+            self._session_time = self.session_time
+            self._started_at = None
+
+    def take(self) -> tuple[dict, float] | None:
+        """
+        Returns the snapshot due at the current playback position or None if it has already been
+        returned.
+        """
+        if len(self.session) == 0:
+            return None
+        index = self.session.index_at(self.session_time)
+        if index == self._index:
+            return None
+        self._index = index
+        if self.finished:
+            self.pause()
+        return self.session.snapshot(index)
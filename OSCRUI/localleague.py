@@ -0,0 +1,392 @@
+from collections.abc import Callable, Iterable
+from concurrent.futures import as_completed, ProcessPoolExecutor
+import multiprocessing
+import os
+import sqlite3
+import sys
+import threading
+
+from OSCR import OSCR
+from OSCR.combat import Combat
+from OSCR.detection import Detection
+from OSCR.parser import analyze_combat
+from OSCR.utilities import get_entity_name
+
+from .leaguesnapshots import ENTRY_COLUMNS, SQLiteStore
+from .leagueupload import hash_log_range
+
+LOCAL_LEAGUE_WORKERS = max((os.cpu_count() or 2) - 1, 1)
+# entities identifying a map, see `has_map_identifier`
+MAP_IDENTIFIERS = frozenset(Detection.MAP_IDENTIFIERS_EXISTENCE.keys())
+
+LOCAL_LEAGUE_SCHEMA = '''
+CREATE TABLE IF NOT EXISTS log (
+    path TEXT PRIMARY KEY,
+    size INTEGER NOT NULL,
+    modified REAL NOT NULL
+);
+CREATE TABLE IF NOT EXISTS combat (
+    id INTEGER PRIMARY KEY,
+    content_hash TEXT NOT NULL UNIQUE,
+    log_path TEXT NOT NULL,
+    byte_start INTEGER NOT NULL,
+    byte_end INTEGER NOT NULL,
+    map TEXT NOT NULL,
+    difficulty TEXT NOT NULL,
+    date TEXT NOT NULL,
+    detection TEXT
+);
+CREATE TABLE IF NOT EXISTS entry (
+    id INTEGER PRIMARY KEY,
+    combat INTEGER NOT NULL,
+    map TEXT NOT NULL,
+    difficulty TEXT NOT NULL,
+    best INTEGER NOT NULL DEFAULT 0,
+    name TEXT,
+    handle TEXT,
+    dps REAL,
+    total_damage REAL,
+    deaths INTEGER,
+    combat_time REAL,
+    date TEXT,
+    max_one_hit REAL,
+    debuff REAL,
+    build TEXT,
+    search_key TEXT
+);
+CREATE INDEX IF NOT EXISTS entry_ladder_dps ON entry (map, difficulty, best, dps);
+CREATE INDEX IF NOT EXISTS entry_ladder_date ON entry (map, difficulty, best, date);
+CREATE INDEX IF NOT EXISTS entry_player ON entry (map, difficulty, handle, name);
+CREATE INDEX IF NOT EXISTS entry_combat ON entry (combat);
+'''
+
+
+class LocalLadder():
+    """
+    Ladder of the local league, containing the best combat of every player on a map and
+    difficulty.
+    """
+    def __init__(
+            self, map: str, difficulty: str, entry_count: int, combat_count: int,
+            best_dps: float):
+        self.map = map
+        self.difficulty = difficulty
+        self.entry_count = entry_count
+        self.combat_count = combat_count
+        self.best_dps = best_dps
+
+    @property
+    def key(self) -> tuple[str, str]:
+        """
+        Returns key of the ladder in `LocalLeagueStore`.
+        """
+        return (self.map, self.difficulty)
+
+    @property
+    def title(self) -> str:
+        return f'{self.map} ({self.difficulty})'
+
+
+class LocalLeagueStore(SQLiteStore):
+    """
+    SQLite database holding ladders computed from the combats of local logs. Every combat is
+    stored once, identified by the hash of its part of the log.
+    """
+    schema = LOCAL_LEAGUE_SCHEMA
+
+    def log_changed(self, path: str, size: int, modified: float) -> bool:
+        """
+        Returns True when the log at `path` was not ingested with this size and modification time.
+        """
+        row = self.connection.execute(
+                'SELECT size, modified FROM log WHERE path = ?', (path,)).fetchone()
+        return row is None or row[0] != size or row[1] != modified
+
+    def add_combats(
+            self, path: str, combats: list[tuple], size: int | None = None,
+            modified: float | None = None) -> int:
+        """
+        Stores combats of a log. Returns the number of combats that were not stored before.
+
+        Parameters:
+        - :param path: path to the log
+        - :param combats: combats of the log, see `combat_record`
+        - :param size: size of the log when it was analyzed; marks the log as ingested if supplied
+        - :param modified: modification time of the log when it was analyzed
+        """
+        added = 0
+        with self.connection as connection:
+            for content_hash, start, end, map, difficulty, date, detection, rows in combats:
+                cursor = connection.execute(
+                        'INSERT OR IGNORE INTO combat (content_hash, log_path, byte_start, '
+                        'byte_end, map, difficulty, date, detection) '
+                        'VALUES (?, ?, ?, ?, ?, ?, ?, ?)',
+                        (content_hash, path, start, end, map, difficulty, date, detection))
+                if cursor.rowcount == 0:
+                    continue
+                added += 1
+                for row in rows:
+                    self._add_entry(connection, cursor.lastrowid, map, difficulty, row)
+            if size is not None:
+                connection.execute(
+                        'INSERT OR REPLACE INTO log (path, size, modified) VALUES (?, ?, ?)',
+                        (path, size, modified))
+        return added
+
+    def _add_entry(
+            self, connection: sqlite3.Connection, combat: int, map: str, difficulty: str,
+            row: tuple):
+        """
+        Stores the ladder entry of a player and updates which entry is the best of the player.
+        """
+        name, handle, dps = row[:3]
+        best = connection.execute(
+                'SELECT id, dps FROM entry WHERE map = ? AND difficulty = ? AND handle = ? '
+                'AND name = ? AND best = 1', (map, difficulty, handle, name)).fetchone()
+        is_best = best is None or dps > best[1]
+        if is_best and best is not None:
+            connection.execute('UPDATE entry SET best = 0 WHERE id = ?', (best[0],))
+        connection.execute(
+                f'INSERT INTO entry (combat, map, difficulty, best, {", ".join(ENTRY_COLUMNS)}, '
+                f'search_key) VALUES ({", ".join("?" * (len(ENTRY_COLUMNS) + 5))})',
+                (combat, map, difficulty, int(is_best), *row, self.search_key(name, handle)))
+
+    def ladders(self) -> list[LocalLadder]:
+        """
+        Returns all ladders of the local league, sorted by map and difficulty.
+        """
+        cursor = self.connection.execute(
+                'SELECT map, difficulty, SUM(best), COUNT(DISTINCT combat), MAX(dps) FROM entry '
+                'GROUP BY map, difficulty ORDER BY map, difficulty')
+        return [LocalLadder(*row) for row in cursor]
+
+    def count(self, ladder: tuple[str, str], name_filter: str = '') -> int:
+        """
+        Returns number of entries of a ladder that match `name_filter`.
+        """
+        clause, parameters = self.filter_clause(name_filter)
+        return self.connection.execute(
+                f'SELECT COUNT(*) FROM entry WHERE map = ? AND difficulty = ? AND best = 1{clause}',
+                (*ladder, *parameters)).fetchone()[0]
+
+    def entries(
+            self, ladder: tuple[str, str], name_filter: str = '', sort_column: int = -1,
+            descending: bool = True, offset: int = 0,
+            limit: int = -1) -> tuple[list, list, list]:
+        """
+        Returns entries of a ladder in the format of `ladder_page_rows`. Players are ranked by
+        the DPS of their best combat.
+
+        Parameters:
+        - :param ladder: map and difficulty of the ladder
+        - :param name_filter: only returns entries with names or handles containing this text
+        - :param sort_column: ladder table column to sort by; -1 sorts by rank
+        - :param descending: True to sort the highest values first
+        - :param offset: number of entries to skip
+        - :param limit: maximum number of entries returned; -1 returns all
+
+        :return: tuple containing ranks, table rows and ids of the combats in this store
+        """
+        clause, parameters = self.filter_clause(name_filter)
+        if 0 <= sort_column < len(ENTRY_COLUMNS):
+            direction = 'DESC' if descending else 'ASC'
+            order = f'{ENTRY_COLUMNS[sort_column]} {direction}, rank'
+        else:
+            order = 'rank'
+        cursor = self.connection.execute(
+                f'SELECT rank, combat, {", ".join(ENTRY_COLUMNS)} FROM ('
+                f'SELECT ROW_NUMBER() OVER (ORDER BY dps DESC, id) AS rank, * FROM entry '
+                f'WHERE map = ? AND difficulty = ? AND best = 1) WHERE 1{clause} '
+                f'ORDER BY {order} LIMIT ? OFFSET ?',
+                (*ladder, *parameters, limit, offset))
+        index = list()
+        rows = list()
+        combat_ids = list()
+        for rank, combat_id, *row in cursor:
+            index.append(rank)
+            rows.append(tuple(row))
+            combat_ids.append(combat_id)
+        return index, rows, combat_ids
+
+    def combat_location(self, combat: int) -> tuple[str, int, int, str] | None:
+        """
+        Returns path to the log containing a combat, the position of the combat in the log and the
+        hash of the combat.
+        """
+        return self.connection.execute(
+                'SELECT log_path, byte_start, byte_end, content_hash FROM combat WHERE id = ?',
+                (combat,)).fetchone()
+
+    def clear(self):
+        """
+        Removes all combats and ladders.
+        """
+        with self.connection as connection:
+            connection.execute('DELETE FROM entry')
+            connection.execute('DELETE FROM combat')
+            connection.execute('DELETE FROM log')
+
+
+def has_map_identifier(combat: Combat) -> bool:
+    """
+    Returns True when an entity of an isolated combat identifies a map, like
+    `OSCR.isolate_combats` does. Combats without one cannot be detected by `Combat.detect_map`.
+    """
+    for line in combat.log_data:
+        if (get_entity_name(line.target_id) in MAP_IDENTIFIERS
+                or get_entity_name(line.owner_id) in MAP_IDENTIFIERS):
+            return True
+    return False
+
+
+def highest_damage_abilities(combat: Combat) -> dict[tuple[str, str], str]:
+    """
+    Returns name of the ability that dealt the most damage for every player of an analyzed combat.
+
+    :return: dictionary mapping name and handle of the players to the ability names
+    """
+    abilities = dict()
+    for player_item in combat.damage_out._player._children:
+        if len(player_item._children) == 0:
+            continue
+        ability = max(player_item._children, key=lambda item: item.get_data(2))
+        name = ability.get_data(0)
+        if isinstance(name, tuple):
+            name = name[0] + name[1]
+        abilities[player_item.get_data(0)[:2]] = name
+    return abilities
+
+
+def combat_record(combat: Combat, content_hash: str) -> tuple:
+    """
+    Returns the data of an analyzed combat that is stored in the local league.
+
+    :return: tuple containing content hash, start and end position in the log, map, difficulty,
+    date, detection steps and the ladder rows of the players
+    """
+    date = combat.start_time.strftime('%Y-%m-%d %H:%M:%S')
+    detection = ', '.join(sorted({
+            info.step for info in combat.meta['detection_info'] or tuple() if info.success}))
+    abilities = highest_damage_abilities(combat)
+    rows = list()
+    for player in combat.players.values():
+        rows.append((
+                player.name, player.handle, player.DPS, player.total_damage, player.deaths,
+                player.combat_time, date, player.max_one_hit, player.debuff * 100,
+                abilities.get((player.name, player.handle), 'Unknown')))
+    return (
+            content_hash, *combat.file_pos, combat.map, combat.difficulty or 'Any', date,
+            detection, rows)
+
+
+def analyze_local_log(
+        path: str, settings: dict, database_path: str) -> tuple[list, list[str], bool]:
+    """
+    Analyzes the combats of a log that took place on a map OSCR can detect and are not in the
+    local league yet. Combats are read one at a time, so memory use does not depend on the size
+    of the log. Runs in a worker process.
+
+    Parameters:
+    - :param path: path to the log
+    - :param settings: parser settings; uses "seconds_between_combats" and "graph_resolution"
+    - :param database_path: path to the local league database, used to skip known combats
+
+    :return: tuple containing the new combats, see `combat_record`, error messages and whether the
+    whole log could be read
+    """
+    combats = list()
+    errors = list()
+    read_errors = list()
+    connection = sqlite3.connect(database_path, timeout=10)
+
+    def handle_combat(combat: Combat):
+        if not has_map_identifier(combat):
+            return
+        content_hash = hash_log_range(path, *combat.file_pos)
+        known = connection.execute(
+                'SELECT 1 FROM combat WHERE content_hash = ?', (content_hash,)).fetchone()
+        if known is not None:
+            return
+        try:
+            analyze_combat(combat)
+        except Exception as e:
+            errors.append(f'{path}: {e!r}')
+            return
+        if combat.map != 'Combat':
+            combats.append(combat_record(combat, content_hash))
+
+    try:
+        OSCR._analyze_log_file(
+                path, sys.maxsize, 0, 0, settings, handle_combat,
+                read_errors.append)
+    finally:
+        connection.close()
+    errors.extend(f'{path}: {error!r}' for error in read_errors)
+    return combats, errors, len(read_errors) == 0
+
+
+def ingest_local_logs(
+        store: LocalLeagueStore, paths: Iterable[str], settings: dict,
+        progress: Callable[[int, int, int], None] | None = None,
+        stop: threading.Event | None = None,
+        workers: int = LOCAL_LEAGUE_WORKERS) -> tuple[int, int, list[str]]:
+    """
+    Adds the combats of logs to the local league. Logs are analyzed in parallel worker processes;
+    logs that did not change since they were ingested are skipped.
+
+    Parameters:
+    - :param store: local league database
+    - :param paths: paths to the logs
+    - :param settings: parser settings, see `analyze_local_log`
+    - :param progress: called with the number of analyzed logs, the number of logs to analyze and \
+    the number of added combats after each log
+    - :param stop: analyzing logs that have not started yet is skipped once this event is set
+    - :param workers: maximum number of worker processes
+
+    :return: tuple containing the number of analyzed logs, the number of added combats and error
+    messages
+    """
+    pending = list()
+    for path in dict.fromkeys(os.path.abspath(path) for path in paths):
+        try:
+            stat = os.stat(path)
+        except OSError as e:
+            pending.append((path, -1, -1, e))
+            continue
+        if store.log_changed(path, stat.st_size, stat.st_mtime):
+            pending.append((path, stat.st_size, stat.st_mtime, None))
+    errors = [f'{path}: {error}' for path, _, _, error in pending if error is not None]
+    pending = [job for job in pending if job[3] is None]
+    analyzed = 0
+    added = 0
+    if len(pending) == 0:
+        return analyzed, added, errors
+    settings = {
+            key: settings[key] for key in ('seconds_between_combats', 'graph_resolution')}
+    # creating the database before the workers open it
+    store.connection
+    with ProcessPoolExecutor(
+            min(workers, len(pending)),
+            mp_context=multiprocessing.get_context('spawn')) as pool:
+        futures = {
+                pool.submit(analyze_local_log, path, settings, store.path): (path, size, modified)
+                for path, size, modified, _ in pending}
+        for future in as_completed(futures):
+            path, size, modified = futures[future]
+            analyzed += 1
+            try:
+                combats, log_errors, complete = future.result()
+            except Exception as e:
+                errors.append(f'{path}: {e!r}')
+            else:
+                # logs that could not be read completely are analyzed again next time
+                if not complete:
+                    size = modified = None
+                added += store.add_combats(path, combats, size, modified)
+                errors.extend(log_errors)
+            if progress is not None:
+                progress(analyzed, len(pending), added)
+            if stop is not None and stop.is_set():
+                pool.shutdown(wait=False, cancel_futures=True)
+                break
+    return analyzed, added, errors
@@ -0,0 +1,284 @@
+from collections import deque
+from collections.abc import Callable, Iterable
+from concurrent.futures import ThreadPoolExecutor
+import json
+import os
+import struct
+from threading import Event
+import zlib
+
+from .logfiles import trim_file
+
+ARCHIVE_EXTENSION = '.oscrarchive'
+ARCHIVE_MAGIC = b'OSCRARC1'
+BLOCK_MAGIC = b'OSCRBLK1'
+INDEX_MAGIC = b'OSCRIDX1'
+# magic, compressed size, uncompressed size, crc32 of the uncompressed data, metadata size
+BLOCK_HEADER = struct.Struct('<8sQQII')
+# index offset, index size, magic; last bytes of an archive with an up to date index
+TRAILER = struct.Struct('<QQ8s')
+COMPRESSION_LEVEL = 6
+READ_CHUNK_SIZE = 4 * 1024 * 1024
+ARCHIVE_WORKERS = min(4, os.cpu_count() or 1)
+
+
+class ArchivedCombat():
+    """
+    Index entry of a combat stored in a log archive.
+    """
+    def __init__(
+            self, offset: int, size: int, compressed_size: int, crc: int, map: str,
+            difficulty: str, date: str, time: str):
+        """
+        Parameters:
+        - :param offset: position of the compressed data in the archive
+        - :param size: size of the uncompressed combat
+        - :param compressed_size: size of the compressed data
+        - :param crc: crc32 of the uncompressed combat
+        - :param map: map, date, time and difficulty as returned by `OSCR.isolate_combats`
+        """
+        self.offset = offset
+        self.size = size
+        self.compressed_size = compressed_size
+        self.crc = crc
+        self.map = map
+        self.difficulty = difficulty
+        self.date = date
+        self.time = time
+
+    @property
+    def metadata(self) -> list:
+        return [self.map, self.difficulty, self.date, self.time]
+
+    @property
+    def index_entry(self) -> list:
+        return [self.offset, self.size, self.compressed_size, self.crc, *self.metadata]
+
+
+def archive_path(log_path: str) -> str:
+    """
+    Returns path of the archive belonging to a logfile.
+    """
+    return os.path.splitext(log_path)[0] + ARCHIVE_EXTENSION
+
+
+def is_log_archive(path: str) -> bool:
+    try:
+        with open(path, 'rb') as file:
+            return file.read(len(ARCHIVE_MAGIC)) == ARCHIVE_MAGIC
+    except OSError:
+        return False
+
+
+def read_archive_index(path: str) -> list[ArchivedCombat]:
+    """
+    Returns the combats stored in a log archive, oldest first.
+    """
+    with open(path, 'rb') as file:
+        return _read_index(file)[0]
+
+
+def _read_index(file) -> tuple[list[ArchivedCombat], int]:
+    """
+    Reads the index of an open archive. Archives without a valid index, for example because
+    appending to them was interrupted, are indexed by reading the block headers.
+
+    :return: archived combats, oldest first, and the position following the last block
+    """
+    if file.read(len(ARCHIVE_MAGIC)) != ARCHIVE_MAGIC:
+        raise ValueError(f'"{file.name}" is not a log archive')
+    size = file.seek(0, os.SEEK_END)
+    if size >= len(ARCHIVE_MAGIC) + TRAILER.size:
+        file.seek(size - TRAILER.size)
+        index_offset, index_size, magic = TRAILER.unpack(file.read(TRAILER.size))
+        if magic == INDEX_MAGIC and index_offset + index_size + TRAILER.size == size:
+            file.seek(index_offset)
+            try:
+                entries = json.loads(zlib.decompress(file.read(index_size)))
+                return [ArchivedCombat(*entry) for entry in entries], index_offset
+            except (zlib.error, ValueError, TypeError):
+                pass
+    return _scan_blocks(file, size)
+
+
+def _scan_blocks(file, size: int) -> tuple[list[ArchivedCombat], int]:
+    combats = list()
+    position = len(ARCHIVE_MAGIC)
+    while position + BLOCK_HEADER.size <= size:
+        file.seek(position)
+        magic, compressed_size, combat_size, crc, metadata_size = BLOCK_HEADER.unpack(
+                file.read(BLOCK_HEADER.size))
+        offset = position + BLOCK_HEADER.size + metadata_size
+        if magic != BLOCK_MAGIC or offset + compressed_size > size:
+            break
+        try:
+            metadata = json.loads(file.read(metadata_size))
+        except ValueError:
+            break
+        combats.append(ArchivedCombat(offset, combat_size, compressed_size, crc, *metadata))
+        position = offset + compressed_size
+    return combats, position
+
+
+def extract_archived_combat(path: str, combat: ArchivedCombat, target_path: str):
+    """
+    Decompresses a single combat of a log archive into a new logfile. Only the block of the
+    combat is read.
+
+    Parameters:
+    - :param path: path to the archive
+    - :param combat: combat to extract, see `read_archive_index`
+    - :param target_path: logfile to write; replaced if it exists
+    """
+    decompressor = zlib.decompressobj()
+    crc = 0
+    size = 0
+    try:
+        with open(path, 'rb') as archive, open(target_path, 'wb') as target:
+            archive.seek(combat.offset)
+            remaining = combat.compressed_size
+            while remaining > 0:
+                chunk = archive.read(min(READ_CHUNK_SIZE, remaining))
+                if len(chunk) == 0:
+                    break
+                remaining -= len(chunk)
+                data = decompressor.decompress(chunk)
+                crc = zlib.crc32(data, crc)
+                size += len(data)
+                target.write(data)
+            data = decompressor.flush()
+            crc = zlib.crc32(data, crc)
+            size += len(data)
+            target.write(data)
+        if remaining > 0 or size != combat.size or crc != combat.crc:
+            raise ValueError(f'Combat at byte {combat.offset} of "{path}" is damaged')
+    except BaseException:
+        try:
+            os.remove(target_path)
+        except OSError:
+            pass
+        raise
+
+
+def _compress_range(source_path: str, start: int, end: int) -> tuple[bytes, int, int]:
+    """
+    Compresses bytes `start` to `end` of a file. Runs in a worker thread.
+
+    :return: compressed data, size and crc32 of the uncompressed data
+    """
+    compressor = zlib.compressobj(COMPRESSION_LEVEL)
+    parts = list()
+    crc = 0
+    size = 0
+    with open(source_path, 'rb') as source:
+        source.seek(start)
+        while size < end - start:
+            data = source.read(min(READ_CHUNK_SIZE, end - start - size))
+            if len(data) == 0:
+                raise ValueError(f'"{source_path}" ends before byte {end}')
+            crc = zlib.crc32(data, crc)
+            size += len(data)
+            parts.append(compressor.compress(data))
+    parts.append(compressor.flush())
+    return b''.join(parts), size, crc
+
+
+def append_to_archive(
+        path: str, source_path: str, ranges: Iterable[tuple[int, int, list]],
+        progress: Callable[[int, int], None] | None = None, stop: Event | None = None,
+        workers: int = ARCHIVE_WORKERS) -> int:
+    """
+    Compresses byte ranges of a logfile and appends them to a log archive as independent blocks.
+    The index is written after all blocks, so an interrupted call leaves the blocks appended so far
+    readable. Ranges already stored in the archive are skipped.
+
+    Parameters:
+    - :param path: path to the archive; created if it does not exist
+    - :param source_path: logfile to read the ranges from
+    - :param ranges: start and end positions of the combats and their metadata (map, difficulty, \
+    date and time), oldest first
+    - :param progress: called with the number of processed ranges and the total number of ranges
+    - :param stop: no more ranges are compressed once this event is set
+    - :param workers: number of ranges compressed at the same time
+
+    :return: number of ranges that have been processed; less than given if `stop` was set
+    """
+    ranges = list(ranges)
+    mode = 'r+b' if os.path.exists(path) else 'w+b'
+    with open(path, mode) as archive:
+        if mode == 'w+b':
+            archive.write(ARCHIVE_MAGIC)
+            combats, end = list(), len(ARCHIVE_MAGIC)
+        else:
+            combats, end = _read_index(archive)
+        stored = {(combat.crc, combat.size) for combat in combats}
+        archive.seek(end)
+        archive.truncate()
+        done = 0
+        with ThreadPoolExecutor(max(1, workers)) as pool:
+            pending = deque()
+            queued = iter(ranges)
+            while True:
+                while len(pending) < 2 * workers and not (stop is not None and stop.is_set()):
+                    combat_range = next(queued, None)
+                    if combat_range is None:
+                        break
+                    start, combat_end, metadata = combat_range
+                    pending.append(
+                            (pool.submit(_compress_range, source_path, start, combat_end),
+                                metadata))
+                if len(pending) == 0:
+                    break
+                future, metadata = pending.popleft()
+                data, size, crc = future.result()
+                if (crc, size) not in stored:
+                    encoded_metadata = json.dumps(metadata).encode()
+                    archive.write(BLOCK_HEADER.pack(
+                            BLOCK_MAGIC, len(data), size, crc, len(encoded_metadata)))
+                    archive.write(encoded_metadata)
+                    combats.append(ArchivedCombat(archive.tell(), size, len(data), crc, *metadata))
+                    archive.write(data)
+                    stored.add((crc, size))
+                done += 1
+                if progress is not None:
+                    progress(done, len(ranges))
+        index_offset = archive.tell()
+        index = zlib.compress(json.dumps([combat.index_entry for combat in combats]).encode())
+        archive.write(index)
+        archive.write(TRAILER.pack(index_offset, len(index), INDEX_MAGIC))
+        archive.flush()
+        os.fsync(archive.fileno())
+    return done
+
+
+def archive_logfile(
+        log_path: str, path: str, combats: list[tuple],
+        progress: Callable[[int, int], None] | None = None, stop: Event | None = None) -> int:
+    """
+    Moves all combats but the most recent one from a logfile to a log archive. The logfile is only
+    trimmed after the archive has been written completely.
+
+    Parameters:
+    - :param log_path: logfile to archive
+    - :param path: path to the archive
+    - :param combats: combats of the logfile as returned by `OSCR.isolate_combats`, most recent \
+    first
+    - :param progress: called with the number of archived combats and the number of combats to \
+    archive
+    - :param stop: stops archiving when set; the logfile is left unchanged
+
+    :return: number of archived combats
+    """
+    if len(combats) < 2:
+        return 0
+    ranges = list()
+    # lines between combats that were too short to be isolated belong to the next combat
+    start = 0
+    for _, map_name, date, time, difficulty, _, end in reversed(combats[1:]):
+        ranges.append((start, end, [map_name, difficulty, date, time]))
+        start = end
+    archived = append_to_archive(path, log_path, ranges, progress, stop)
+    if archived < len(ranges):
+        return 0
+    trim_file(log_path, start, os.path.getsize(log_path))
+    return archived
@@ -0,0 +1,174 @@
+from collections.abc import Callable, Iterable, Iterator
+from contextlib import contextmanager
+import errno
+import os
+from uuid import uuid4
+
+COPY_CHUNK_SIZE = 16 * 1024 * 1024
+# shifting by less than this would take too many small copies; the file is rewritten instead
+MIN_SHIFT_DISTANCE = 1024 * 1024
+# errors raised when a copy method is not supported for the given files
+UNSUPPORTED_COPY_ERRORS = frozenset(
+        code for code in (
+            getattr(errno, name, None) for name in (
+                'EXDEV', 'ENOSYS', 'EINVAL', 'EOPNOTSUPP', 'ENOTSUP', 'ENOTSOCK', 'EBADF'))
+        if code is not None)
+
+
+def _copy_file_range(source_fd: int, target_fd: int, offset: int, count: int) -> int:
+    return os.copy_file_range(source_fd, target_fd, count, offset)
+
+
+def _sendfile(source_fd: int, target_fd: int, offset: int, count: int) -> int:
+    return os.sendfile(target_fd, source_fd, offset, count)
+
+
+def _buffered_copy(source_fd: int, target_fd: int, offset: int, count: int) -> int:
+    os.lseek(source_fd, offset, os.SEEK_SET)
+    data = os.read(source_fd, count)
+    view = memoryview(data)
+    while len(view) > 0:
+        view = view[os.write(target_fd, view):]
+    return len(data)
+
+
+# copy methods in order of preference; methods that fail as unsupported are removed
+_copy_methods: list[Callable[[int, int, int, int], int]] = [
+        method for method, available in (
+            (_copy_file_range, hasattr(os, 'copy_file_range')),
+            (_sendfile, hasattr(os, 'sendfile')),
+            (_buffered_copy, True))
+        if available]
+
+
+def copy_range(source_fd: int, target_fd: int, start: int, end: int, chunk_size: int = 0) -> int:
+    """
+    Copies bytes `start` to `end` of the source file to the current position of the target file.
+    Uses `os.copy_file_range` or `os.sendfile` where the platform and file systems support them,
+    so the data does not pass through user space, and large buffered copies otherwise.
+
+    Parameters:
+    - :param source_fd: file descriptor of the source file
+    - :param target_fd: file descriptor of the target file, opened for writing
+    - :param start: first byte to copy
+    - :param end: copies data until this byte, not including it
+    - :param chunk_size: maximum number of bytes copied at once; `COPY_CHUNK_SIZE` if 0
+
+    :return: number of bytes copied; less than requested if the source file is shorter
+    """
+    if chunk_size <= 0:
+        chunk_size = COPY_CHUNK_SIZE
+    position = start
+    while position < end:
+        method = _copy_methods[0]
+        try:
+            copied = method(source_fd, target_fd, position, min(chunk_size, end - position))
+        except OSError as e:
+            if e.errno not in UNSUPPORTED_COPY_ERRORS or method is _buffered_copy:
+                raise
+            if method in _copy_methods:
+                _copy_methods.remove(method)
+            continue
+        if copied == 0:
+            break
+        position += copied
+    return position - start
+
+
+@contextmanager
+def replacement_file(target_path: str) -> Iterator[int]:
+    """
+    Creates a new file next to `target_path` and yields its file descriptor for writing. Once the
+    block finishes, the new file replaces `target_path`, so `target_path` is never left half
+    written. The new file is removed instead if the block raises.
+
+    Parameters:
+    - :param target_path: file to replace; created if it does not exist
+    """
+    temp_path = f'{target_path}.{uuid4().hex[:8]}.tmp'
+    target_fd = os.open(
+            temp_path, os.O_WRONLY | os.O_CREAT | os.O_EXCL | getattr(os, 'O_BINARY', 0), 0o666)
+    try:
+        try:
+            yield target_fd
+            os.fsync(target_fd)
+        finally:
+            os.close(target_fd)
+        os.replace(temp_path, target_path)
+    except BaseException:
+        try:
+            os.remove(temp_path)
+        except OSError:
+            pass
+        raise
+
+
+def write_ranges(source_path: str, target_path: str, ranges: Iterable[tuple[int, int]]):
+    """
+    Writes the given byte ranges of a file to a new file, see `replacement_file`. `target_path`
+    may be the same as `source_path`.
+
+    Parameters:
+    - :param source_path: file to copy from
+    - :param target_path: file to write to; replaced if it exists
+    - :param ranges: start and end position pairs (half-open intervals), written in this order
+    """
+    with replacement_file(target_path) as target_fd:
+        # closed before the source is replaced, which Windows does not allow for open files
+        source_fd = os.open(source_path, os.O_RDONLY | getattr(os, 'O_BINARY', 0))
+        try:
+            for start, end in merge_ranges(ranges):
+                copy_range(source_fd, target_fd, start, end)
+        finally:
+            os.close(source_fd)
+
+
+def merge_ranges(ranges: Iterable[tuple[int, int]]) -> list[tuple[int, int]]:
+    """
+    Joins adjacent byte ranges, so they are copied with a single call. Keeps the order of the
+    ranges and drops empty ones.
+    """
+    merged = list()
+    for start, end in ranges:
+        if end <= start:
+            continue
+        if len(merged) > 0 and merged[-1][1] == start:
+            merged[-1] = (merged[-1][0], end)
+        else:
+            merged.append((start, end))
+    return merged
+
+
+def trim_file(path: str, start: int, end: int):
+    """
+    Removes everything but bytes `start` to `end` from a file. When the kept range reaches the end
+    of the file, it is moved to the beginning of the file in place and the file is truncated, so
+    only the kept bytes are copied and the file keeps its identity. Otherwise the file is
+    replaced with a copy of the range, see `write_ranges`.
+
+    Parameters:
+    - :param path: file to trim
+    - :param start: first byte to keep
+    - :param end: keeps data until this byte, not including it; must not be beyond the end of the
+    file
+    """
+    size = os.path.getsize(path)
+    if not 0 <= start < end <= size:
+        raise ValueError(f'Range {start}-{end} is not part of "{path}" ({size} bytes)')
+    if end < size or 0 < start < MIN_SHIFT_DISTANCE:
+        write_ranges(path, path, ((start, end),))
+        return
+    binary = getattr(os, 'O_BINARY', 0)
+    source_fd = os.open(path, os.O_RDONLY | binary)
+    try:
+        target_fd = os.open(path, os.O_WRONLY | binary)
+        try:
+            if start > 0:
+                # chunks no longer than the shift never overlap their destination
+                copy_range(source_fd, target_fd, start, end, min(COPY_CHUNK_SIZE, start))
+            os.ftruncate(target_fd, end - start)
+            os.fsync(target_fd)
+        finally:
+            os.close(target_fd)
+    finally:
+        os.close(source_fd)
@@ -0,0 +1,194 @@
+from collections import deque
+from collections.abc import Callable
+from concurrent.futures import ThreadPoolExecutor
+from contextlib import ExitStack
+import os
+from threading import Event
+
+import numpy as np
+
+from .logfiles import copy_range, replacement_file
+
+REPAIR_CHUNK_SIZE = 8 * 1024 * 1024
+# every chunk being checked takes about five times its size in memory
+REPAIR_WORKERS = min(8, os.cpu_count() or 1)
+# strings known to break parsing and their replacements, see `OSCR.repair_logfile`
+REPAIR_PATCHES = ((b'Rehona, Sister of the Qowat Milat', b'Rehona - Sister of the Qowat Milat'),)
+# a valid line consists of the timestamp, "::" and twelve comma separated fields
+FIELD_SEPARATORS = 11
+
+# kinds of line issues; blank and malformed lines are removed, patched lines are replaced
+BLANK_LINE = 'blank'
+PATCHED_LINE = 'patched'
+MALFORMED_LINE = 'malformed'
+
+
+def is_valid_line(line: bytes) -> bool:
+    return line.count(b',') == FIELD_SEPARATORS and line.count(b'::') == 1
+
+
+def repair_line(line: bytes) -> tuple[str, bytes | None]:
+    """
+    Repairs a line that is not valid.
+
+    :return: kind of the issue and the repaired line; None if the line has to be removed
+    """
+    if line.strip() == b'':
+        return BLANK_LINE, None
+    for broken_string, fixed_string in REPAIR_PATCHES:
+        line = line.replace(broken_string, fixed_string)
+    if is_valid_line(line):
+        return PATCHED_LINE, line
+    return MALFORMED_LINE, None
+
+
+def line_chunks(path: str, chunk_size: int = REPAIR_CHUNK_SIZE) -> list[tuple[int, int]]:
+    """
+    Splits a file into chunks of roughly `chunk_size` bytes that end after a line break. Text after
+    the last line break is not part of any chunk, as it may still be written to.
+
+    :return: start and end positions of the chunks
+    """
+    chunks = list()
+    with open(path, 'rb') as file:
+        size = file.seek(0, os.SEEK_END)
+        while size > 0:
+            block_start = max(0, size - 64 * 1024)
+            file.seek(block_start)
+            line_break = file.read(size - block_start).rfind(b'\n')
+            if line_break >= 0:
+                size = block_start + line_break + 1
+                break
+            size = block_start
+        start = 0
+        while start < size:
+            file.seek(min(start + chunk_size, size))
+            file.readline()
+            end = min(file.tell(), size)
+            chunks.append((start, end))
+            start = end
+    return chunks
+
+
+def repair_chunk(
+        path: str, start: int, end: int, dry_run: bool) -> tuple[int, list[list], bytes | None]:
+    """
+    Checks and repairs the lines in bytes `start` to `end` of a logfile. Runs in a worker thread;
+    the separators are counted by numpy, which does not hold the GIL while doing so.
+
+    Parameters:
+    - :param path: logfile
+    - :param start: first byte of the chunk; must be the start of a line
+    - :param end: end of the chunk; must be the end of a line, see `line_chunks`
+    - :param dry_run: only checks the lines when True
+
+    :return: tuple containing the number of lines in the chunk, the issues found as ranges of \
+    line indices within the chunk (first line, last line, kind) and the repaired chunk; the \
+    repaired chunk is None if nothing had to be repaired or `dry_run` is True
+    """
+    with open(path, 'rb') as file:
+        file.seek(start)
+        data = file.read(end - start)
+    # counts the separators of all lines at once to find the lines that need to be looked at
+    buffer = np.frombuffer(data, np.uint8)
+    line_ends = np.flatnonzero(buffer == ord('\n'))
+    field_separators = np.diff(
+            np.searchsorted(np.flatnonzero(buffer == ord(',')), line_ends), prepend=0)
+    colons = buffer == ord(':')
+    time_separators = np.diff(
+            np.searchsorted(np.flatnonzero(colons[:-1] & colons[1:]), line_ends), prepend=0)
+    suspicious_lines = np.flatnonzero(
+            (field_separators != FIELD_SEPARATORS) | (time_separators != 1))
+    issues = list()
+    parts = list()
+    position = 0
+    for number in suspicious_lines.tolist():
+        line_start = int(line_ends[number - 1]) + 1 if number > 0 else 0
+        line_end = int(line_ends[number]) + 1
+        line = data[line_start:line_end - 1]
+        if is_valid_line(line):
+            continue
+        kind, repaired_line = repair_line(line)
+        if len(issues) > 0 and issues[-1][1] == number - 1 and issues[-1][2] == kind:
+            issues[-1][1] = number
+        else:
+            issues.append([number, number, kind])
+        parts.append(data[position:line_start])
+        if repaired_line is not None:
+            parts.append(repaired_line + b'\n')
+        position = line_end
+    if dry_run or len(issues) == 0:
+        return len(line_ends), issues, None
+    parts.append(data[position:])
+    return len(line_ends), issues, b''.join(parts)
+
+
+def repair_log(
+        path: str, dry_run: bool = False, progress: Callable[[int, int], None] | None = None,
+        stop: Event | None = None, workers: int = REPAIR_WORKERS,
+        chunk_size: int = REPAIR_CHUNK_SIZE) -> list[tuple[int, int, str]]:
+    """
+    Finds and repairs lines that break parsing. The logfile is split into chunks that are checked
+    in parallel worker threads. Repaired chunks are written to a new file in order, chunks
+    without issues are copied over unchanged. Logfiles without issues are not written to.
+
+    Parameters:
+    - :param path: logfile to repair
+    - :param dry_run: only reports the issues when True; the logfile is not changed
+    - :param progress: called with the number of checked bytes and the size of the logfile
+    - :param stop: raises InterruptedError once this event is set; the logfile is left unchanged
+    - :param workers: number of worker threads
+    - :param chunk_size: approximate size of the chunks
+
+    :return: issues found; ranges of line numbers starting at 1 (first line, last line, kind)
+    """
+    chunks = line_chunks(path, chunk_size)
+    size = chunks[-1][1] if len(chunks) > 0 else 0
+    issues = list()
+    line_offset = 1
+    with ExitStack() as stack:
+        source = stack.enter_context(open(path, 'rb'))
+        target_fd = None
+        pool = stack.enter_context(ThreadPoolExecutor(max(1, min(workers, len(chunks)))))
+        stack.callback(pool.shutdown, wait=False, cancel_futures=True)
+        pending = deque()
+        queued = iter(chunks)
+        while True:
+            while len(pending) < 2 * workers:
+                chunk = next(queued, None)
+                if chunk is None:
+                    break
+                pending.append((pool.submit(repair_chunk, path, *chunk, dry_run), chunk))
+            if len(pending) == 0:
+                break
+            future, (start, end) = pending.popleft()
+            line_count, chunk_issues, repaired_data = future.result()
+            if stop is not None and stop.is_set():
+                raise InterruptedError(f'Repairing "{path}" has been cancelled')
+            for first, last, kind in chunk_issues:
+                first += line_offset
+                last += line_offset
+                if len(issues) > 0 and issues[-1][1] == first - 1 and issues[-1][2] == kind:
+                    issues[-1] = (issues[-1][0], last, kind)
+                else:
+                    issues.append((first, last, kind))
+            line_offset += line_count
+            if not dry_run:
+                if repaired_data is not None and target_fd is None:
+                    # the file is only rewritten once the first issue has been found
+                    target_fd = stack.enter_context(replacement_file(path))
+                    copy_range(source.fileno(), target_fd, 0, start)
+                if repaired_data is not None:
+                    view = memoryview(repaired_data)
+                    while len(view) > 0:
+                        view = view[os.write(target_fd, view):]
+                elif target_fd is not None:
+                    copy_range(source.fileno(), target_fd, start, end)
+            if progress is not None:
+                progress(end, size)
+        if target_fd is not None:
+            # text after the last line break, including lines written during the repair
+            copy_range(source.fileno(), target_fd, size, os.fstat(source.fileno()).st_size)
+        # closed before the logfile is replaced, which Windows does not allow for open files
+        source.close()
+    return issues
@@ -0,0 +1,258 @@
+from collections import deque
+import multiprocessing
+from multiprocessing.connection import Connection
+
+from PySide6.QtCore import QSettings, QThread, QTimer
+from PySide6.QtGui import QFontDatabase
+from PySide6.QtWidgets import QApplication, QPushButton
+
+from .iofunctions import get_asset_path, get_live_parser_settings, load_icon_series, load_settings
+from .subwindows import live_parser_toggle
+from .translation import init_translation
+from .widgets import WidgetStorage
+
+# settings starting with "live_" that do not require the overlay to reload when changed; the
+# window stores its geometry and splitter itself
+OVERLAY_IGNORED_SETTINGS = (
+        'live_geometry', 'live_splitter', 'live_enabled', 'live_separate_process')
+
+
+class LiveOverlay():
+    """
+    Minimal app hosting the LiveParser window in a process of its own. Provides the attributes and
+    methods of the main app that the LiveParser window uses.
+
+    Talks to the main app through a pipe: it receives `('settings',)` to reload the settings and
+    recreate the window and `('close',)` to exit; it sends `('closed',)` when the user closes the
+    window.
+    """
+    from .style import get_style_class, create_style_sheet, theme_font, get_style
+
+    def __init__(
+            self, connection: Connection, app_dir: str, theme: dict, config: dict,
+            sidebar_item_width: int):
+        """
+        Parameters:
+        - :param connection: pipe end connected to the main app
+        - :param app_dir: absolute path to the app directory
+        - :param theme: theme of the main app
+        - :param config: initialized config of the main app
+        - :param sidebar_item_width: sidebar width of the main app, used to size the window
+        """
+        self._connection = connection
+        self.app_dir = app_dir
+        self.theme = theme
+        self.config = config
+        self.sidebar_item_width = sidebar_item_width
+        self.settings = load_settings(app_dir, config)
+        init_translation(self.settings.value('language'))
+        self.app = QApplication([])
+        QThread.currentThread().setPriority(QThread.Priority.TimeCriticalPriority)
+        for font in ('Overpass-Bold.ttf', 'Overpass-Medium.ttf', 'Overpass-Regular.ttf',
+                     'RobotoMono-Regular.ttf', 'RobotoMono-Medium.ttf'):
+            QFontDatabase.addApplicationFont(get_asset_path(font, app_dir))
+        self.app.setStyleSheet(self.create_style_sheet(self.theme['app']['style']))
+        self.icons = load_icon_series(
+                {'oscr': 'oscr_icon_small.png', 'copy': 'copy.svg', 'close': 'close.svg'}, app_dir)
+        self.window = None
+        self.widgets = WidgetStorage()
+        # stands in for the live parser button of the main window; unchecked on window close
+        self.widgets.live_parser_button = QPushButton(checkable=True)
+        self.widgets.live_parser_button.toggled.connect(self.button_toggled)
+        self.live_parser_window = None
+        self.live_parser = None
+        self.live_combats = deque()
+        self.log_reader = None
+        self._reloading = False
+        self._timer = QTimer()
+        self._timer.setInterval(100)
+        self._timer.timeout.connect(self.receive)
+
+    @property
+    def live_parser_settings(self) -> dict:
+        return get_live_parser_settings(self.settings)
+
+    def run(self) -> int:
+        """
+        Shows the LiveParser window and runs the event loop until the window is closed.
+        """
+        self.widgets.live_parser_button.setChecked(True)
+        live_parser_toggle(self, True)
+        if self.live_parser_window is None:
+            return 1
+        self._timer.start()
+        return self.app.exec()
+
+    def receive(self):
+        """
+        Handles the messages sent by the main app.
+        """
+        try:
+            while self._connection.poll():
+                message = self._connection.recv()
+                if message[0] == 'settings':
+                    self.settings.sync()
+                    self._reloading = True
+                    live_parser_toggle(self, False)
+                    self.widgets.live_parser_button.setChecked(True)
+                    live_parser_toggle(self, True)
+                    self._reloading = False
+                elif message[0] == 'close' and self.live_parser_window is not None:
+                    live_parser_toggle(self, False)
+        except (EOFError, OSError):
+            # main app is gone
+            if self.live_parser_window is not None:
+                live_parser_toggle(self, False)
+
+    def button_toggled(self, checked: bool):
+        """
+        Exits once the LiveParser window has been closed.
+        """
+        if checked or self._reloading:
+            return
+        try:
+            self._connection.send(('closed',))
+        except (BrokenPipeError, OSError):
+            pass
+        self.app.quit()
+
+
+def get_overlay_settings(settings: QSettings) -> dict:
+    """
+    Returns the settings the LiveParser window is created from.
+
+    Parameters:
+    - :param settings: the app settings
+    """
+    overlay_settings = {
+            key: settings.value(key) for key in settings.allKeys()
+            if key.startswith('live_') and key not in OVERLAY_IGNORED_SETTINGS}
+    overlay_settings.update(get_live_parser_settings(settings))
+    overlay_settings['sto_log_path'] = settings.value('sto_log_path')
+    return overlay_settings
+
+
+def run_live_overlay(
+        connection: Connection, app_dir: str, theme: dict, config: dict, sidebar_item_width: int):
+    """
+    Entry point of the overlay process.
+    """
+    overlay = LiveOverlay(connection, app_dir, theme, config, sidebar_item_width)
+    overlay.run()
+    connection.close()
+
+
+class LiveOverlayProcess():
+    """
+    Handle of the main app on an overlay process.
+    """
+    def __init__(
+            self, app_dir: str, theme: dict, config: dict, sidebar_item_width: int,
+            settings: QSettings):
+        """
+        Starts the overlay process.
+
+        Parameters:
+        - :param app_dir: absolute path to the app directory
+        - :param theme: theme of the app
+        - :param config: initialized config of the app
+        - :param sidebar_item_width: sidebar width of the main app, used to size the window
+        - :param settings: the app settings; must be synced, as the overlay reads them from disk
+        """
+        # settings the overlay window currently uses
+        self._settings = get_overlay_settings(settings)
+        # a forked child would inherit the QApplication of the main app
+        context = multiprocessing.get_context('spawn')
+        self._connection, child_connection = context.Pipe()
+        self._process = context.Process(
+                target=run_live_overlay, daemon=True,
+                args=(child_connection, app_dir, theme, config, sidebar_item_width))
+        self._process.start()
+        child_connection.close()
+
+    @property
+    def alive(self) -> bool:
+        """
+        True as long as the overlay process is running and its window has not been closed.
+        """
+        if not self._process.is_alive():
+            return False
+        try:
+            while self._connection.poll():
+                if self._connection.recv()[0] == 'closed':
+                    return False
+        except (EOFError, OSError):
+            return False
+        return True
+
+    def reload_settings(self, settings: QSettings):
+        """
+        Makes the overlay apply the current settings. Does nothing if none of the settings the
+        overlay uses changed since it last applied them, as the overlay recreates its window.
+
+        Parameters:
+        - :param settings: the app settings
+        """
+        overlay_settings = get_overlay_settings(settings)
+        if overlay_settings == self._settings:
+            return
+        self._settings = overlay_settings
+        settings.sync()
+        self._send('settings')
+
+    def close(self):
+        """
+        Closes the overlay and waits briefly for the process to exit.
+        """
+        self._send('close')
+        self._process.join(2)
+        if self._process.is_alive():
+            self._process.terminate()
+        self._connection.close()
+
+    def _send(self, *message):
+        try:
+            self._connection.send(message)
+        except (BrokenPipeError, OSError):
+            pass
+
+
+def live_overlay_toggle(self, activate: bool):
+    """
+    Shows / closes the LiveParser; in a separate process when the respective setting is enabled.
+
+    Parameters:
+    - :param activate: True when parser should be shown; False when open parser should be closed.
+    """
+    if activate:
+        if self.settings.value('live_separate_process', type=bool):
+            self.settings.sync()
+            self.live_overlay = LiveOverlayProcess(
+                    self.app_dir, self.theme, self.config, self.sidebar_item_width,
+                    self.settings)
+            self.live_overlay_timer.start()
+        else:
+            live_parser_toggle(self, True)
+    elif self.live_overlay is not None:
+        close_live_overlay(self)
+    else:
+        live_parser_toggle(self, False)
+
+
+def close_live_overlay(self):
+    """
+    Closes the overlay process if it is running.
+    """
+    self.live_overlay_timer.stop()
+    if self.live_overlay is not None:
+        self.live_overlay.close()
+        self.live_overlay = None
+    self.widgets.live_parser_button.setChecked(False)
+
+
+def check_live_overlay(self):
+    """
+    Cleans up once the overlay process was closed from its own window. Called periodically.
+    """
+    if self.live_overlay is not None and not self.live_overlay.alive:
+        close_live_overlay(self)
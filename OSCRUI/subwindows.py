@@ -1,29 +1,38 @@
+from datetime import datetime
 import os
 from traceback import format_exception
+from typing import Callable
 
-from PySide6.QtCore import QPoint, QSize, Qt
+from PySide6.QtCore import QPoint, QSize, Qt, QTimer
 from PySide6.QtGui import QMouseEvent, QTextOption
 from PySide6.QtWidgets import (
         QDialog, QGridLayout, QHBoxLayout, QListView, QMessageBox,
         QSplitter, QTableView, QTextEdit, QVBoxLayout)
 
-from OSCR import LiveParser, LIVE_TABLE_HEADER
+from OSCR import LIVE_TABLE_HEADER
 
 from .callbacks import (
-        confirm_trim_logfile, copy_live_data_callback, extract_combats, populate_split_combats_list,
-        repair_logfile)
+        confirm_archive_logfile, confirm_trim_logfile, copy_live_data_callback, extract_combats,
+        populate_split_combats_list, repair_logfile)
 from .dialogs import show_message
-from .displayer import create_live_graph, update_live_display, update_live_graph, update_live_table
-from .datamodels import CombatModel, LiveParserTableModel
-from .iofunctions import open_link
+from .displayer import (
+        create_live_graph, pull_live_snapshot, pull_replay_snapshot, update_live_graph,
+        update_live_table)
+from .datamodels import (
+        CombatModel, LiveParserTableModel, LocalLadderListModel, SnapshotDiffModel,
+        SnapshotListModel)
+from .iofunctions import browse_folder, browse_path, browse_paths, open_link
+from .livedata import (
+        LiveGraphBuffer, LiveLatencyStats, LiveLogParser, LiveSessionReader, LiveSessionRecorder,
+        LiveSessionReplay, LogTailReader, SnapshotSlot)
 from .style import get_style, get_style_class, theme_font
 from .textedit import format_path
 from .translation import tr
 from .widgetbuilder import (
         create_button, create_button_series, create_frame, create_icon_button, create_label,
-        ABOTTOM, AHCENTER, ALEFT, ARIGHT, ATOP, AVCENTER, RFIXED,
+        style_table, ABOTTOM, AHCENTER, ALEFT, ARIGHT, ATOP, AVCENTER, RFIXED,
         SMAXMAX, SMINMAX, SMINMIN, SMIXMIN)
-from .widgets import CombatDelegate, FlipButton, LiveParserWindow, SizeGrip
+from .widgets import CombatDelegate, FlipButton, LiveParserWindow, PaintWatcher, SizeGrip
 
 
 def split_dialog(self):
@@ -73,18 +82,59 @@ def split_dialog(self):
     seperator = create_frame(self, style='hr', size_policy=SMINMAX)
     seperator.setFixedHeight(self.theme['hr']['height'])
     content_layout.addWidget(seperator)
+    archive_layout = QGridLayout()
+    archive_layout.setContentsMargins(0, 0, 0, 0)
+    archive_layout.setSpacing(thick)
+    archive_layout.setColumnStretch(0, 1)
+    archive_heading = create_label(self, tr('Archive Logfile:'), 'label_heading')
+    archive_layout.addWidget(archive_heading, 0, 0, alignment=ALEFT)
+    label_text = tr(
+            'Moves all combats except for the most recent one from the selected logfile to a '
+            'compressed archive next to it. Select the archive as logfile to analyze its combats.')
+    archive_text = create_label(self, label_text)
+    archive_text.setSizePolicy(SMINMAX)
+    archive_text.setWordWrap(True)
+    archive_layout.addWidget(archive_text, 1, 0)
+    archive_status = create_label(self, '')
+    archive_layout.addWidget(archive_status, 2, 0)
+    archive_button = create_button(self, tr('Archive'))
+    archive_button.clicked.connect(lambda: confirm_archive_logfile(self, archive_status))
+    archive_layout.addWidget(archive_button, 0, 1, alignment=ARIGHT | ABOTTOM)
+    content_layout.addLayout(archive_layout)
+    seperator = create_frame(self, style='hr', size_policy=SMINMAX)
+    seperator.setFixedHeight(self.theme['hr']['height'])
+    content_layout.addWidget(seperator)
     repair_layout = QGridLayout()
     repair_layout.setContentsMargins(0, 0, 0, 0)
     repair_layout.setSpacing(thick)
     repair_layout.setColumnStretch(0, 1)
     repair_log_heading = create_label(self, tr('Repair Logfile:'), 'label_heading')
     repair_layout.addWidget(repair_log_heading, 0, 0, alignment=ALEFT)
-    label_text = tr('Attempts to repair the logfile by replacing sections known to break parsing.')
+    label_text = tr(
+            'Attempts to repair the logfile by replacing sections known to break parsing and '
+            'removing empty and malformed lines. "Check" only lists the lines with issues.')
     repair_label = create_label(self, label_text)
-    repair_layout.addWidget(repair_label, 1, 0)
-    repair_log_button = create_button(self, tr('Repair'))
-    repair_log_button.clicked.connect(lambda: repair_logfile(self))
-    repair_layout.addWidget(repair_log_button, 0, 1, alignment=ARIGHT | ABOTTOM)
+    repair_label.setSizePolicy(SMINMAX)
+    repair_label.setWordWrap(True)
+    repair_layout.addWidget(repair_label, 1, 0, 1, 2)
+    repair_status = create_label(self, '')
+    repair_layout.addWidget(repair_status, 2, 0, 1, 2)
+    repair_report = QTextEdit()
+    repair_report.setSizePolicy(SMINMIN)
+    repair_report.setReadOnly(True)
+    repair_report.setWordWrapMode(QTextOption.WrapMode.NoWrap)
+    repair_report.setFont(theme_font(self, 'textedit'))
+    repair_report.setStyleSheet(get_style_class(self, 'QTextEdit', 'textedit'))
+    repair_report.hide()
+    repair_layout.addWidget(repair_report, 3, 0, 1, 2)
+    repair_button_style = {
+        tr('Check'): {'callback': lambda: repair_logfile(
+                self, repair_status, repair_report, dry_run=True)},
+        tr('Repair'): {'callback': lambda: repair_logfile(self, repair_status, repair_report)},
+    }
+    repair_buttons_layout = create_button_series(
+            self, repair_button_style, 'button', seperator='•')
+    repair_layout.addLayout(repair_buttons_layout, 0, 1, alignment=ARIGHT | ABOTTOM)
     content_layout.addLayout(repair_layout)
     seperator = create_frame(self, style='hr', size_policy=SMINMAX)
     seperator.setFixedHeight(self.theme['hr']['height'])
@@ -202,6 +252,284 @@ def uploadresult_dialog(self, result: dict):
     dialog.exec()
 
 
+def upload_summary_dialog(self):
+    """
+    Shows the combats of the upload queue and their results. Double-clicking an uploaded combat
+    shows its detailed result.
+    """
+    dialog = self.widgets.upload_summary_dialog
+    if dialog is not None:
+        dialog.show()
+        dialog.raise_()
+        return
+    main_layout = QVBoxLayout()
+    thick = self.theme['app']['frame_thickness']
+    main_layout.setContentsMargins(thick, thick, thick, thick)
+    content_frame = create_frame(self)
+    main_layout.addWidget(content_frame)
+    content_layout = QVBoxLayout()
+    content_layout.setContentsMargins(thick, thick, thick, thick)
+    content_layout.setSpacing(thick)
+    model = self.widgets.upload_queue_model
+    table = QTableView()
+    style_table(self, table, single_row_selection=True)
+    table.setSortingEnabled(False)
+    table.setModel(model)
+    table.horizontalHeader().setStretchLastSection(True)
+    table.resizeColumnsToContents()
+    table.setMinimumSize(self.sidebar_item_width * 2, self.sidebar_item_width)
+    model.modelReset.connect(table.resizeColumnsToContents)
+    table.doubleClicked.connect(lambda index: show_upload_job_result(self, model.job(index.row())))
+    content_layout.addWidget(table)
+
+    dialog = QDialog(self.window)
+    button_style = {
+        tr('Clear Finished'): {'callback': lambda: clear_finished_uploads(self)},
+        tr('Close'): {'callback': dialog.close}
+    }
+    buttons_layout = create_button_series(self, button_style, 'button', seperator='•')
+    content_layout.addLayout(buttons_layout)
+    content_frame.setLayout(content_layout)
+
+    dialog.setLayout(main_layout)
+    dialog.setWindowTitle(tr('OSCR - Upload Queue'))
+    dialog.setStyleSheet(get_style(self, 'dialog_window'))
+    self.widgets.upload_summary_dialog = dialog
+    dialog.show()
+
+
+def show_upload_job_result(self, job):
+    """
+    Shows the detailed result of an uploaded combat or opens it online if the details are not
+    available anymore.
+    """
+    if job.result is not None:
+        uploadresult_dialog(self, job.result)
+    elif job.combatlog is not None:
+        view_upload_result(self, job.combatlog)
+
+
+def clear_finished_uploads(self):
+    """
+    Removes the finished combats from the upload queue.
+    """
+    self.upload_queue.clear_finished()
+    self.widgets.upload_queue_model.refresh()
+
+
+def ladder_snapshots_dialog(self):
+    """
+    Shows the stored ladder snapshots. A snapshot can be opened in the ladder table, two snapshots
+    can be compared.
+    """
+    dialog = self.widgets.ladder_snapshots_dialog
+    if dialog is not None:
+        refresh_ladder_snapshots(self)
+        dialog.show()
+        dialog.raise_()
+        return
+    main_layout = QVBoxLayout()
+    thick = self.theme['app']['frame_thickness']
+    main_layout.setContentsMargins(thick, thick, thick, thick)
+    content_frame = create_frame(self)
+    main_layout.addWidget(content_frame)
+    content_layout = QVBoxLayout()
+    content_layout.setContentsMargins(thick, thick, thick, thick)
+    content_layout.setSpacing(thick)
+    model = SnapshotListModel(
+            tr(('Ladder', 'Season', 'Entries', 'Saved')), theme_font(self, 'table'))
+    self.widgets.ladder_snapshot_model = model
+    table = QTableView()
+    style_table(self, table)
+    table.setSortingEnabled(False)
+    table.setModel(model)
+    table.horizontalHeader().setStretchLastSection(True)
+    table.setMinimumSize(self.sidebar_item_width * 2, self.sidebar_item_width)
+    model.modelReset.connect(table.resizeColumnsToContents)
+    refresh_ladder_snapshots(self)
+    table.doubleClicked.connect(
+            lambda index: self.show_ladder_snapshot(model.snapshot(index.row()).id))
+    content_layout.addWidget(table)
+
+    def selected_snapshots() -> list:
+        return [model.snapshot(index.row()) for index in table.selectionModel().selectedRows()]
+
+    def open_snapshot():
+        snapshots = selected_snapshots()
+        if len(snapshots) > 0:
+            self.show_ladder_snapshot(snapshots[0].id)
+
+    def compare_snapshots():
+        snapshots = selected_snapshots()
+        if len(snapshots) != 2:
+            show_message(
+                    self, tr('Compare Snapshots'),
+                    tr('Select two snapshots to compare them.'), 'info')
+            return
+        old, new = sorted(snapshots, key=lambda snapshot: snapshot.created)
+        snapshot_diff_dialog(self, old, new)
+
+    def delete_snapshots():
+        for snapshot in selected_snapshots():
+            self.ladder_snapshots.delete_snapshot(snapshot.id)
+        refresh_ladder_snapshots(self)
+
+    dialog = QDialog(self.window)
+    button_style = {
+        tr('Open'): {'callback': open_snapshot},
+        tr('Compare'): {'callback': compare_snapshots},
+        tr('Delete'): {'callback': delete_snapshots},
+        tr('Close'): {'callback': dialog.close}
+    }
+    buttons_layout = create_button_series(self, button_style, 'button', seperator='•')
+    content_layout.addLayout(buttons_layout)
+    content_frame.setLayout(content_layout)
+
+    dialog.setLayout(main_layout)
+    dialog.setWindowTitle(tr('OSCR - Ladder Snapshots'))
+    dialog.setStyleSheet(get_style(self, 'dialog_window'))
+    self.widgets.ladder_snapshots_dialog = dialog
+    dialog.show()
+
+
+def refresh_ladder_snapshots(self):
+    """
+    Updates the list of snapshots in the snapshot dialog if it was opened before.
+    """
+    if self.widgets.ladder_snapshot_model is not None:
+        self.widgets.ladder_snapshot_model.set_snapshots(self.ladder_snapshots.snapshots())
+
+
+def snapshot_diff_dialog(self, old, new):
+    """
+    Shows how rank and DPS of the players changed between two ladder snapshots.
+
+    Parameters:
+    - :param old: older `LadderSnapshot`
+    - :param new: newer `LadderSnapshot`
+    """
+    rows = self.ladder_snapshots.diff(old.id, new.id)
+    main_layout = QVBoxLayout()
+    thick = self.theme['app']['frame_thickness']
+    main_layout.setContentsMargins(thick, thick, thick, thick)
+    content_frame = create_frame(self)
+    main_layout.addWidget(content_frame)
+    content_layout = QVBoxLayout()
+    content_layout.setContentsMargins(thick, thick, thick, thick)
+    content_layout.setSpacing(thick)
+    old_created = datetime.fromtimestamp(old.created).strftime('%Y-%m-%d %H:%M')
+    new_created = datetime.fromtimestamp(new.created).strftime('%Y-%m-%d %H:%M')
+    title_label = create_label(self, f'{old.title}: {old_created} → {new.title}: {new_created}')
+    content_layout.addWidget(title_label)
+    model = SnapshotDiffModel(
+            rows, tr(('Name', 'Handle', 'Rank', 'Rank Change', 'DPS', 'DPS Change', 'Change')),
+            range(1, len(rows) + 1), theme_font(self, 'table_header'), theme_font(self, 'table'),
+            new_text=tr('New'), dropped_text=tr('Dropped'))
+    table = QTableView()
+    style_table(self, table, single_row_selection=True)
+    table.setSortingEnabled(False)
+    table.setModel(model)
+    table.verticalHeader().hide()
+    table.resizeColumnsToContents()
+    table.setMinimumSize(self.sidebar_item_width * 2, self.sidebar_item_width * 1.5)
+    content_layout.addWidget(table)
+    close_button = create_button(self, tr('Close'))
+    content_layout.addWidget(close_button, alignment=AHCENTER)
+    content_frame.setLayout(content_layout)
+
+    dialog = QDialog(self.window)
+    close_button.clicked.connect(dialog.close)
+    dialog.setLayout(main_layout)
+    dialog.setWindowTitle(tr('OSCR - Snapshot Comparison'))
+    dialog.setStyleSheet(get_style(self, 'dialog_window'))
+    dialog.setAttribute(Qt.WidgetAttribute.WA_DeleteOnClose)
+    dialog.show()
+
+
+def local_league_dialog(self):
+    """
+    Shows the ladders of the local league, which are computed from the combats of local logs.
+    Logs can be added to the local league and a ladder can be opened in the ladder table.
+    """
+    dialog = self.widgets.local_league_dialog
+    if dialog is not None:
+        refresh_local_ladders(self)
+        dialog.show()
+        dialog.raise_()
+        return
+    main_layout = QVBoxLayout()
+    thick = self.theme['app']['frame_thickness']
+    main_layout.setContentsMargins(thick, thick, thick, thick)
+    content_frame = create_frame(self)
+    main_layout.addWidget(content_frame)
+    content_layout = QVBoxLayout()
+    content_layout.setContentsMargins(thick, thick, thick, thick)
+    content_layout.setSpacing(thick)
+    model = LocalLadderListModel(
+            tr(('Ladder', 'Players', 'Combats', 'Best DPS')), theme_font(self, 'table'))
+    self.widgets.local_ladder_model = model
+    table = QTableView()
+    style_table(self, table, single_row_selection=True)
+    table.setSortingEnabled(False)
+    table.setModel(model)
+    table.horizontalHeader().setStretchLastSection(True)
+    table.setMinimumSize(self.sidebar_item_width * 2, self.sidebar_item_width)
+    model.modelReset.connect(table.resizeColumnsToContents)
+    refresh_local_ladders(self)
+    table.doubleClicked.connect(lambda index: self.show_local_ladder(model.ladder(index.row())))
+    content_layout.addWidget(table)
+    status_label = create_label(self, '')
+    self.widgets.local_league_label = status_label
+    content_layout.addWidget(status_label)
+
+    def log_folder() -> str:
+        return os.path.dirname(self.settings.value('sto_log_path') or '')
+
+    def add_logs():
+        self.add_local_league_logs(browse_paths(self, log_folder(), 'Logfile (*.log)'))
+
+    def add_folder():
+        folder = browse_folder(self, log_folder())
+        if folder == '':
+            return
+        paths = list()
+        with os.scandir(folder) as entries:
+            for entry in entries:
+                if entry.is_file() and entry.name.endswith('.log'):
+                    paths.append(entry.path)
+        self.add_local_league_logs(sorted(paths))
+
+    def open_ladder():
+        rows = table.selectionModel().selectedRows()
+        if len(rows) > 0:
+            self.show_local_ladder(model.ladder(rows[0].row()))
+
+    dialog = QDialog(self.window)
+    button_style = {
+        tr('Add Logs'): {'callback': add_logs},
+        tr('Add Folder'): {'callback': add_folder},
+        tr('Open'): {'callback': open_ladder},
+        tr('Close'): {'callback': dialog.close}
+    }
+    buttons_layout = create_button_series(self, button_style, 'button', seperator='•')
+    content_layout.addLayout(buttons_layout)
+    content_frame.setLayout(content_layout)
+
+    dialog.setLayout(main_layout)
+    dialog.setWindowTitle(tr('OSCR - Local League'))
+    dialog.setStyleSheet(get_style(self, 'dialog_window'))
+    self.widgets.local_league_dialog = dialog
+    dialog.show()
+
+
+def refresh_local_ladders(self):
+    """
+    Updates the list of ladders in the local league dialog if it was opened before.
+    """
+    if self.widgets.local_ladder_model is not None:
+        self.widgets.local_ladder_model.set_ladders(self.local_league.ladders())
+
+
 def live_parser_toggle(self, activate: bool):
     """
     Activates / Deactivates LiveParser.
@@ -219,12 +547,31 @@ def live_parser_toggle(self, activate: bool):
             return
         FIELD_INDEX_CONVERSION = {0: 0, 1: 2, 2: 3, 3: 4}
         graph_active = self.settings.value('live_graph_active', type=bool)
-        data_buffer = list()
+        data_buffer = LiveGraphBuffer(self.settings.value('live_graph_window', type=int))
         data_field = FIELD_INDEX_CONVERSION[self.settings.value('live_graph_field', type=int)]
-        self.live_parser = LiveParser(log_path, update_callback=lambda p, t: update_live_display(
-                self, p, t, graph_active, data_buffer, data_field),
-                settings=self.live_parser_settings)
-        create_live_parser_window(self)
+        if self.settings.value('live_latency_stats', type=bool):
+            latency_stats = LiveLatencyStats(csv_path=self.settings.value('live_latency_csv'))
+        else:
+            latency_stats = None
+        if self.log_reader is None or self.log_reader.log_path != log_path:
+            self.log_reader = LogTailReader(log_path)
+        snapshot_slot = SnapshotSlot()
+        self.live_parser = LiveLogParser(
+                log_path, update_callback=snapshot_slot.put, settings=self.live_parser_settings,
+                tail_reader=self.log_reader)
+        self.live_combats = self.live_parser.finished_combats
+        session_recorder = None
+        if self.settings.value('live_record_sessions', type=bool):
+            session_recorder = create_session_recorder(self)
+        create_live_parser_window(self, latency_stats)
+        self.live_parser_window.session_recorder = session_recorder
+        update_timer = QTimer(self.live_parser_window)
+        update_timer.setInterval(round(1000 / self.settings.value('live_parser_fps', type=int)))
+        update_timer.timeout.connect(lambda: pull_live_snapshot(
+                self, snapshot_slot, graph_active, data_buffer, data_field,
+                latency_stats=latency_stats, session_recorder=session_recorder))
+        update_timer.start()
+        self.live_parser_window.update_timer = update_timer
     else:
         try:
             self.live_parser_window.close()
@@ -234,6 +581,11 @@ def live_parser_toggle(self, activate: bool):
             self.live_parser.stop()
         except AttributeError:
             pass
+        self.live_parser_window.update_timer.stop()
+        if self.live_parser_window.latency_stats is not None:
+            self.live_parser_window.latency_stats.close()
+        if self.live_parser_window.session_recorder is not None:
+            self.live_parser_window.session_recorder.close()
         self.live_parser_window.update_table.disconnect()
         self.live_parser_window.update_graph.disconnect()
         self.live_parser_window.deleteLater()
@@ -241,12 +593,71 @@ def live_parser_toggle(self, activate: bool):
         self.live_parser = None
         self.widgets.live_parser_table = None
         self.widgets.live_parser_splitter = None
+        self.widgets.live_parser_plot = None
+        self.widgets.live_parser_curves = list()
         self.widgets.live_parser_button.setChecked(False)
 
 
-def create_live_parser_window(self):
+def create_session_recorder(self) -> LiveSessionRecorder | None:
+    """
+    Creates a recorder writing to a new file in the live sessions folder. Returns None if the file
+    cannot be created.
+    """
+    folder = self.config['live_sessions_folder_path']
+    file_name = f'{datetime.now().strftime("%Y-%m-%d %H.%M.%S")}.oscrlive'
+    try:
+        os.makedirs(folder, exist_ok=True)
+        return LiveSessionRecorder(os.path.join(folder, file_name))
+    except OSError:
+        return None
+
+
+def replay_live_session(self):
+    """
+    Prompts the user to select a recorded LiveParser session and replays it in the LiveParser
+    window at the speed set in the settings.
+    """
+    if self.live_parser_window is not None:
+        live_parser_toggle(self, False)
+    path = browse_path(
+            self, self.config['live_sessions_folder_path'] + '/',
+            'LiveParser Session (*.oscrlive);;Any File (*.*)')
+    if path == '':
+        return
+    try:
+        session = LiveSessionReader(path)
+    except (OSError, ValueError):
+        show_message(
+                self, tr('Replay Session'),
+                tr('The file you are trying to open is not a valid LiveParser session.'),
+                'warning')
+        return
+    FIELD_INDEX_CONVERSION = {0: 0, 1: 2, 2: 3, 3: 4}
+    graph_active = self.settings.value('live_graph_active', type=bool)
+    data_buffer = LiveGraphBuffer(self.settings.value('live_graph_window', type=int))
+    data_field = FIELD_INDEX_CONVERSION[self.settings.value('live_graph_field', type=int)]
+    replay = LiveSessionReplay(session, self.settings.value('live_replay_speed', type=int))
+    create_live_parser_window(self, activate_functions=(replay.start, replay.pause))
+    self.live_parser_window.session_recorder = None
+    update_timer = QTimer(self.live_parser_window)
+    update_timer.setInterval(round(1000 / self.settings.value('live_parser_fps', type=int)))
+    update_timer.timeout.connect(lambda: pull_replay_snapshot(
+            self, replay, graph_active, data_buffer, data_field))
+    update_timer.start()
+    self.live_parser_window.update_timer = update_timer
+    self.widgets.live_parser_button.setChecked(True)
+
+
+def create_live_parser_window(
+        self, latency_stats: LiveLatencyStats | None = None,
+        activate_functions: tuple[Callable, Callable] | None = None):
     """
     Creates the LiveParser window.
+
+    Parameters:
+    - :param latency_stats: when supplied, the window shows a row with the latency statistics
+    - :param activate_functions: functions executed when the activate button is switched on and \
+    off; defaults to starting and stopping the LiveParser
     """
     ui_scale = self.config['ui_scale']
     self.config['ui_scale'] = self.config['live_scale']
@@ -281,13 +692,14 @@ def create_live_parser_window(self):
                 self, 'QSplitter', 'splitter', {'border': 'none', 'margin': 0}))
         splitter.setChildrenCollapsible(False)
         self.widgets.live_parser_splitter = splitter
-        graph_frame, curves = create_live_graph(self)
+        graph_frame, plot_widget = create_live_graph(self)
         graph_frame.setMinimumHeight(self.sidebar_item_width * 0.1)
         splitter.addWidget(graph_frame)
-        self.widgets.live_parser_curves = curves
+        self.widgets.live_parser_plot = plot_widget
+        self.widgets.live_parser_curves = list()
         FIELD_INDEX_CONVERSION = {0: 0, 1: 2, 2: 3, 3: 4}
         graph_column = FIELD_INDEX_CONVERSION[self.settings.value('live_graph_field', type=int)]
-        graph_colors = (*self.theme['plot']['color_cycler'][:5], '#eeeeee')
+        graph_colors = self.theme['plot']['live_color_cycler']
         layout.addWidget(splitter, stretch=1)
 
     table = QTableView()
@@ -316,7 +728,7 @@ def create_live_parser_window(self):
         name_index = 0
     placeholder = [0] * len(LIVE_TABLE_HEADER)
     model = LiveParserTableModel(
-            [[('Name', '@handle'), *placeholder, 0]], tr(LIVE_TABLE_HEADER), [],
+            [[('Name', '@handle'), *placeholder, -1]], tr(LIVE_TABLE_HEADER), [],
             theme_font(self, 'live_table_header'), theme_font(self, 'live_table'),
             legend_col=graph_column, colors=graph_colors, name_index=name_index)
     table.setModel(model)
@@ -343,8 +755,11 @@ def create_live_parser_window(self):
     activate_button.setStyleSheet(self.get_style_class(
             'QPushButton', 'toggle_button', {'margin': 0}))
     activate_button.setFont(self.theme_font('app', '@subhead'))
-    activate_button.r_function = lambda: self.live_parser.start()
-    activate_button.l_function = lambda: self.live_parser.stop()
+    if activate_functions is None:
+        activate_button.r_function = lambda: self.live_parser.start()
+        activate_button.l_function = lambda: self.live_parser.stop()
+    else:
+        activate_button.r_function, activate_button.l_function = activate_functions
     bottom_layout.addWidget(activate_button, 0, 0, alignment=ALEFT | AVCENTER)
     icon_size = [self.theme['s.c']['button_icon_size'] * self.config['live_scale'] * 0.8] * 2
     copy_button = create_icon_button(
@@ -366,9 +781,17 @@ def create_live_parser_window(self):
     bottom_layout.addWidget(grip, 0, 4, alignment=ARIGHT | ABOTTOM)
 
     layout.addLayout(bottom_layout)
+    live_window.latency_stats = latency_stats
+    if latency_stats is not None:
+        stats_label = create_label(self, latency_stats.summary())
+        stats_label.setContentsMargins(margin, 0, 0, 0)
+        layout.addWidget(stats_label)
+        self.widgets.live_parser_stats_label = stats_label
+        paint_watcher = PaintWatcher(latency_stats.record_paint, table.viewport())
+        table.viewport().installEventFilter(paint_watcher)
     live_window.setLayout(layout)
     live_window.update_table.connect(lambda data: update_live_table(self, data))
-    live_window.update_graph.connect(update_live_graph)
+    live_window.update_graph.connect(lambda graph_buffer: update_live_graph(self, graph_buffer))
     self.live_parser_window = live_window
     self.config['ui_scale'] = ui_scale
     live_window.show()
@@ -424,7 +847,7 @@ def show_detection_info(self, combat_index: int):
     - :param combat_index: combat index in `self.parser.combats` identifying the combat to show \
     detection data on
     """
-    if combat_index < 0:
+    if combat_index < 0 or self.parser.combats[combat_index] is None:
         return
     dialog = QDialog(self.window)
     thick = self.theme['app']['frame_thickness']
@@ -2,10 +2,11 @@ from math import sqrt, frexp
 
 import numpy as np
 from pyqtgraph import AxisItem, BarGraphItem, PlotWidget
-from PySide6.QtCore import QObject, QRect, QSize, Qt, QThread, Signal, Slot
+from PySide6.QtCore import (
+    QAbstractTableModel, QEvent, QObject, QRect, QSize, Qt, QThread, Signal, Slot)
 from PySide6.QtGui import QFont, QIcon, QMouseEvent, QPainter, QPixmap
 from PySide6.QtWidgets import (
-    QComboBox, QFrame, QLabel, QListWidget, QPushButton, QSizeGrip, QSplitter, QStyle,
+    QComboBox, QDialog, QFrame, QLabel, QListWidget, QPushButton, QSizeGrip, QSplitter, QStyle,
     QStyledItemDelegate, QTableView, QTabWidget, QTreeView, QWidget)
 
 from .widgetbuilder import SMINMIN
@@ -33,6 +34,9 @@ class WidgetStorage():
 
         self.log_duration_value: QLabel
         self.player_duration_value: QLabel
+        self.upload_progress_label: QLabel
+        self.upload_queue_model: QAbstractTableModel
+        self.upload_summary_dialog: QDialog | None = None
 
         self.overview_menu_buttons: list[QPushButton] = list()
         self.overview_tabber: QTabWidget
@@ -62,12 +66,20 @@ class WidgetStorage():
         self.favorite_ladder_selector: QListWidget
         self.variant_combo: QComboBox
         self.ladder_table: QTableView
+        self.ladder_snapshot_label: QLabel
+        self.ladder_snapshot_model: QAbstractTableModel | None = None
+        self.ladder_snapshots_dialog: QDialog | None = None
+        self.local_league_label: QLabel
+        self.local_ladder_model: QAbstractTableModel | None = None
+        self.local_league_dialog: QDialog | None = None
 
         self.live_parser_table: QTableView
         self.live_parser_button: QPushButton
         self.live_parser_curves: list
+        self.live_parser_plot: PlotWidget
         self.live_parser_splitter: QSplitter
         self.live_parser_duration_label: QLabel
+        self.live_parser_stats_label: QLabel
 
     @property
     def analysis_table(self):
@@ -415,7 +427,21 @@ class LiveParserWindow(QFrame):
     Subclass of QWidget providing two custom signals: update_table and update_graph
     """
     update_table = Signal(tuple)
-    update_graph = Signal(list)
+    update_graph = Signal(object)
+
+
+class PaintWatcher(QObject):
+    """
+    Event filter executing a callback whenever the watched widget is painted.
+    """
+    def __init__(self, callback, parent=None):
+        super().__init__(parent)
+        self._callback = callback
+
+    def eventFilter(self, watched: QObject, event: QEvent) -> bool:
+        if event.type() == QEvent.Type.Paint:
+            self._callback()
+        return False
 
 
 class CombatDelegate(QStyledItemDelegate):
@@ -515,4 +541,5 @@ def exec_in_thread(
 
 class ParserSignals(QObject):
     analyzed_combat = Signal(object)
+    analyzed_archived_combat = Signal(object)
     parser_error = Signal(object)
@@ -3,6 +3,9 @@ import os
 import sys
 
 from OSCRUI import OSCRUI
+from OSCRUI.headless import run_headless
+from OSCRUI.leaguebench import run_league_benchmarks
+from OSCRUI.leaguemock import run_league_mock
 
 
 class Launcher():
@@ -608,6 +611,11 @@ class Launcher():
         'plot': {
             'color_cycler': ('#8f54b4', '#B14D54', '#89B177', '#545DB4', '#C8B74E',
                              '#B45492', '#A27534', '#54A9B4', '#E47B1C', '#BCBCBC'),
+            # used by the live parser graph, which may have to tell apart more players
+            'live_color_cycler': ('#8f54b4', '#B14D54', '#89B177', '#545DB4', '#C8B74E',
+                                  '#B45492', '#A27534', '#54A9B4', '#E47B1C', '#BCBCBC',
+                                  '#D4A5E8', '#E38A8F', '#5E8C4B', '#8FA3F0', '#8A7B2A',
+                                  '#F0A6D6', '#6B4A1E', '#2E7A82', '#FFC48A', '#7A7A7A'),
         },
         'plot_legend': {
             'font': ('Overpass', 11, 'Medium'),
@@ -747,12 +755,33 @@ class Launcher():
             'minimum_window_height': 720,
             'settings_path': r'/.OSCR_settings.ini',
             'templog_folder_path': r'/~temp_log_files',
+            'live_sessions_folder_path': r'/live_sessions',
+            'league_cache_folder_path': r'/league_cache',
+            'league_cache_size': 20 * 1024 ** 2,
+            'log_cache_folder_path': r'/log_cache',
+            'log_cache_size': 512 * 1024 ** 2,
+            'league_analyzed_logs': 5,
+            'league_pool_size': 4,
+            'league_retries': 3,
+            'league_retry_backoff': 0.5,
+            'league_timeout': (5, 30),
+            'league_transfer_timeout': (5, 300),
+            'league_prefetch_delay': 500,
+            'upload_queue_path': r'/upload_queue.json',
+            'upload_ledger_path': r'/upload_ledger.json',
+            'upload_concurrency': 2,
+            'ladder_search_delay': 150,
+            'ladder_snapshots_path': r'/ladder_snapshots.db',
+            'local_league_path': r'/local_league.db',
             'link_website': 'https://oscr.stobuilds.com',
             'link_github': 'https://github.com/STOCD/OSCR-UI',
             'link_downloads': 'https://github.com/STOCD/OSCR-UI/releases',
             'link_stobuilds': 'https://discord.gg/stobuilds',
             'link_stocd': 'https://github.com/STOCD',
             'live_graph_fields': ('DPS', 'Debuff', 'Attacks-in Share', 'HPS'),
+            'live_graph_windows': {
+                '15s': 15, '30s': 30, '1 min': 60, '2 min': 120, '5 min': 300, '10 min': 600},
+            'live_replay_speeds': {'1x': 1, '2x': 2, '5x': 5, '10x': 10, '20x': 20, '50x': 50},
             'ui_scale': 1,
             'live_scale': 1,
             'icon_size': 24,
@@ -817,6 +846,13 @@ class Launcher():
                 'live_parser_opacity': 0.85,
                 'live_graph_active': False,
                 'live_graph_field': 0,
+                'live_graph_window': 15,
+                'live_parser_fps': 10,
+                'live_latency_stats': False,
+                'live_latency_csv': '',
+                'live_record_sessions': False,
+                'live_replay_speed': 1,
+                'live_separate_process': False,
                 'first_overview_tab': 0,
                 'ui_scale': 1,
                 'live_scale': 1,
@@ -831,6 +867,12 @@ class Launcher():
 
     @staticmethod
     def launch():
+        if '--headless' in sys.argv:
+            Launcher.launch_headless()
+        if '--league-mock' in sys.argv:
+            Launcher.launch_league_mock()
+        if '--league-bench' in sys.argv:
+            Launcher.launch_league_bench()
         args = {}
         exit_code = OSCRUI(
                 theme=Launcher.theme, args=args,
@@ -838,6 +880,21 @@ class Launcher():
                 versions=(Launcher.__version__, Launcher.version)).run()
         sys.exit(exit_code)
 
+    @staticmethod
+    def launch_headless():
+        exit_code = run_headless(sys.argv[1:], Launcher.base_path(), Launcher.app_config())
+        sys.exit(exit_code)
+
+    @staticmethod
+    def launch_league_mock():
+        exit_code = run_league_mock(sys.argv[1:])
+        sys.exit(exit_code)
+
+    @staticmethod
+    def launch_league_bench():
+        exit_code = run_league_benchmarks(sys.argv[1:], Launcher.app_config())
+        sys.exit(exit_code)
+
 
 if __name__ == '__main__':
     freeze_support()